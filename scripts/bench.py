@@ -0,0 +1,330 @@
+"""Benchmarks dos caminhos críticos da aplicação, corridos fora do Windows.
+
+O user32 e o PowerShell são falsos (scripts/bench_fakes.py), com número de modos,
+latência por chamada e códigos de erro configuráveis. O tkinter é real sob Xvfb
+(--tk real) ou substituído por um falso (--tk stub); a lógica da App é a verdadeira.
+
+Uso, na raiz do repositório:
+
+    python scripts/bench.py [--modes 60] [--latency-ms 0] [--runs 30]
+    xvfb-run python scripts/bench.py --tk real
+    python scripts/bench.py --save-baseline        # grava scripts/bench_baseline.json
+    python scripts/bench.py --user32-trace cliente.jsonl.gz --only time_to_interactive --only apply_res
+
+Com --user32-trace o user32 é a reprodução de uma sessão gravada num cliente
+(RR_USER32_RECORD, ver src/user32_trace.py), com as latências reais desse driver; cada
+App nova recomeça a sessão do início.
+
+Falha (código 1) se o p50 de algum caso passar do baseline em mais de --tolerance
+(relativo) e de --min-delta-ms (absoluto). O baseline depende da máquina: grave-o na
+máquina onde a comparação vai correr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+SCRIPTS = os.path.join(ROOT, "scripts")
+BASELINE = os.path.join(SCRIPTS, "bench_baseline.json")
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "p50": statistics.median(ordered),
+        "p90": cuts[89],
+        "p99": cuts[98],
+        "mean": statistics.fmean(ordered),
+        "max": ordered[-1],
+    }
+
+
+def _timeit(fn: Callable[[], object], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        import bench_fakes
+        import driver_info
+        import resolucao_cliente
+        import win_display
+
+        self.fakes = bench_fakes
+        self.driver_info = driver_info
+        self.rc = resolucao_cliente
+        self.wd = win_display
+        # Sem diálogos bloqueantes no fecho, também com Tk real.
+        resolucao_cliente.messagebox.askyesno = lambda *a, **k: False
+        resolucao_cliente.messagebox.showwarning = lambda *a, **k: None
+        self._ps_argv = bench_fakes.powershell_argv(args.ps_latency_ms)
+        # Reprodução de uma sessão gravada (--user32-trace); None com o user32 falso.
+        self.replay = win_display.user32 if args.user32_trace else None
+        self._tmp = tempfile.mkdtemp(prefix="rr-bench-")
+
+    def cache_dir(self) -> str:
+        return tempfile.mkdtemp(dir=self._tmp)
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def new_app(self, cache_dir: Optional[str] = None):
+        os.environ["LOCALAPPDATA"] = cache_dir or self.cache_dir()
+        if self.replay is not None:
+            self.replay.rewind()
+        self.driver_info.enable_persistent_host(self._ps_argv)
+        app = self.rc.App()
+        app.update_idletasks()  # primeira pintura
+        return app
+
+    def close_app(self, app) -> None:
+        app.on_close()
+
+    def wait_result(self, app, start: Callable[[Callable], None]) -> object:
+        done: List[object] = []
+        start(done.append)
+        while not done:
+            app._process_ui_queue()
+            time.sleep(0.0002)
+        return done[0]
+
+    # ── Casos ──────────────────────────────────────────────────────────────────
+    def cases(self) -> Dict[str, Callable[[int], List[float]]]:
+        return {
+            "enumerate_modes": lambda runs: _timeit(self.wd.enumerate_modes, runs),
+            "get_supported_resolutions": lambda runs: _timeit(self.wd.get_supported_resolutions, runs),
+            "startup_cold": self.case_startup_cold,
+            "startup_warm": self.case_startup_warm,
+            "time_to_first_paint": lambda runs: self.case_startup_milestone(runs, "first_paint_ms"),
+            "time_to_interactive": lambda runs: self.case_startup_milestone(runs, "interactive_ms"),
+            "render_quick_buttons": self.with_app(lambda app: app._render_quick_buttons),
+            "build_quick_profile": self.with_app(
+                lambda app: lambda: app._build_quick_frame(self.rc.MINHAS_RESOLUCOES).destroy()
+            ),
+            "fill_list": self.with_app(lambda app: app._fill_list),
+            "filter_list": self.case_filter_list,
+            "apply_res": self.case_apply_res,
+            "driver_powershell": self.case_driver_powershell,
+        }
+
+    def with_app(self, make_fn: Callable) -> Callable[[int], List[float]]:
+        def run(runs: int) -> List[float]:
+            app = self.new_app()
+            try:
+                return _timeit(make_fn(app), runs)
+            finally:
+                self.close_app(app)
+
+        return run
+
+    def case_startup_cold(self, runs: int) -> List[float]:
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            app = self.new_app()
+            samples.append((time.perf_counter() - t0) * 1000)
+            self.close_app(app)
+        return samples
+
+    def case_startup_warm(self, runs: int) -> List[float]:
+        cache_dir = self.cache_dir()
+        self.close_app(self.new_app(cache_dir))  # grava o cache de modos
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            app = self.new_app(cache_dir)
+            samples.append((time.perf_counter() - t0) * 1000)
+            self.close_app(app)
+        return samples
+
+    def case_startup_milestone(self, runs: int, milestone: str) -> List[float]:
+        # Marcos medidos pela própria App (App.startup_times), com cache de modos vazio.
+        samples = []
+        for _ in range(runs):
+            app = self.new_app()
+            deadline = time.perf_counter() + 10
+            while milestone not in app.startup_times and time.perf_counter() < deadline:
+                app.update()
+                time.sleep(0.0002)
+            samples.append(app.startup_times.get(milestone, float("nan")))
+            self.close_app(app)
+        return samples
+
+    def case_filter_list(self, runs: int) -> List[float]:
+        app = self.new_app()
+        queries = itertools.cycle(["1", "19", "192", "1920", "16:9", "75hz", ""])
+
+        def step():
+            app.filter_var.set(next(queries))
+            app._on_filter_change()
+
+        try:
+            return _timeit(step, runs)
+        finally:
+            self.close_app(app)
+
+    def case_apply_res(self, runs: int) -> List[float]:
+        # Do clique ao resultado na thread do Tk, alternando entre dois modos.
+        app = self.new_app()
+        sizes = [s for s in app.supported if s != app.current_res][-2:] or [app.current_res]
+        if self.replay is not None:
+            # Só os modos que o cliente aplicou têm resposta gravada.
+            sizes = self.replay.applied_sizes() + [app.current_res]
+        samples = []
+        try:
+            for i in range(runs):
+                w, h = sizes[i % len(sizes)]
+                t0 = time.perf_counter()
+                self.wait_result(app, lambda cb: app.apply_res(w, h, on_done=cb))
+                samples.append((time.perf_counter() - t0) * 1000)
+            self.wait_result(app, lambda cb: app.restore(on_done=cb))
+        finally:
+            self.close_app(app)
+        return samples
+
+    def case_driver_powershell(self, runs: int) -> List[float]:
+        di = self.driver_info
+        di.enable_persistent_host(self._ps_argv)
+        di._query_powershell(di._CIM_CMD)  # arranque do processo fica de fora
+        try:
+            return _timeit(lambda: di._query_powershell(di._CIM_CMD), runs)
+        finally:
+            di.shutdown()
+
+
+def _configure_env(args: argparse.Namespace) -> None:
+    os.environ["RR_USER32_BACKEND"] = "bench_fakes:user32_from_env"
+    if args.user32_trace:
+        os.environ["RR_USER32_BACKEND"] = "user32_trace:replay_from_env"
+        os.environ["RR_USER32_REPLAY"] = os.path.abspath(args.user32_trace)
+        os.environ["RR_USER32_REPLAY_SPEED"] = str(args.replay_speed)
+    os.environ["RR_FAKE_MODES"] = str(args.modes)
+    os.environ["RR_FAKE_MONITORS"] = str(args.monitors)
+    os.environ["RR_FAKE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["RR_FAKE_CDS_RESULT"] = str(args.cds_result)
+    os.environ["RR_FAKE_BADMODE_EVERY"] = str(args.badmode_every)
+    os.environ.pop("RR_CONTROL_PORT", None)
+    sys.path[:0] = [SRC, SCRIPTS]
+    tk_mode = args.tk
+    if tk_mode == "auto":
+        tk_mode = "real" if os.environ.get("DISPLAY") else "stub"
+    if tk_mode == "stub":
+        import bench_fakes
+
+        bench_fakes.install_tk_stub()
+    args.tk = tk_mode
+
+
+def _config(args: argparse.Namespace) -> Dict[str, object]:
+    keys = ("modes", "monitors", "latency_ms", "ps_latency_ms", "cds_result", "badmode_every", "tk")
+    config = {k: getattr(args, k) for k in keys}
+    if args.user32_trace:
+        # O user32 falso não é usado: o que conta é a sessão reproduzida.
+        config = {"user32_trace": os.path.basename(args.user32_trace), "replay_speed": args.replay_speed,
+                  "ps_latency_ms": args.ps_latency_ms, "tk": args.tk}
+    return config
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--runs", type=int, default=30)
+    p.add_argument("--modes", type=int, default=60, help="modos por monitor no user32 falso")
+    p.add_argument("--monitors", type=int, default=1)
+    p.add_argument("--latency-ms", type=float, default=0.0, help="latência de cada chamada a user32")
+    p.add_argument("--ps-latency-ms", type=float, default=5.0, help="latência de cada comando PowerShell")
+    p.add_argument("--cds-result", type=int, default=0, help="código devolvido pelas trocas reais (ex.: -1)")
+    p.add_argument("--badmode-every", type=int, default=0, help="cada N-ésimo tamanho falha o CDS_TEST")
+    p.add_argument("--tk", choices=["auto", "real", "stub"], default="auto")
+    p.add_argument("--user32-trace", metavar="FICHEIRO", help="reproduz uma sessão gravada com RR_USER32_RECORD")
+    p.add_argument("--replay-speed", type=float, default=1.0, help="com --user32-trace: fator de velocidade")
+    p.add_argument("--only", action="append", metavar="CASO", help="corre só estes casos (repetível)")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--tolerance", type=float, default=0.5, help="regressão relativa tolerada no p50 (0.5 = +50%%)")
+    p.add_argument("--min-delta-ms", type=float, default=0.5, help="diferenças abaixo disto nunca falham")
+    p.add_argument("--json", metavar="FICHEIRO", help="grava os resultados completos em JSON")
+    args = p.parse_args()
+
+    _configure_env(args)
+    bench = Bench(args)
+    cases = bench.cases()
+    unknown = set(args.only or ()) - set(cases)
+    if unknown:
+        p.error(f"casos desconhecidos: {', '.join(sorted(unknown))} (há: {', '.join(cases)})")
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"Configuração: {_config(args)}")
+    print(f"{'caso':28} {'p50':>9} {'p90':>9} {'p99':>9} {'máx':>9}  (ms)")
+    try:
+        for name, run in cases.items():
+            if args.only and name not in args.only:
+                continue
+            stats = _percentiles(run(args.runs))
+            results[name] = stats
+            print(f"{name:28} {stats['p50']:9.3f} {stats['p90']:9.3f} {stats['p99']:9.3f} {stats['max']:9.3f}")
+    finally:
+        bench.cleanup()
+    if bench.replay is not None:
+        print(f"Reprodução: {bench.replay.calls} chamadas, {bench.replay.misses} sem resposta gravada (última App)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": _config(args), "results": results}, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": _config(args), "p50_ms": {k: round(v["p50"], 4) for k, v in results.items()}}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except OSError:
+        print("Sem baseline: nada a comparar (use --save-baseline).")
+        return 0
+    if baseline.get("config") != _config(args):
+        if args.user32_trace:
+            # Outra sessão (ou o user32 falso): grave um baseline próprio com --baseline.
+            print("Baseline de outra sessão: nada a comparar (use --baseline FICHEIRO --save-baseline).")
+            return 0
+        print(f"Aviso: baseline gravado com outra configuração: {baseline.get('config')}")
+
+    failures = []
+    for name, stats in results.items():
+        base = baseline.get("p50_ms", {}).get(name)
+        if base is None:
+            continue
+        limit = base * (1 + args.tolerance)
+        if stats["p50"] > limit and stats["p50"] - base > args.min_delta_ms:
+            failures.append(f"{name}: p50 {stats['p50']:.3f} ms > {limit:.3f} ms (baseline {base:.3f} ms)")
+    if failures:
+        print("FALHA: regressões face ao baseline:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Micro-benchmark da camada ctypes de win_display: custo por chamada, antes e depois.
+
+"antes" reproduz o módulo anterior (funções sem argtypes/restype, um DEVMODE novo por
+chamada, um tuplo por modo na enumeração); "depois" é win_display tal como está
+(protótipos declarados, DEVMODE e array de modos reutilizados por thread).
+
+A DLL é um user32 falso em C, compilado na hora com cc/gcc/clang, para que a conversão
+de argumentos do ctypes seja a mesma de uma DLL real. No Windows, --dll real usa o
+user32 verdadeiro (só CDS_TEST e enumeração: nada muda no ecrã).
+
+Em CPython, argtypes acrescenta uma verificação from_param por argumento: a chamada
+isolada fica uns 0,3 µs mais cara do que sem protótipos, ruído face ao CDS_TEST de um
+driver real. Os protótipos existem pela correção (handles de 64 bits, DWORD sem sinal,
+LONG de retorno); o ganho está na enumeração e na ausência de alocações por chamada.
+
+    python scripts/bench_bindings.py [--modes 400] [--calls 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+# Tipos iguais aos de ctypes.wintypes na mesma plataforma (DWORD = unsigned long, etc.).
+_FAKE_C = r"""
+#include <wchar.h>
+#include <string.h>
+
+typedef struct {
+    wchar_t dmDeviceName[32];
+    unsigned short dmSpecVersion, dmDriverVersion, dmSize, dmDriverExtra;
+    unsigned long dmFields;
+    long dmPositionX, dmPositionY;
+    unsigned long dmDisplayOrientation, dmDisplayFixedOutput;
+    short dmColor, dmDuplex, dmYResolution, dmTTOption, dmCollate;
+    wchar_t dmFormName[32];
+    unsigned short dmLogPixels;
+    unsigned long dmBitsPerPel, dmPelsWidth, dmPelsHeight, dmDisplayFlags, dmDisplayFrequency;
+    unsigned long dmICMMethod, dmICMIntent, dmMediaType, dmDitherType, dmReserved1, dmReserved2;
+    unsigned long dmPanningWidth, dmPanningHeight;
+} DEVMODEW;
+
+typedef struct {
+    unsigned long cb;
+    wchar_t DeviceName[32];
+    wchar_t DeviceString[128];
+    unsigned long StateFlags;
+    wchar_t DeviceID[128];
+    wchar_t DeviceKey[128];
+} DISPLAY_DEVICEW;
+
+static const unsigned long FREQS[4] = {60, 75, 120, 144};
+static unsigned long n_modes = 400;
+static unsigned long cur_w = 800, cur_h = 600;
+
+static unsigned long mode_w(unsigned long i) { return 800 + 8 * (i / 4); }
+static unsigned long mode_h(unsigned long i) { return 600 + 4 * ((i / 4) % 300); }
+
+void fake_configure(unsigned long modes) { n_modes = modes; }
+int fake_devmode_size(void) { return (int)sizeof(DEVMODEW); }
+int fake_display_device_size(void) { return (int)sizeof(DISPLAY_DEVICEW); }
+
+int GetSystemMetrics(int index) { return index == 0 ? (int)cur_w : index == 1 ? (int)cur_h : 0; }
+
+long EnumDisplayDevicesW(const wchar_t *device, unsigned long index, DISPLAY_DEVICEW *dd, unsigned long flags) {
+    if (index > 0) return 0;
+    wcscpy(dd->DeviceName, device ? L"\\\\.\\DISPLAY1\\Monitor0" : L"\\\\.\\DISPLAY1");
+    wcscpy(dd->DeviceString, L"Fake GPU");
+    wcscpy(dd->DeviceID, L"PCI\\VEN_FAKE");
+    dd->StateFlags = 0x5;
+    return 1;
+}
+
+long EnumDisplaySettingsW(const wchar_t *device, unsigned long index, DEVMODEW *dm) {
+    unsigned long i = index;
+    if (index == (unsigned long)-1 || index == 0xFFFFFFFFUL) {
+        dm->dmPelsWidth = cur_w; dm->dmPelsHeight = cur_h;
+        dm->dmDisplayFrequency = 60; dm->dmBitsPerPel = 32;
+        return 1;
+    }
+    if (i >= n_modes) return 0;
+    dm->dmPelsWidth = mode_w(i);
+    dm->dmPelsHeight = mode_h(i);
+    dm->dmDisplayFrequency = FREQS[i % 4];
+    dm->dmBitsPerPel = 32;
+    dm->dmDisplayOrientation = 0;
+    dm->dmDriverVersion = 1;
+    return 1;
+}
+
+long ChangeDisplaySettingsExW(const wchar_t *device, DEVMODEW *dm, void *hwnd, unsigned long flags, void *lparam) {
+    unsigned long i;
+    if (!dm) return 0;
+    for (i = 0; i < n_modes; i += 4) {
+        if (mode_w(i) == dm->dmPelsWidth && mode_h(i) == dm->dmPelsHeight) {
+            if (!(flags & 0x2)) { cur_w = dm->dmPelsWidth; cur_h = dm->dmPelsHeight; }
+            return 0;
+        }
+    }
+    return -2;
+}
+"""
+
+_state = {"path": None, "modes": 400}
+
+
+def _compiler() -> Optional[str]:
+    for name in (os.environ.get("CC", ""), "cc", "gcc", "clang"):
+        if name and shutil.which(name):
+            return name
+    return None
+
+
+def build_fake(workdir: str) -> Optional[str]:
+    cc = _compiler()
+    if cc is None:
+        return None
+    src = os.path.join(workdir, "fake_user32.c")
+    out = os.path.join(workdir, "fake_user32" + (".dll" if sys.platform == "win32" else ".so"))
+    with open(src, "w", encoding="utf-8") as f:
+        f.write(_FAKE_C)
+    subprocess.run([cc, "-O2", "-shared", "-fPIC", "-o", out, src], check=True)
+    return out
+
+
+def fake_dll() -> ctypes.CDLL:
+    """Fábrica para RR_USER32_BACKEND=bench_bindings:fake_dll."""
+    dll = ctypes.CDLL(_state["path"])
+    dll.fake_configure(ctypes.c_ulong(_state["modes"]))
+    return dll
+
+
+# ── Implementação anterior (referência) ────────────────────────────────────────
+class Legacy:
+    """Mesmo código de win_display antes dos protótipos, sobre uma DLL sem argtypes."""
+
+    def __init__(self, dll, wd):
+        self.user32 = dll
+        self.wd = wd
+
+    def _new_devmode(self):
+        dm = self.wd.DEVMODE()
+        dm.dmSize = ctypes.sizeof(self.wd.DEVMODE)
+        return dm
+
+    def test_resolution(self, width: int, height: int, device=None) -> bool:
+        dm = self._new_devmode()
+        dm.dmPelsWidth = width
+        dm.dmPelsHeight = height
+        dm.dmFields = self.wd.DM_PELSWIDTH | self.wd.DM_PELSHEIGHT
+        return self.user32.ChangeDisplaySettingsExW(device, ctypes.byref(dm), None, self.wd.CDS_TEST, None) == 0
+
+    def read_mode(self, index: int, device=None) -> Tuple[int, int]:
+        dm = self._new_devmode()
+        self.user32.EnumDisplaySettingsW(device, index, ctypes.byref(dm))
+        return int(dm.dmPelsWidth), int(dm.dmPelsHeight)
+
+    def enumerate_modes(self, device=None):
+        rows: List[Tuple[int, int, int, int, int]] = []
+        i = 0
+        dm = self._new_devmode()
+        while self.user32.EnumDisplaySettingsW(device, i, ctypes.byref(dm)):
+            if dm.dmPelsWidth >= 800:
+                rows.append(
+                    (dm.dmPelsWidth, dm.dmPelsHeight, dm.dmDisplayFrequency, dm.dmBitsPerPel, dm.dmDisplayOrientation)
+                )
+            i += 1
+        return self.wd.ModeCatalog(rows)
+
+
+def _per_call_us(fn: Callable[[], object], calls: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / calls * 1e6
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--modes", type=int, default=400, help="modos devolvidos pela DLL falsa")
+    p.add_argument("--calls", type=int, default=20000, help="chamadas por medição")
+    p.add_argument("--dll", choices=["fake", "real"], default="fake")
+    args = p.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rr-bindings-")
+    try:
+        if args.dll == "real":
+            if sys.platform != "win32":
+                p.error("--dll real só no Windows")
+            legacy_dll = ctypes.WinDLL("user32")
+        else:
+            try:
+                _state["path"] = build_fake(workdir)
+            except subprocess.CalledProcessError as exc:
+                print(f"Falha a compilar a DLL falsa: {exc}", file=sys.stderr)
+                return 1
+            if _state["path"] is None:
+                print("Sem compilador C (cc/gcc/clang): use --dll real no Windows.", file=sys.stderr)
+                return 1
+            _state["modes"] = args.modes
+            # win_display importa a fábrica por nome: tem de encontrar este módulo, não uma cópia.
+            sys.modules.setdefault("bench_bindings", sys.modules[__name__])
+            os.environ["RR_USER32_BACKEND"] = "bench_bindings:fake_dll"
+            legacy_dll = fake_dll()
+        sys.path.insert(0, SRC)
+        import win_display as wd
+
+        if args.dll == "fake" and wd.user32.fake_devmode_size() != ctypes.sizeof(wd.DEVMODE):
+            print("DEVMODE do C e do ctypes com tamanhos diferentes.", file=sys.stderr)
+            return 1
+        legacy = Legacy(legacy_dll, wd)
+        w, h = wd.get_supported_resolutions()[-1]
+        device = None if args.dll == "real" else "\\\\.\\DISPLAY1"
+
+        rows = [
+            ("test_resolution (CDS_TEST)",
+             lambda: legacy.test_resolution(w, h, device),
+             lambda: wd.test_resolution(w, h, device), args.calls),
+            ("EnumDisplaySettingsW (1 modo)",
+             lambda: legacy.read_mode(0, device),
+             lambda: wd._read_current(device), args.calls),
+            (f"enumerate_modes ({len(wd.enumerate_modes(device))} modos)",
+             lambda: legacy.enumerate_modes(device),
+             lambda: wd.enumerate_modes(device), max(1, args.calls // 200)),
+        ]
+        assert legacy.enumerate_modes(device) == wd.enumerate_modes(device)
+        print(f"DLL: {'user32 real' if args.dll == 'real' else _state['path']}")
+        print(f"{'caso':34} {'antes':>10} {'depois':>10} {'ganho':>7}  (µs por chamada)")
+        for name, before, after, calls in rows:
+            t_before = _per_call_us(before, calls)
+            t_after = _per_call_us(after, calls)
+            print(f"{name:34} {t_before:10.2f} {t_after:10.2f} {t_before / t_after:6.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""Dublês para os benchmarks (scripts/bench.py): user32, PowerShell e tkinter falsos.
+
+user32 falso, configurado por variáveis de ambiente e carregado por win_display via
+RR_USER32_BACKEND=bench_fakes:user32_from_env:
+
+    RR_FAKE_MODES           número de modos por monitor (omissão 60)
+    RR_FAKE_MONITORS        número de monitores (omissão 1)
+    RR_FAKE_LATENCY_MS      latência de cada chamada (omissão 0)
+    RR_FAKE_CDS_RESULT      código devolvido pelas trocas reais (omissão 0 = sucesso)
+    RR_FAKE_BADMODE_EVERY   cada N-ésimo tamanho falha o CDS_TEST (omissão 0 = nenhum)
+    RR_FAKE_DPI_SCALE       escala de um processo sem DPI declarado: GetSystemMetrics
+                            devolve tamanhos virtualizados (ex.: 1.5 = 150 %; omissão 1)
+    RR_FAKE_SETTLE_MS       atraso entre o fim de uma troca aceite e o modo em uso mudar
+                            (omissão 0; negativo = nunca muda, driver que mente)
+    RR_FAKE_SWITCH_MS       por tamanho, duração da troca real e atraso até estabilizar:
+                            "1920x1080=400/600,1280x720=4000" (ms; sobrepõe-se aos acima)
+    RR_FAKE_DRIVER_VERSION  DriverVersion do adaptador no "registo" (omissão 31.0.15.1000);
+                            mudar o atributo driver_version simula uma atualização do driver
+
+PowerShell falso (protocolo de ps_host):  python bench_fakes.py powershell [--latency-ms N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import types
+from typing import Any, Dict, List, Optional, Tuple
+
+_STANDARD = [
+    (800, 600), (1024, 768), (1152, 864), (1280, 720), (1280, 768), (1280, 800), (1280, 1024),
+    (1360, 768), (1366, 768), (1440, 900), (1600, 900), (1680, 1050), (1920, 1080), (1920, 1200),
+    (2048, 1152), (2560, 1080), (2560, 1440), (2560, 1600), (3440, 1440), (3840, 2160),
+]
+_FREQS = (60, 75, 120, 144)
+
+
+def _spin(seconds: float) -> None:
+    # time.sleep() tem granularidade de vários ms em alguns sistemas: espera ativa.
+    if seconds <= 0:
+        return
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def parse_switch_latencies(text: str) -> Dict[Tuple[int, int], Tuple[float, float]]:
+    """"WxH=retorno[/estável],..." (ms) → {(w, h): (retorno, estável)} em segundos."""
+    latencies: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        size, _, times = item.partition("=")
+        w, h = size.lower().split("x")
+        back, _, settle = times.partition("/")
+        latencies[int(w), int(h)] = (float(back) / 1000.0, float(settle or 0) / 1000.0)
+    return latencies
+
+
+def make_modes(count: int) -> List[Tuple[int, int, int, int]]:
+    """`count` modos (w, h, freq, bpp): tamanhos comuns primeiro, depois sintéticos."""
+    modes: List[Tuple[int, int, int, int]] = []
+    i = 0
+    while len(modes) < count:
+        if i < len(_STANDARD):
+            w, h = _STANDARD[i]
+        else:
+            k = i - len(_STANDARD)
+            w, h = 800 + 8 * k, 600 + 4 * (k % 300)
+        for freq in _FREQS:
+            if len(modes) < count:
+                modes.append((w, h, freq, 32))
+        i += 1
+    return modes
+
+
+class FakeUser32:
+    """Implementa só o que win_display usa; recebe os mesmos ctypes.byref() que o real."""
+
+    def __init__(self, modes: int = 60, monitors: int = 1, latency_ms: float = 0.0,
+                 cds_result: int = 0, badmode_every: int = 0, dpi_scale: float = 1.0,
+                 settle_ms: float = 0.0,
+                 switch_latencies: Optional[Dict[Tuple[int, int], Tuple[float, float]]] = None,
+                 driver_version: str = "31.0.15.1000"):
+        self.latency = latency_ms / 1000.0
+        self.cds_result = cds_result
+        self.badmode_every = badmode_every
+        self.dpi_scale = dpi_scale or 1.0
+        self.settle = settle_ms / 1000.0
+        self.switch_latencies = switch_latencies or {}
+        self.driver_version = driver_version
+        self.calls = 0
+        self.monitors: Dict[str, Dict[str, Any]] = {}
+        all_modes = make_modes(modes)
+        for n in range(monitors):
+            current = (1920, 1080, 60, 32) if (1920, 1080, 60, 32) in all_modes else all_modes[-1]
+            self.monitors[rf"\\.\DISPLAY{n + 1}"] = {
+                "modes": all_modes,
+                "current": current,
+                "pos": (1920 * n, 0),
+                "primary": n == 0,
+            }
+        self._staged: Dict[str, Tuple[int, int, int, int]] = {}
+        # Trocas aceites ainda por refletir no modo em uso: monitor → (modo, instante).
+        self._settling: Dict[str, Tuple[Tuple[int, int, int, int], float]] = {}
+
+    def _current(self, name: str) -> Tuple[int, int, int, int]:
+        m = self.monitors[name]
+        pending = self._settling.get(name)
+        if pending is not None and time.perf_counter() >= pending[1]:
+            m["current"] = pending[0]
+            del self._settling[name]
+        return m["current"]
+
+    def _switch(self, name: str, mode: Tuple[int, int, int, int]) -> None:
+        back, settle = self.switch_latencies.get(mode[:2], (0.0, self.settle))
+        if back:
+            time.sleep(back)  # trocas de segundos: sem espera ativa
+        if settle < 0:
+            return
+        if settle == 0:
+            self.monitors[name]["current"] = mode
+        else:
+            self._settling[name] = (mode, time.perf_counter() + settle)
+
+    def _call(self) -> None:
+        self.calls += 1
+        _spin(self.latency)
+
+    def _device(self, device: Any) -> str:
+        if device is None:
+            return next(name for name, m in self.monitors.items() if m["primary"])
+        return device
+
+    def GetSystemMetrics(self, index: int) -> int:
+        self._call()
+        if index not in (0, 1):
+            return 0
+        return int(self._current(self._device(None))[index] / self.dpi_scale)
+
+    def EnumDisplayDevicesW(self, device: Any, index: int, pdd: Any, flags: int) -> int:
+        self._call()
+        dd = pdd._obj
+        names = list(self.monitors)
+        if device is None:
+            if index >= len(names):
+                return 0
+            dd.DeviceName = names[index]
+            dd.DeviceString = "Fake GPU"
+            dd.DeviceID = r"PCI\VEN_FAKE&DEV_0001"
+            dd.DeviceKey = r"\Registry\Machine\System\CurrentControlSet\Control\Video\{FAKE}\%04d" % index
+            dd.StateFlags = 0x1 | (0x4 if self.monitors[names[index]]["primary"] else 0)
+            return 1
+        if index > 0:
+            return 0
+        dd.DeviceName = device + r"\Monitor0"
+        dd.DeviceString = "Fake Monitor"
+        dd.DeviceID = r"MONITOR\FAKE" + device[-1]
+        dd.StateFlags = 0x3
+        return 1
+
+    def EnumDisplaySettingsW(self, device: Any, index: int, pdm: Any) -> int:
+        self._call()
+        dm = pdm._obj
+        m = self.monitors[self._device(device)]
+        if index in (-1, 0xFFFFFFFF):
+            mode = self._current(self._device(device))
+        elif index >= len(m["modes"]):
+            return 0
+        else:
+            mode = m["modes"][index]
+        dm.dmPelsWidth, dm.dmPelsHeight, dm.dmDisplayFrequency, dm.dmBitsPerPel = mode
+        dm.dmPositionX, dm.dmPositionY = m["pos"]
+        dm.dmDriverVersion = 1
+        return 1
+
+    def DriverVersion(self, device_key: str) -> str:
+        """Não existe em user32: substitui a leitura do registo feita por win_display."""
+        return self.driver_version
+
+    def _match(self, m: Dict[str, Any], dm: Any):
+        for i, mode in enumerate(m["modes"]):
+            if mode[0] != dm.dmPelsWidth or mode[1] != dm.dmPelsHeight:
+                continue
+            if dm.dmFields & 0x00400000 and mode[2] != dm.dmDisplayFrequency:
+                continue
+            if self.badmode_every and (i // len(_FREQS)) % self.badmode_every == self.badmode_every - 1:
+                return None
+            return mode
+        return None
+
+    def ChangeDisplaySettingsExW(self, device: Any, pdm: Any, hwnd: Any, flags: int, lparam: Any) -> int:
+        self._call()
+        if pdm is None:  # commit das alterações pendentes (CDS_NORESET)
+            for name, mode in self._staged.items():
+                self._switch(name, mode)
+            self._staged.clear()
+            return 0
+        name = self._device(device)
+        mode = self._match(self.monitors[name], pdm._obj)
+        if mode is None:
+            return -2
+        if flags & 0x2:  # CDS_TEST
+            return 0
+        if self.cds_result:
+            return self.cds_result
+        if flags & 0x10000000:  # CDS_NORESET
+            self._staged[name] = mode
+        else:
+            self._switch(name, mode)
+        return 0
+
+
+def user32_from_env() -> FakeUser32:
+    env = os.environ.get
+    return FakeUser32(
+        modes=int(env("RR_FAKE_MODES", "60")),
+        monitors=int(env("RR_FAKE_MONITORS", "1")),
+        latency_ms=float(env("RR_FAKE_LATENCY_MS", "0")),
+        cds_result=int(env("RR_FAKE_CDS_RESULT", "0")),
+        badmode_every=int(env("RR_FAKE_BADMODE_EVERY", "0")),
+        dpi_scale=float(env("RR_FAKE_DPI_SCALE", "1")),
+        settle_ms=float(env("RR_FAKE_SETTLE_MS", "0")),
+        switch_latencies=parse_switch_latencies(env("RR_FAKE_SWITCH_MS", "")),
+        driver_version=env("RR_FAKE_DRIVER_VERSION", "31.0.15.1000"),
+    )
+
+
+# ── tkinter falso (sem X / Xvfb) ───────────────────────────────────────────────
+class _Widget:
+    """Aceita qualquer chamada; Listbox e Var guardam estado para a lógica da App."""
+
+    def __init__(self, master: Any = None, *args: Any, **kw: Any):
+        self.master = master
+        self._kw = dict(kw)
+        self._children: List["_Widget"] = []
+        self._items: List[str] = []
+        self._sel: Tuple[int, ...] = ()
+        self._alive = True
+        if isinstance(master, _Widget):
+            master._children.append(self)
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *a, **k: None
+
+    def __getitem__(self, key: str):
+        return self
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._kw[key] = value
+
+    def config(self, **kw: Any) -> None:
+        self._kw.update(kw)
+
+    configure = config
+
+    def cget(self, key: str):
+        return self._kw.get(key)
+
+    def winfo_children(self):
+        return [c for c in self._children if c._alive]
+
+    def winfo_exists(self) -> bool:
+        return self._alive
+
+    def destroy(self) -> None:
+        self._alive = False
+        for child in self._children:
+            child.destroy()
+
+    # Listbox
+    def insert(self, index: Any, *items: str) -> None:
+        if index == "end":
+            self._items.extend(items)
+        else:
+            self._items[int(index):int(index)] = list(items)
+
+    def delete(self, first: Any, last: Any = None) -> None:
+        if last == "end":
+            del self._items[int(first):]
+        elif last is None:
+            del self._items[int(first)]
+        else:
+            del self._items[int(first):int(last) + 1]
+
+    def size(self) -> int:
+        return len(self._items)
+
+    def curselection(self):
+        return self._sel
+
+    def selection_set(self, index: int) -> None:
+        self._sel = (index,)
+
+    def selection_clear(self, *args: Any) -> None:
+        self._sel = ()
+
+
+class _Tk(_Widget):
+    def __init__(self, *args: Any, **kw: Any):
+        super().__init__()
+        self._after: List[Tuple[Any, Tuple[Any, ...]]] = []
+
+    def after(self, ms: int, func: Any = None, *args: Any):
+        if func is not None:
+            self._after.append((func, args))
+        return f"after#{len(self._after)}"
+
+    def after_idle(self, func: Any, *args: Any):
+        return self.after(0, func, *args)
+
+    def update(self) -> None:
+        pending, self._after = self._after, []
+        for func, args in pending:
+            func(*args)
+
+    update_idletasks = update
+
+    def winfo_screenwidth(self) -> int:
+        return 1920
+
+    def winfo_screenheight(self) -> int:
+        return 1080
+
+    def winfo_fpixels(self, distance: str) -> float:
+        return 96.0
+
+
+class _Var:
+    def __init__(self, master: Any = None, value: Any = "", name: Any = None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value: Any) -> None:
+        self._value = value
+
+    def trace_add(self, *args: Any) -> None:
+        pass
+
+
+def install_tk_stub() -> None:
+    """Substitui tkinter em sys.modules; chamar antes de importar resolucao_cliente."""
+    tk = types.ModuleType("tkinter")
+    for name in ("Frame", "Label", "Button", "Listbox", "Scrollbar", "OptionMenu", "Toplevel", "Entry", "Canvas"):
+        setattr(tk, name, type(name, (_Widget,), {}))
+    tk.Tk = _Tk
+    tk.StringVar = tk.BooleanVar = tk.IntVar = _Var
+    tk.TclError = RuntimeError
+    tk.END = "end"
+    messagebox = types.ModuleType("tkinter.messagebox")
+    for name in ("showinfo", "showwarning", "showerror"):
+        setattr(messagebox, name, lambda *a, **k: None)
+    messagebox.askyesno = lambda *a, **k: False
+    tk.messagebox = messagebox
+    sys.modules["tkinter"] = tk
+    sys.modules["tkinter.messagebox"] = messagebox
+
+
+# ── PowerShell falso ───────────────────────────────────────────────────────────
+_RESPOSTA = '[{"Name":"Fake GPU","DriverVersion":"31.0.15.1000","Status":"OK"}]'
+
+
+def fake_powershell(latency_ms: float) -> int:
+    """Responde a cada pedido com um Win32_VideoController fixo, no protocolo de ps_host.
+
+    Comandos "rr:..." simulam avarias (scripts/ps_host_check.py): "rr:crash" termina sem
+    responder, "rr:sleep:S" demora S segundos, "rr:fail" responde com rc 1, "rr:echo:T"
+    devolve T e "rr:stale" escreve antes o marcador de outro pedido.
+    """
+    import base64
+
+    for line in sys.stdin:
+        req_id, _, payload = line.strip().partition(" ")
+        if not req_id:
+            continue
+        command = base64.b64decode(payload).decode("utf-8") if payload else ""
+        time.sleep(latency_ms / 1000.0)
+        out, rc = _RESPOSTA, 0
+        if command == "rr:crash":
+            return 1
+        if command.startswith("rr:sleep:"):
+            time.sleep(float(command[len("rr:sleep:"):]))
+        elif command == "rr:fail":
+            out, rc = "Get-CimInstance : Acesso negado.", 1
+        elif command.startswith("rr:echo:"):
+            out = command[len("rr:echo:"):]
+        elif command == "rr:stale":
+            out = f"<<RR-FIM:{int(req_id) - 1}:0>>\n{_RESPOSTA}"
+        sys.stdout.write(f"{out}\n\n<<RR-FIM:{req_id}:{rc}>>\n")
+        sys.stdout.flush()
+    return 0
+
+
+def powershell_argv(latency_ms: float) -> List[str]:
+    return [sys.executable, os.path.abspath(__file__), "powershell", "--latency-ms", str(latency_ms)]
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("role", choices=["powershell"])
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    args = p.parse_args()
+    sys.exit(fake_powershell(args.latency_ms))
@@ -0,0 +1,119 @@
+"""Verifica a leitura nativa de src/driver_info.py fora do Windows, com dados gravados.
+
+As listas abaixo são o que win_display.list_display_adapters() e as subchaves da classe
+de vídeo no registo devolveram em clientes reais (placa integrada com duas saídas,
+portátil híbrido, sessão RDP com driver espelho). A correspondência DeviceID →
+MatchingDeviceId, a formatação e a leitura do JSON do PowerShell têm de dar o texto
+esperado sem lançar nenhum processo.
+
+    python scripts/driver_info_check.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import driver_info  # noqa: E402
+
+_INTEL = r"PCI\VEN_8086&DEV_3E92&SUBSYS_86941043&REV_00"
+_NVIDIA = r"PCI\VEN_10DE&DEV_1F95&SUBSYS_13DD1043&REV_A1"
+
+# EnumDisplayDevicesW: uma entrada por saída (StateFlags 0x1 = ligada, 0x4 = principal, 0x8 = espelho).
+INTEGRADA = [
+    {"DeviceName": r"\\.\DISPLAY1", "DeviceString": "Intel(R) UHD Graphics 630", "StateFlags": 0x5,
+     "DeviceID": _INTEL, "DeviceKey": r"\Registry\Machine\System\CurrentControlSet\Control\Video\{A1}\0000"},
+    {"DeviceName": r"\\.\DISPLAY2", "DeviceString": "Intel(R) UHD Graphics 630", "StateFlags": 0x0,
+     "DeviceID": _INTEL, "DeviceKey": r"\Registry\Machine\System\CurrentControlSet\Control\Video\{A1}\0001"},
+]
+HIBRIDO = [
+    {"DeviceName": r"\\.\DISPLAY1", "DeviceString": "Intel(R) UHD Graphics 630", "StateFlags": 0x5,
+     "DeviceID": _INTEL, "DeviceKey": ""},
+    {"DeviceName": r"\\.\DISPLAY3", "DeviceString": "NVIDIA GeForce GTX 1650", "StateFlags": 0x0,
+     "DeviceID": _NVIDIA, "DeviceKey": ""},
+]
+RDP = [
+    {"DeviceName": r"\\.\DISPLAY1", "DeviceString": "Microsoft Basic Display Adapter", "StateFlags": 0x5,
+     "DeviceID": r"ROOT\BasicDisplay\0000", "DeviceKey": ""},
+    {"DeviceName": r"\\.\DISPLAY2", "DeviceString": "RDPUDD Chained DD", "StateFlags": 0x9,
+     "DeviceID": "RDPUDD_Chained_DD", "DeviceKey": ""},
+]
+
+# Subchaves 0000, 0001... de HKLM\...\Class\{4d36e968-...}, com os valores que driver_info lê.
+CLASSE = [
+    {"DriverDesc": "Intel(R) UHD Graphics 630", "DriverVersion": "31.0.101.2111",
+     "MatchingDeviceId": r"pci\ven_8086&dev_3e92", "ProviderName": "Intel Corporation"},
+    # Genérica do mesmo fabricante: perde para a mais específica acima.
+    {"DriverDesc": "Intel(R) Display Adapter", "DriverVersion": "10.0.0.1",
+     "MatchingDeviceId": r"pci\ven_8086"},
+    {"DriverDesc": "NVIDIA GeForce GTX 1650", "DriverVersion": "31.0.15.5186",
+     "MatchingDeviceId": r"pci\ven_10de&dev_1f95&subsys_13dd1043"},
+    {"DriverDesc": "Microsoft Basic Display Adapter", "DriverVersion": "10.0.19041.3636",
+     "MatchingDeviceId": r"root\basicdisplay"},
+]
+
+# Saída de "Get-CimInstance Win32_VideoController | ConvertTo-Json -Compress".
+CIM_UMA = '{"Name":"Intel(R) UHD Graphics 630","DriverVersion":"31.0.101.2111","Status":"OK"}'
+CIM_DUAS = (
+    '[{"Name":"Intel(R) UHD Graphics 630","DriverVersion":"31.0.101.2111","Status":"OK"},'
+    '{"Name":"NVIDIA GeForce GTX 1650","DriverVersion":null,"Status":"Error"}]'
+)
+
+
+def main() -> int:
+    failures: List[str] = []
+
+    def expect(got: object, wanted: object, text: str) -> None:
+        ok = got == wanted
+        print(f"  {'ok ' if ok else 'FALHOU'} {text}")
+        if not ok:
+            print(f"         obtido:   {got!r}\n         esperado: {wanted!r}")
+            failures.append(text)
+
+    expect(
+        driver_info._format_native(INTEGRADA, CLASSE),
+        "Intel(R) UHD Graphics 630  |  Driver: 31.0.101.2111  |  Status: OK",
+        "placa com duas saídas: uma linha, a da saída ligada",
+    )
+    expect(
+        driver_info._format_native(HIBRIDO, CLASSE),
+        "Intel(R) UHD Graphics 630  |  Driver: 31.0.101.2111  |  Status: OK\n"
+        "NVIDIA GeForce GTX 1650  |  Driver: 31.0.15.5186  |  Status: Inativo",
+        "portátil híbrido: duas placas, a dedicada inativa",
+    )
+    expect(
+        driver_info._format_native(RDP, CLASSE),
+        "Microsoft Basic Display Adapter  |  Driver: 10.0.19041.3636  |  Status: OK",
+        "sessão RDP: o driver espelho fica de fora",
+    )
+    expect(driver_info._format_native(INTEGRADA, []), None, "registo sem correspondência: recorre ao PowerShell")
+    expect(
+        (driver_info._match_class_entry(_INTEL, CLASSE) or {}).get("DriverVersion"),
+        "31.0.101.2111",
+        "MatchingDeviceId mais específico ganha",
+    )
+    expect(driver_info._match_class_entry(r"PCI\VEN_1002&DEV_73BF", CLASSE), None, "placa sem entrada na classe")
+
+    expect(
+        driver_info._format_json_block(CIM_UMA),
+        "Intel(R) UHD Graphics 630  |  Driver: 31.0.101.2111  |  Status: OK",
+        "PowerShell: um objeto",
+    )
+    expect(
+        driver_info._format_json_block(CIM_DUAS),
+        "Intel(R) UHD Graphics 630  |  Driver: 31.0.101.2111  |  Status: OK\n"
+        "NVIDIA GeForce GTX 1650  |  Driver: —  |  Status: Error",
+        "PowerShell: lista, com versão em falta",
+    )
+    expect(driver_info._format_json_block("Get-CimInstance : Acesso negado"), None, "PowerShell: erro em texto")
+    expect(driver_info._format_json_block("42"), None, "PowerShell: JSON sem objetos")
+
+    print("OK" if not failures else f"{len(failures)} verificação(ões) falharam")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Verifica o supervisor de src/driver_worker.py fora do Windows, com um driver que pendura.
+
+O filho é o win_display verdadeiro sobre o user32 falso de bench_fakes, servido pelo
+mesmo ciclo de driver_worker.serve(); com --hang <função>, essa função nunca regressa
+(como um ChangeDisplaySettingsExW preso no driver). O supervisor tem de devolver
+DriverTimeout dentro do prazo, matar o filho, lançar outro e continuar a responder.
+
+    python scripts/driver_worker_check.py [--deadline 1.0] [--hang change_resolution]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, HERE)
+
+import driver_worker  # noqa: E402
+
+# Folga para matar o filho e lançar outro depois do prazo.
+_MARGEM = 1.0
+
+
+def stand_in(hang: str) -> int:
+    """Papel de filho: win_display sobre o user32 falso, com `hang` pendurada."""
+    os.environ["RR_USER32_BACKEND"] = "bench_fakes:user32_from_env"
+    import win_display
+
+    table = {name: getattr(win_display, name) for name in driver_worker.FUNCOES}
+    if hang:
+        table[hang] = lambda *args: time.sleep(3600)
+    table["getpid"] = os.getpid
+    return driver_worker.serve(table)
+
+
+def check(deadline: float, hang: str) -> int:
+    argv = [sys.executable, os.path.abspath(__file__), "worker", "--hang", hang]
+    client = driver_worker.DriverClient(argv, deadlines={hang: deadline})
+    failures: List[str] = []
+
+    def expect(ok: bool, text: str) -> None:
+        print(f"  {'ok ' if ok else 'FALHOU'} {text}")
+        if not ok:
+            failures.append(text)
+
+    try:
+        pid = client.call("getpid")
+        size = client.function("get_current_resolution")()
+        expect(isinstance(size, tuple) and len(size) == 2, f"get_current_resolution → {size}")
+        catalog = client.function("enumerate_modes")()
+        expect(len(catalog) > 0, f"enumerate_modes → {len(catalog)} modos")
+        topology = client.function("capture_topology")()
+        if hang != "restore_topology":
+            restored = client.function("restore_topology")(topology)
+            expect(restored == (True, ""), f"restore_topology de {len(topology)} monitor(es)")
+
+        t0 = time.perf_counter()
+        args = (topology,) if hang == "restore_topology" else (1280, 720)
+        try:
+            client.call(hang, *args)
+            expect(False, f"{hang} pendurada devolveu resultado")
+        except driver_worker.DriverTimeout as exc:
+            elapsed = time.perf_counter() - t0
+            expect(elapsed < deadline + _MARGEM, f"DriverTimeout em {elapsed:.2f} s (prazo {deadline:g} s): {exc}")
+        expect(client.restarts == 1, f"filhos reiniciados: {client.restarts}")
+
+        new_pid = client.call("getpid")
+        expect(new_pid != pid, f"filho substituído (pid {pid} → {new_pid})")
+        expect(client.function("test_resolution")(1280, 720) is True, "test_resolution depois do reinício")
+
+        # Testes em paralelo (mode_probe): cada um num filho livre, sem esperar pelos outros.
+        results: List[object] = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client.function("test_resolution")(1920, 1080)))
+            for _ in range(driver_worker.MAX_PROCESSOS)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        expect(results == [True] * len(threads), f"{len(threads)} testes em paralelo")
+
+        try:
+            client.call("nao_existe")
+            expect(False, "função desconhecida aceite")
+        except driver_worker.RemoteError:
+            expect(client.restarts == 1, "erro da função não reinicia o filho")
+    finally:
+        client.close()
+    print("OK" if not failures else f"{len(failures)} verificação(ões) falharam")
+    return 0 if not failures else 1
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("role", nargs="?", choices=["check", "worker"], default="check", help=argparse.SUPPRESS)
+    p.add_argument("--deadline", type=float, default=1.0, help="prazo da função pendurada (s)")
+    p.add_argument("--hang", default="change_resolution", choices=["change_resolution", "restore_topology"])
+    args = p.parse_args()
+    if args.role == "worker":
+        return stand_in(args.hang)
+    return check(args.deadline, args.hang)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
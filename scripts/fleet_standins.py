@@ -0,0 +1,113 @@
+"""Clientes falsos para experimentar src/fleet.py fora do Windows.
+
+Arranca N servidores de controlo reais (control_server.ControlServer) em 127.0.0.1,
+cada um com um backend em memória, e escreve a lista de endereços num ficheiro:
+
+    python scripts/fleet_standins.py 20 --hosts /tmp/sala.txt --slow 2 --reject 3 --dead 1 --token x
+    python src/fleet.py /tmp/sala.txt --mode 1920x1080 --fallback 1600x900 --token x --timeout 2
+
+Os primeiros clientes são os "lentos" (não respondem a tempo), depois os que recusam o
+modo pedido (só aceitam as alternativas) e os "mortos" (endereço sem servidor).
+Ctrl+C termina.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+from typing import Any, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import control_server  # noqa: E402
+
+_MODOS = [(1280, 720), (1366, 768), (1600, 900), (1920, 1080), (2560, 1440)]
+
+
+class StandInBackend:
+    def __init__(self, name: str, delay: float = 0.0, refused: Optional[Set[Tuple[int, int]]] = None):
+        self.name = name
+        self.delay = delay
+        self.refused = refused or set()
+        self.original = self.current = (1920, 1080)
+
+    def list_modes(self) -> list[dict[str, int]]:
+        return [{"width": w, "height": h} for w, h in _MODOS if (w, h) not in self.refused]
+
+    def test(self, width: int, height: int, frequency: int = 0, bpp: int = 0) -> bool:
+        time.sleep(self.delay)
+        return (width, height) in _MODOS and (width, height) not in self.refused and frequency in (0, 60)
+
+    def apply(self, width: int, height: int, frequency: int = 0, bpp: int = 0) -> tuple[bool, str]:
+        time.sleep(self.delay)
+        if not self.test(width, height, frequency, bpp):
+            return False, "Resolução não suportada pelo driver de vídeo."
+        self.current = (width, height)
+        extra = f" @ {frequency} Hz" if frequency else ""
+        print(f"{self.name}: {width}x{height}{extra}" + (f", {bpp} bpp" if bpp else ""), flush=True)
+        return True, ""
+
+    def preset_mode(self, preset: str, width: int, height: int) -> Optional[tuple[int, int]]:
+        # Todos os modos falsos são 60 Hz; o "baixo débito" fica pelos 16 bpp.
+        return (60, 16) if (width, height) in _MODOS else None
+
+    def restore(self) -> tuple[bool, str]:
+        self.current = self.original
+        print(f"{self.name}: restaurado", flush=True)
+        return True, ""
+
+    def status(self) -> dict[str, Any]:
+        return {"current": list(self.current), "device": self.name}
+
+
+def _free_port() -> int:
+    # Porta sem ninguém a escutar: simula uma máquina desligada.
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run(args: argparse.Namespace) -> None:
+    endpoints: List[str] = []
+    servers = []
+    for i in range(args.count):
+        if i >= args.count - args.dead:
+            endpoints.append(f"127.0.0.1:{_free_port()}")
+            continue
+        delay = args.slow_delay if i < args.slow else 0.0
+        refused = {args.refuse} if args.slow <= i < args.slow + args.reject else set()
+        server = control_server.ControlServer(StandInBackend(f"cliente{i + 1}", delay, refused), token=args.token)
+        endpoints.append(f"127.0.0.1:{await server.start()}")
+        servers.append(server)
+    with open(args.hosts, "w", encoding="utf-8") as f:
+        f.write("\n".join(endpoints) + "\n")
+    print(f"{len(servers)} clientes a escutar; endereços em {args.hosts}", flush=True)
+    await asyncio.gather(*(s.serve_forever() for s in servers))
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("count", type=int, help="número de clientes")
+    p.add_argument("--hosts", default="fleet_hosts.txt", help="ficheiro onde escrever os endereços")
+    p.add_argument("--token")
+    p.add_argument("--slow", type=int, default=0, help="clientes que demoram --slow-delay por chamada")
+    p.add_argument("--slow-delay", type=float, default=30.0)
+    p.add_argument("--reject", type=int, default=0, help="clientes que recusam --refuse")
+    p.add_argument("--refuse", default="1920x1080", metavar="WxH")
+    p.add_argument("--dead", type=int, default=0, help="endereços sem servidor (no fim da lista)")
+    args = p.parse_args()
+    w, h = args.refuse.lower().split("x")
+    args.refuse = (int(w), int(h))
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Orçamento de tempo de importação do modo linha de comando (src/cli.py).
+
+Falha (código 1) se o arranque do CLI importar módulos proibidos ou passar do
+orçamento. Uso, na raiz do repositório:
+
+    py -3 scripts\\import_budget.py [--budget-ms 50] [--runs 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+MODULES = ("cli", "win_display")
+# Fora do Windows, win_display importa sobre o user32 falso (carregado só na primeira
+# chamada, pelo que não entra na medição); o custo de carregar user32.dll fica de fora.
+STUB_BACKEND = "bench_fakes:user32_from_env"
+
+# Nenhum destes pode ser carregado por `--list/--set/--restore` sem --json.
+PROIBIDOS = ("tkinter", "_tkinter", "driver_info", "ps_host", "json", "subprocess", "numpy")
+
+
+def _env() -> dict[str, str]:
+    if sys.platform == "win32":
+        return {**os.environ, "PYTHONPATH": SRC}
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join((SRC, HERE)),
+        "RR_USER32_BACKEND": os.environ.get("RR_USER32_BACKEND") or STUB_BACKEND,
+    }
+
+
+def measure_once() -> tuple[int, set[str]]:
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(MODULES)}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        env=_env(),
+    )
+    if r.returncode != 0:
+        raise SystemExit(r.stderr)
+    total_us = 0
+    imported: set[str] = set()
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative.isdigit():
+            continue  # cabeçalho
+        imported.add(name.strip())
+        # Só contam os módulos pedidos (o arranque do interpretador fica de fora).
+        if name in MODULES:
+            total_us += int(cumulative)
+    return total_us, imported
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--budget-ms", type=float, default=50.0)
+    p.add_argument("--runs", type=int, default=5)
+    args = p.parse_args()
+
+    best = None
+    imported: set[str] = set()
+    for _ in range(args.runs):
+        total_us, imported = measure_once()
+        best = total_us if best is None else min(best, total_us)
+    best_ms = (best or 0) / 1000
+
+    bad = sorted(m for m in imported if m.split(".")[0] in PROIBIDOS)
+    print(f"Importação do CLI: {best_ms:.1f} ms (melhor de {args.runs}; orçamento {args.budget_ms:g} ms)")
+    if sys.platform != "win32":
+        print(f"  win_display medido com o user32 falso ({_env()['RR_USER32_BACKEND']}), sem carregar user32.dll")
+    if bad:
+        print(f"FALHA: módulos proibidos no arranque: {', '.join(bad)}")
+        return 1
+    if best_ms > args.budget_ms:
+        print("FALHA: orçamento de importação excedido.")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Verifica as consultas de src/mode_catalog.py com um catálogo gravado e casos-limite.
+
+O catálogo abaixo é o que EnumDisplaySettingsW devolveu num portátil com painel
+1920×1080 (60/144 Hz), mais um modo 0×0 que alguns drivers antigos anunciam. Consultas
+por tamanho, melhor frequência, modo mais próximo e classificação por proporção têm de
+dar o esperado, e os tamanhos sem largura/altura não podem levantar exceções.
+
+    python scripts/mode_catalog_check.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from mode_catalog import DisplayMode, ModeCatalog, classify_aspect  # noqa: E402
+
+# (largura, altura, frequência, bpp, orientação)
+GRAVADO = [
+    (1920, 1080, 60, 32, 0), (1920, 1080, 144, 32, 0), (1680, 1050, 60, 32, 0),
+    (1600, 900, 60, 32, 0), (1366, 768, 60, 32, 0), (1280, 1024, 60, 32, 0),
+    (1280, 720, 60, 32, 0), (1024, 768, 60, 32, 0), (800, 600, 60, 32, 0),
+    (1280, 720, 60, 32, 0),  # repetido: o driver anuncia o mesmo modo por cada escala
+    (0, 0, 0, 0, 0),
+]
+
+
+def main() -> int:
+    failures: List[str] = []
+
+    def expect(got: object, wanted: object, text: str) -> None:
+        ok = got == wanted
+        print(f"  {'ok ' if ok else 'FALHOU'} {text}")
+        if not ok:
+            print(f"         obtido:   {got!r}\n         esperado: {wanted!r}")
+            failures.append(text)
+
+    catalog = ModeCatalog(GRAVADO)
+    expect(len(catalog), 10, "modo repetido guardado uma vez")
+    expect(catalog.sizes()[-1], (1920, 1080), "tamanhos por área, o maior no fim")
+    expect(ModeCatalog.from_flat(catalog.to_flat()), catalog, "to_flat/from_flat sem perdas")
+    expect(len(catalog.by_size(1920, 1080)), 2, "by_size: as duas frequências")
+    expect(catalog.best_refresh(1920, 1080), DisplayMode(1920, 1080, 144, 32, 0), "best_refresh: 144 Hz")
+    expect(catalog.best_refresh(2560, 1440), None, "best_refresh: tamanho sem modos")
+
+    expect(catalog.nearest(1920, 1080), DisplayMode(1920, 1080, 144, 32, 0), "nearest: tamanho exato")
+    expect(catalog.nearest(1600, 1000).size, (1680, 1050), "nearest: 16:10 mais próximo")
+    expect(catalog.nearest(1360, 768).size, (1366, 768), "nearest: 1360×768 → 1366×768")
+    expect(catalog.nearest(1, 1).size, (800, 600), "nearest: pedido minúsculo dá o menor real, não 0×0")
+    expect(catalog.nearest(0, 0), None, "nearest: 0×0 não levanta exceção")
+    expect(catalog.nearest(1920, 0), None, "nearest: altura 0")
+    expect(catalog.nearest(-1280, 720), None, "nearest: largura negativa")
+    expect(ModeCatalog().nearest(1920, 1080), None, "nearest: catálogo vazio")
+    expect(ModeCatalog([(0, 0, 0, 0, 0)]).nearest(800, 600), None, "nearest: só modos degenerados")
+
+    expect(
+        classify_aspect([(1920, 1080), (1366, 768), (1680, 1050), (1280, 1024), (0, 0)]),
+        ["16:9", "16:9", "16:10", "4:3 / 5:4", "Outras"],
+        "classificação por proporção",
+    )
+
+    print("OK" if not failures else f"{len(failures)} verificação(ões) falharam")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Verifica o protocolo de src/ps_host.py fora do Windows, com o PowerShell de bench_fakes.
+
+O filho é `bench_fakes.py powershell`, que fala o mesmo protocolo de marcadores que o
+ciclo _BOOTSTRAP e simula avarias com comandos "rr:...". A sessão tem de separar a
+saída pelo marcador do pedido certo, ler o rc, reutilizar o processo, relançá-lo se
+cair, matá-lo quando um comando pendura e fechar sem esperar pelo comando em curso.
+
+    python scripts/ps_host_check.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from typing import List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+sys.path.insert(0, HERE)
+
+import bench_fakes  # noqa: E402
+import ps_host  # noqa: E402
+
+
+def main() -> int:
+    failures: List[str] = []
+
+    def expect(got: object, wanted: object, text: str) -> None:
+        ok = got == wanted
+        print(f"  {'ok ' if ok else 'FALHOU'} {text}")
+        if not ok:
+            print(f"         obtido:   {got!r}\n         esperado: {wanted!r}")
+            failures.append(text)
+
+    def error_of(host: ps_host.PowerShellHost, command: str, timeout: float = 15) -> str:
+        try:
+            host.run(command, timeout=timeout)
+        except ps_host.HostError as exc:
+            return type(exc).__name__
+        return "sem erro"
+
+    host = ps_host.PowerShellHost(bench_fakes.powershell_argv(0))
+    try:
+        rc, out = host.run("Get-CimInstance Win32_VideoController")
+        expect((rc, out.strip()), (0, bench_fakes._RESPOSTA), "resposta separada pelo marcador, rc 0")
+        pid = host._proc.pid if host._proc else None
+        expect(host.run("rr:fail")[0], 1, "rc 1 lido do marcador")
+        expect(host._proc.pid if host._proc else None, pid, "segundo pedido reutiliza o processo")
+        expect(host.run("rr:echo:olá  mundo")[1].strip(), "olá  mundo", "saída UTF-8 intacta")
+        expect(
+            host.run("rr:stale")[1].strip().splitlines()[-1],
+            bench_fakes._RESPOSTA,
+            "marcador de outro pedido fica na saída",
+        )
+
+        expect(error_of(host, "rr:crash"), "HostError", "filho morre a meio: HostError")
+        expect(host.alive, False, "processo morto descartado")
+        expect(host.run("x")[0], 0, "pedido seguinte relança o filho")
+        expect(host._proc.pid != pid if host._proc else False, True, "processo novo")
+
+        t0 = time.monotonic()
+        expect(error_of(host, "rr:sleep:30", timeout=0.5), "HostError", "comando pendurado: tempo esgotado")
+        expect(time.monotonic() - t0 < 3, True, "tempo esgotado dentro do prazo")
+        expect(host.run("x")[0], 0, "recupera depois do tempo esgotado")
+
+        errors: List[str] = []
+        worker = threading.Thread(target=lambda: errors.append(error_of(host, "rr:sleep:30")))
+        worker.start()
+        time.sleep(0.3)
+        t0 = time.monotonic()
+        host.close()
+        expect(time.monotonic() - t0 < 1, True, "close() não espera pelo comando em curso")
+        worker.join(5)
+        expect(errors, ["HostError"], "comando em curso termina com HostError")
+        expect(error_of(host, "x"), "HostError", "sessão fechada recusa pedidos")
+    finally:
+        host.close()
+
+    missing = ps_host.PowerShellHost(["/nonexistent/powershell"])
+    expect(error_of(missing, "x"), "HostStartError", "executável ausente: HostStartError")
+
+    print("OK" if not failures else f"{len(failures)} verificação(ões) falharam")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
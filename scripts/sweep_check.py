@@ -0,0 +1,117 @@
+"""Verifica src/mode_sweep.py fora do Windows, contra o user32 falso com latências por modo.
+
+O win_display verdadeiro corre sobre bench_fakes.FakeUser32 com RR_FAKE_SWITCH_MS: cada
+tamanho tem uma duração de troca e um atraso até o modo em uso mudar (um deles nunca
+muda). O varrimento tem de medir esses tempos, marcar a troca que não estabiliza, repor
+o modo original e gravar relatórios JSON/CSV legíveis.
+
+    python scripts/sweep_check.py
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from typing import List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+sys.path.insert(0, HERE)
+
+# (retorno, estável) em ms; -1 = o driver aceita mas o modo nunca muda.
+LATENCIAS = {(1280, 720): (300, 400), (1024, 768): (50, 900), (800, 600): (0, -1)}
+# Folga das medições (sleep do sistema, leituras a cada INTERVALO_LEITURA).
+_MARGEM_MS = 120
+_PRAZO = 1.5
+
+
+class _Notifying:
+    """win_display com WM_DISPLAYCHANGE simulado: o Windows envia-o durante a própria troca."""
+
+    def __init__(self, display, changed: threading.Event, sizes):
+        self._display = display
+        self._changed = changed
+        self._sizes = sizes
+
+    def __getattr__(self, name: str):
+        return getattr(self._display, name)
+
+    def switch_mode(self, width, height, device=None, frequency=0, bpp=0):
+        result = self._display.switch_mode(width, height, device, frequency, bpp)
+        if (width, height) in self._sizes:
+            self._changed.set()
+        return result
+
+
+def main() -> int:
+    workdir = tempfile.mkdtemp(prefix="rr-sweep-")
+    os.environ["LOCALAPPDATA"] = workdir
+    os.environ["RR_USER32_BACKEND"] = "bench_fakes:user32_from_env"
+    os.environ["RR_FAKE_MODES"] = "24"
+    os.environ["RR_FAKE_SWITCH_MS"] = ",".join(f"{w}x{h}={r}/{s}" for (w, h), (r, s) in LATENCIAS.items())
+    import mode_sweep
+    import win_display
+
+    failures: List[str] = []
+
+    def expect(ok: bool, text: str) -> None:
+        print(f"  {'ok ' if ok else 'FALHOU'} {text}")
+        if not ok:
+            failures.append(text)
+
+    try:
+        original = win_display.get_current_mode()
+        modes = [(1280, 720), (1024, 768), (800, 600), (1152, 864), (3000, 2000)]
+        changed = threading.Event()
+        display = _Notifying(win_display, changed, {(1152, 864)})
+        report = mode_sweep.sweep(display, modes, changed=changed, timeout=_PRAZO)
+        samples = {s.mode: s for s in mode_sweep.samples_of(report)}
+
+        for size, (back, settle) in LATENCIAS.items():
+            s = samples[size]
+            expect(abs(s.return_ms - back) < _MARGEM_MS, f"{size}: retorno {s.return_ms:.0f} ms (configurado {back})")
+            if settle < 0:
+                expect(s.via == mode_sweep.VIA_PRAZO and not s.ok, f"{size}: não estabiliza ({s.error})")
+            else:
+                target = back + settle
+                expect(abs(s.stable_ms - target) < _MARGEM_MS, f"{size}: estável {s.stable_ms:.0f} ms (~{target})")
+        expect(samples[1152, 864].via == mode_sweep.VIA_EVENTO, "1152x864: estabilidade vista pelo aviso de troca")
+        expect(samples[1024, 768].via == mode_sweep.VIA_LEITURA, "1024x768: estabilidade vista por leitura")
+        bad = samples[3000, 2000]
+        expect(not bad.ok and bad.via == "" and bad.stable_ms is None, f"3000x2000 recusado: {bad.error}")
+
+        expect(report["restored"]["ok"], "topologia original reposta")
+        expect(win_display.get_current_mode() == original, f"modo atual = original {tuple(original)}")
+
+        slow = mode_sweep.slow_sizes(mode_sweep.samples_of(report), limit_ms=500)
+        expect(set(slow) == {(1280, 720), (1024, 768), (800, 600)}, f"lentas (≥ 500 ms): {sorted(slow)}")
+
+        json_path, csv_path = os.path.join(workdir, "r.json"), os.path.join(workdir, "r.csv")
+        mode_sweep.write_report(report, json_path)
+        mode_sweep.write_report(report, csv_path)
+        with open(json_path, encoding="utf-8") as f:
+            expect(len(json.load(f)["samples"]) == len(modes), "relatório JSON")
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        expect(len(rows) == len(modes) and rows[0]["width"] == "1280", "relatório CSV")
+
+        store = mode_sweep.LatencyStore()
+        store.save(report)
+        identity = win_display.get_display_identity()
+        expect(mode_sweep.samples_of(report) == store.load(identity), "último varrimento no cache local")
+        win_display.user32.driver_version = "31.0.15.2000"  # atualização do driver
+        updated = win_display.get_display_identity()
+        expect(updated[1] == "31.0.15.2000" and store.load(updated) == [], "cache ignorado com outra versão do driver")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("OK" if not failures else f"{len(failures)} verificação(ões) falharam")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
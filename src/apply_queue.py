@@ -0,0 +1,97 @@
+"""Fila de trocas de modo: um único worker, e só o pedido mais recente espera a sua vez.
+
+Uma troca de modo pode demorar segundos em alguns drivers; corre fora da thread do Tk.
+Cliques repetidos enquanto uma troca está em curso substituem o pedido pendente em vez
+de se acumularem. Os callbacks são entregues por `post(callback, resultado)`, que a GUI
+liga à sua fila drenada com after().
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, NamedTuple, Optional
+
+Post = Callable[[Callable[[Any], None], Any], None]
+
+# Resultado entregue a um pedido que nunca chegou a correr.
+SUBSTITUIDO = (False, "Pedido substituído por um mais recente.")
+CANCELADO = (False, "Pedido cancelado.")
+
+
+class _Job(NamedTuple):
+    label: str
+    fn: Callable[[], Any]
+    on_done: Callable[[Any], None]
+    on_start: Optional[Callable[[str], None]]
+
+
+class ApplyQueue:
+    """Um pedido em curso e no máximo um pendente (o último a chegar ganha)."""
+
+    def __init__(self, post: Post):
+        self._post = post
+        self._cond = threading.Condition()
+        self._pending: Optional[_Job] = None
+        self._running: Optional[_Job] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="apply-queue", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._running is not None or self._pending is not None
+
+    @property
+    def running_label(self) -> Optional[str]:
+        with self._cond:
+            return self._running.label if self._running is not None else None
+
+    def submit(
+        self,
+        label: str,
+        fn: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_start: Optional[Callable[[str], None]] = None,
+    ) -> bool:
+        """Agenda `fn`; devolve True se substituiu um pedido que ainda não tinha começado."""
+        with self._cond:
+            if self._closed:
+                self._post(on_done, CANCELADO)
+                return False
+            replaced, self._pending = self._pending, _Job(label, fn, on_done, on_start)
+            self._cond.notify()
+        if replaced is not None:
+            self._post(replaced.on_done, SUBSTITUIDO)
+        return replaced is not None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                job, self._pending = self._pending, None
+                self._running = job
+            if job.on_start is not None:
+                self._post(job.on_start, job.label)
+            try:
+                result = job.fn()
+            except Exception as exc:
+                result = (False, str(exc))
+            with self._cond:
+                self._running = None
+                self._cond.notify_all()
+            self._post(job.on_done, result)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Cancela o pendente e espera pelo que está em curso; True se terminou a tempo."""
+        with self._cond:
+            self._closed = True
+            cancelled, self._pending = self._pending, None
+            self._cond.notify_all()
+        if cancelled is not None:
+            self._post(cancelled.on_done, CANCELADO)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,109 @@
+"""Modos recusados pelo driver numa troca real, lembrados entre sessões.
+
+CDS_TEST aceita por vezes modos que a troca verdadeira recusa (DISP_CHANGE_BADMODE ou
+DISP_CHANGE_FAILED), muitas vezes depois de um ecrã negro. Cada recusa fica gravada por
+adaptador e monitor, com o código, o número de vezes e a hora da última; na sessão
+seguinte a GUI desativa ou assinala esses modos sem os voltar a testar. O registo de um
+monitor caduca quando a versão do driver muda.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from mode_cache import Identidade, JsonStore
+
+FORMATO_VERSAO = 1  # do ficheiro (ver mode_cache.JsonStore)
+NOME_FICHEIRO = "modos-recusados.json"
+_MAX_MONITORES = 8
+
+# Códigos de ChangeDisplaySettingsExW (win_display.DISP_CHANGE_*) que valem a pena lembrar;
+# os outros (registo, reinício, parâmetros) não dizem nada sobre o modo em si.
+DISP_CHANGE_BADMODE = -2
+DISP_CHANGE_FAILED = -1
+CODIGOS_GRAVADOS = (DISP_CHANGE_BADMODE, DISP_CHANGE_FAILED)
+
+Modo = Tuple[int, ...]  # (w, h) ou (w, h, frequência, bpp), como no ValidityCache
+
+
+class Failure(NamedTuple):
+    code: int
+    count: int
+    last: float  # time.time() da recusa mais recente
+
+    @property
+    def badmode(self) -> bool:
+        """O driver diz que o modo não existe: não vale a pena oferecê-lo."""
+        return self.code == DISP_CHANGE_BADMODE
+
+
+def _mode_text(mode: Modo) -> str:
+    text = f"{mode[0]}x{mode[1]}"
+    return text if len(mode) == 2 else f"{text}@{mode[2]}/{mode[3]}"
+
+
+def _parse_mode(text: str) -> Modo:
+    size, _, extra = text.partition("@")
+    w, h = size.split("x")
+    if not extra:
+        return int(w), int(h)
+    frequency, bpp = extra.split("/")
+    return int(w), int(h), int(frequency), int(bpp)
+
+
+class BadModeStore:
+    """Recusas por monitor em JSON compacto; escritas atómicas, erros de disco ignorados."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._store = JsonStore(NOME_FICHEIRO, FORMATO_VERSAO, _MAX_MONITORES, path)
+        self.path = self._store.path
+
+    @staticmethod
+    def _modes_in(entry: Optional[dict]) -> Dict[str, list]:
+        modes = entry.get("modes") if entry is not None else None
+        return dict(modes) if isinstance(modes, dict) else {}
+
+    def load(self, identity: Optional[Identidade]) -> Dict[Modo, Failure]:
+        if identity is None:
+            return {}
+        failures: Dict[Modo, Failure] = {}
+        for text, record in self._modes_in(self._store.get_monitor(identity)).items():
+            try:
+                code, count, last = record
+                failures[_parse_mode(text)] = Failure(int(code), int(count), float(last))
+            except (TypeError, ValueError):
+                continue
+        return failures
+
+    def record(self, identity: Optional[Identidade], mode: Modo, code: int) -> Optional[Failure]:
+        """Grava uma recusa; devolve o registo atualizado (None se o código não interessa)."""
+        if identity is None or code not in CODIGOS_GRAVADOS:
+            return None
+        failure = None
+
+        def change(entry: Optional[dict]) -> dict:
+            nonlocal failure
+            modes = self._modes_in(entry)
+            previous = modes.get(_mode_text(mode))
+            # O ficheiro pode vir editado à mão ou de outra versão: só conta um inteiro válido.
+            valid = isinstance(previous, list) and len(previous) == 3 and isinstance(previous[1], int)
+            count = previous[1] + 1 if valid else 1
+            failure = Failure(code, count, time.time())
+            modes[_mode_text(mode)] = list(failure)
+            return {"modes": modes}
+
+        self._store.update_monitor(identity, change)
+        return failure
+
+    def forget(self, identity: Optional[Identidade], mode: Modo) -> None:
+        """O driver aceitou o modo: deixa de estar marcado."""
+        if identity is None:
+            return
+
+        def change(entry: Optional[dict]) -> Optional[dict]:
+            modes = self._modes_in(entry)
+            modes.pop(_mode_text(mode), None)
+            return {"modes": modes} if modes else None
+
+        self._store.update_monitor(identity, change)
@@ -0,0 +1,138 @@
+"""Custo de cada modo numa sessão remota e recomendação para o ecrã do analista.
+
+O custo estimado é o débito bruto do ecrã, largura × altura × frequência × bpp (bits/s):
+é o que a ferramenta de acesso remoto tem de capturar, comprimir e enviar. A
+recomendação é o maior tamanho que cabe na janela do analista sem escala e, desse
+tamanho, a variante (frequência, bpp) mais barata. O preset "baixo débito" aplica o
+mesmo critério a um tamanho escolhido pelo analista.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from mode_catalog import DisplayMode, ModeCatalog, reduced_aspect
+
+Tamanho = Tuple[int, int]
+
+# Valores assumidos quando o driver não os indica (0; na frequência, 1 = "omissão do hardware").
+FREQUENCIA_PADRAO = 60
+BPP_PADRAO = 32
+# Abaixo disto (256 cores) o ambiente de trabalho fica ilegível: nunca é recomendado.
+BPP_MINIMO = 16
+# Abaixo disto são modos de TV (24/25/30 Hz), muitas vezes entrelaçados.
+FREQUENCIA_MINIMA = 50
+
+# Nome do preset no JSON-RPC e no CLI.
+PRESET_BAIXO_DEBITO = "low-bandwidth"
+
+
+class Advice(NamedTuple):
+    mode: DisplayMode
+    cost: int  # bits/s, sem compressão
+    fits: bool  # cabe no ecrã do analista sem escala (True se não houver ecrã indicado)
+
+    @property
+    def mbps(self) -> float:
+        return self.cost / 1_000_000
+
+    def as_dict(self) -> dict:
+        return {**self.mode._asdict(), "mbps": round(self.mbps, 1), "fits": self.fits}
+
+
+def throughput(mode: DisplayMode) -> int:
+    freq = mode.frequency if mode.frequency > 1 else FREQUENCIA_PADRAO
+    bpp = mode.bpp or BPP_PADRAO
+    return mode.width * mode.height * freq * bpp
+
+
+def acceptable(mode: DisplayMode) -> bool:
+    """Frequência e profundidade de cor usáveis numa sessão (desconhecidas contam como usáveis)."""
+    if mode.bpp and mode.bpp < BPP_MINIMO:
+        return False
+    return mode.frequency <= 1 or mode.frequency >= FREQUENCIA_MINIMA
+
+
+def low_bandwidth_mode(catalog: ModeCatalog, width: int, height: int) -> Optional[DisplayMode]:
+    """Preset "baixo débito": a variante aceitável mais barata de um tamanho.
+
+    Frequências concretas ganham às de omissão do hardware (0/1) com o mesmo custo estimado.
+    """
+    modes = [m for m in catalog.by_size(width, height) if acceptable(m)]
+    if not modes:
+        return None
+    return min(modes, key=lambda m: (throughput(m), m.frequency <= 1))
+
+
+def preset_mode(catalog: ModeCatalog, preset: str, width: int, height: int) -> Optional[Tuple[int, int]]:
+    """(frequência, bpp) a pedir ao driver para `preset` num tamanho; None se não houver modo.
+
+    Uma frequência de omissão do hardware (0/1) volta como 0: o driver escolhe-a.
+    """
+    if preset != PRESET_BAIXO_DEBITO:
+        raise ValueError(f"preset desconhecido: {preset!r}")
+    mode = low_bandwidth_mode(catalog, width, height)
+    if mode is None:
+        return None
+    return (mode.frequency if mode.frequency > 1 else 0), mode.bpp
+
+
+def _fits(size: Tamanho, viewport: Optional[Tamanho]) -> bool:
+    return viewport is None or (size[0] <= viewport[0] and size[1] <= viewport[1])
+
+
+def rank(modes: Iterable[DisplayMode], viewport: Optional[Tamanho] = None) -> List[Advice]:
+    """Todos os modos, do mais barato para o mais caro."""
+    ranked = [Advice(m, throughput(m), _fits(m.size, viewport)) for m in modes if m.width and m.height]
+    ranked.sort(key=lambda a: (a.cost, a.mode.width, a.mode.height))
+    return ranked
+
+
+def recommend(
+    modes: Iterable[DisplayMode],
+    viewport: Optional[Tamanho],
+    accept: Optional[Callable[[Tamanho], bool]] = None,
+) -> Optional[Advice]:
+    """Modo recomendado para um ecrã `viewport` (None = sem limite de tamanho).
+
+    `accept(tamanho)` exclui tamanhos já recusados pelo driver (CDS_TEST). Se nada
+    couber no ecrã, devolve o modo mais barato (com fits=False): vai precisar de escala.
+    """
+    candidates = [a for a in rank(modes, viewport) if acceptable(a.mode)]
+    if accept is not None:
+        candidates = [a for a in candidates if accept(a.mode.size)]
+    if not candidates:
+        return None
+    fitting = [a for a in candidates if a.fits]
+    if not fitting:
+        return candidates[0]
+    target_aspect = reduced_aspect(*viewport) if viewport else None
+
+    def score(a: Advice):
+        w, h = a.mode.size
+        # Maior área primeiro; em empate, a mesma proporção do ecrã; depois o mais barato.
+        return (-(w * h), reduced_aspect(w, h) != target_aspect, a.cost, a.mode.frequency <= 1)
+
+    return min(fitting, key=score)
+
+
+def report(
+    modes: Iterable[DisplayMode],
+    viewport: Optional[Tamanho],
+    cap: Tamanho,
+    limit: Optional[int] = None,
+    accept: Optional[Callable[[Tamanho], bool]] = None,
+) -> dict:
+    """Resposta de `advise` (JSON-RPC e --advise --json).
+
+    `viewport` é o ecrã indicado pelo analista (ou None); `cap` o limite efetivo usado,
+    que os chamadores fazem cair na resolução original do monitor quando não há ecrã.
+    """
+    modes = list(modes)
+    best = recommend(modes, cap, accept)
+    ranked = rank(modes, cap)
+    return {
+        "viewport": list(viewport) if viewport else None,
+        "recommended": best.as_dict() if best else None,
+        "ranking": [a.as_dict() for a in (ranked if limit is None else ranked[:limit])],
+    }
@@ -0,0 +1,325 @@
+"""Modo linha de comando (sem janela) para uso por script ou shell remota.
+
+Exemplos:
+    RemoteResolution.exe --list --json
+    RemoteResolution.exe --set 1280x720
+    RemoteResolution.exe --set 1920x1080 --hz 60 --bpp 16
+    RemoteResolution.exe --set 1920x1080 --low-bandwidth
+    RemoteResolution.exe --restore
+    RemoteResolution.exe --advise --viewport 1600x900
+    RemoteResolution.exe --sweep --report latencias.csv
+    RemoteResolution.exe --sweep 1920x1080,1280x720@60
+    RemoteResolution.exe --serve 8765
+    RemoteResolution.exe --serve 8765 --bind 0.0.0.0 --token SEGREDO
+    RemoteResolution.exe --list --trace
+
+Só importa win_display; tkinter, driver_info, json e subprocess ficam de fora
+(json apenas com --json ou --serve).
+"""
+
+import argparse
+import os
+import sys
+
+# Topologia anterior ao primeiro --set, para o --restore de uma invocação seguinte.
+# Mesma pasta do cache de modos (mode_cache.default_cache_dir), sem importar json.
+_NOME_ESTADO = "topologia-original.txt"
+
+
+def _state_file() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "RemoteResolution", _NOME_ESTADO)
+
+
+def _attach_console() -> None:
+    # O .exe é gerado com --windowed: sem consola, sys.stdout é None.
+    if sys.stdout is not None or sys.platform != "win32":
+        return
+    import ctypes
+
+    if ctypes.windll.kernel32.AttachConsole(-1):  # ATTACH_PARENT_PROCESS
+        sys.stdout = open("CONOUT$", "w", encoding="utf-8")
+        sys.stderr = sys.stdout
+
+
+def _parse_size(text: str):
+    try:
+        w, h = text.lower().replace("×", "x").split("x")
+        return int(w), int(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {text!r} (use LARGURAxALTURA)") from None
+
+
+def _parse_sweep(text: str):
+    if text in ("sizes", "all"):
+        return text
+    import mode_sweep
+
+    try:
+        modes = mode_sweep.parse_modes(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"modos inválidos: {text!r} (use sizes, all ou LxA[@HZ[/BPP]],...)"
+        ) from None
+    if not modes:
+        raise argparse.ArgumentTypeError("nenhum modo indicado")
+    return modes
+
+
+def _emit(args, data, text: str) -> None:
+    if args.json:
+        import json
+
+        print(json.dumps(data, ensure_ascii=False))
+    else:
+        print(text)
+
+
+def _save_topology(topology) -> None:
+    path = _state_file()
+    if os.path.exists(path):
+        return  # Já há um original guardado por um --set anterior.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for st in topology:
+            m = st.mode
+            f.write(f"{st.device}\t{m.width}\t{m.height}\t{m.frequency}\t{m.bpp}\t{m.orientation}\t{st.x}\t{st.y}\n")
+
+
+def _load_topology(win_display):
+    """Topologia gravada por --set; ValueError se o ficheiro estiver truncado ou corrompido."""
+    from mode_catalog import DisplayMode
+
+    topology = []
+    with open(_state_file(), "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 8:
+                raise ValueError(f"linha {number}: {len(parts)} campos em vez de 8")
+            nums = [int(p) for p in parts[1:]]
+            topology.append(win_display.MonitorState(parts[0], DisplayMode(*nums[:5]), nums[5], nums[6]))
+    if not topology:
+        raise ValueError("ficheiro vazio")
+    return topology
+
+
+def cmd_list(args, win_display) -> int:
+    catalog = win_display.enumerate_modes(args.monitor)
+    current = win_display.get_current_resolution(args.monitor)
+    modes = [m._asdict() for m in catalog]
+    lines = []
+    for w, h in catalog.sizes():
+        freqs = sorted({m.frequency for m in catalog.by_size(w, h)})
+        tag = "  <- atual" if (w, h) == current else ""
+        lines.append(f"{w}x{h}  ({', '.join(f'{f} Hz' for f in freqs)}){tag}")
+    _emit(args, {"current": list(current), "modes": modes}, "\n".join(lines) or "Nenhuma resolução detectada.")
+    return 0
+
+
+def _mode_text(w: int, h: int, frequency: int, bpp: int) -> str:
+    return f"{w}x{h}" + (f" @ {frequency} Hz" if frequency else "") + (f", {bpp} bpp" if bpp else "")
+
+
+def cmd_set(args, win_display) -> int:
+    w, h = args.set
+    frequency, bpp = args.hz, args.bpp
+    if args.low_bandwidth:
+        import bandwidth
+
+        target = bandwidth.preset_mode(
+            win_display.enumerate_modes(args.monitor), bandwidth.PRESET_BAIXO_DEBITO, w, h
+        )
+        if target is None:
+            _emit(args, {"ok": False, "error": "badmode"}, f"{w}x{h} não consta dos modos desta máquina.")
+            return 1
+        frequency, bpp = target
+    texto = _mode_text(w, h, frequency, bpp)
+    if not win_display.test_resolution(w, h, args.monitor, frequency, bpp):
+        _emit(args, {"ok": False, "error": "badmode"}, f"{texto} não é aceita pelo driver desta máquina.")
+        return 1
+    try:
+        _save_topology(win_display.capture_topology())
+    except OSError:
+        pass
+    ok, erro = win_display.change_resolution(w, h, args.monitor, frequency, bpp)
+    data = {"ok": ok, "error": erro, "frequency": frequency, "bpp": bpp}
+    _emit(args, data, f"Resolução alterada para {texto}." if ok else erro)
+    return 0 if ok else 1
+
+
+def cmd_restore(args, win_display) -> int:
+    try:
+        topology = _load_topology(win_display)
+    except OSError:
+        _emit(args, {"ok": False, "error": "sem-original"}, "Nenhuma resolução original guardada (use --set antes).")
+        return 1
+    except ValueError as exc:  # inclui UnicodeDecodeError
+        # O ficheiro fica no sítio para diagnóstico: apagá-lo deixa o próximo --set gravar outro.
+        if args.json:
+            _emit(args, {"ok": False, "error": "original-ilegivel"}, "")
+        print(f"Resolução original guardada ilegível ({exc}); apague {_state_file()}.", file=sys.stderr)
+        return 1
+    ok, erro = win_display.restore_topology(topology)
+    if ok:
+        try:
+            os.remove(_state_file())
+        except OSError:
+            pass
+    _emit(args, {"ok": ok, "error": erro}, "Resolução original restaurada." if ok else erro)
+    return 0 if ok else 1
+
+
+def cmd_advise(args, win_display) -> int:
+    import bandwidth
+
+    catalog = win_display.enumerate_modes(args.monitor)
+    # Sem --viewport: nada maior do que a resolução atual deste monitor.
+    cap = args.viewport or win_display.get_current_resolution(args.monitor)
+    data = bandwidth.report(catalog, args.viewport, cap)
+    best = data["recommended"]
+    lines = []
+    for m in data["ranking"]:
+        tag = "  <- recomendado" if m == best else ("" if m["fits"] else "  (precisa de escala)")
+        lines.append(f"{m['width']}x{m['height']} @ {m['frequency']} Hz, {m['bpp']} bpp  {m['mbps']:9.1f} Mbit/s{tag}")
+    _emit(args, data, "\n".join(lines) or "Nenhuma resolução detectada.")
+    return 0 if best else 1
+
+
+def _sample_text(sample) -> str:
+    texto = _mode_text(sample.width, sample.height, sample.frequency, sample.bpp)
+    if not sample.ok:
+        return f"{texto}: {sample.error} (retorno {sample.return_ms:.0f} ms)"
+    return f"{texto}: retorno {sample.return_ms:.0f} ms, estável {sample.stable_ms:.0f} ms ({sample.via})"
+
+
+def cmd_sweep(args, win_display) -> int:
+    import threading
+
+    import display_events
+    import mode_sweep
+
+    if isinstance(args.sweep, str):
+        modes = mode_sweep.targets(win_display.enumerate_modes(args.monitor), args.sweep)
+    else:
+        modes = args.sweep
+    changed = threading.Event()
+    listener = display_events.DisplayChangeListener(
+        lambda motivo: changed.set() if motivo == display_events.MOTIVO_MODO else None
+    )
+    listening = listener.start()
+
+    def progress(i: int, n: int, sample) -> None:
+        if not args.json:
+            print(f"[{i}/{n}] {_sample_text(sample)}", flush=True)
+
+    if not args.json:
+        print(f"A medir {len(modes)} modo(s); o ecrã vai mudar várias vezes (Ctrl+C interrompe).", flush=True)
+    try:
+        report = mode_sweep.sweep(
+            win_display, modes, args.monitor, changed if listening else None, args.settle_timeout, progress=progress
+        )
+    finally:
+        listener.stop()
+    mode_sweep.LatencyStore().save(report)
+    if args.report:
+        try:
+            mode_sweep.write_report(report, args.report)
+        except OSError as exc:
+            print(f"Não foi possível gravar {args.report}: {exc}", file=sys.stderr)
+    restored = report["restored"]
+    slow = mode_sweep.slow_sizes(mode_sweep.samples_of(report))
+    lines = [f"Trocas lentas (≥ {mode_sweep.LENTO_MS / 1000:g} s): "
+             + (", ".join(f"{w}x{h} ({mode_sweep.cost_text(ms)})" for (w, h), ms in slow.items()) or "nenhuma")]
+    if report["interrupted"]:
+        lines.append("Varrimento interrompido.")
+    lines.append("Modo original reposto." if restored["ok"] else f"Erro ao repor o modo original: {restored['error']}")
+    _emit(args, report, "\n".join(lines))
+    return 0 if restored["ok"] and not report["interrupted"] else 1
+
+
+def cmd_serve(args, win_display) -> int:
+    import asyncio
+
+    import control_server
+
+    token = args.token or os.environ.get(control_server.ENV_CONTROL_TOKEN) or None
+    try:
+        server = control_server.ControlServer(
+            control_server.DisplayBackend(args.monitor), host=args.bind, port=args.serve, token=token
+        )
+    except ValueError as exc:
+        print(f"{exc} (use --token ou {control_server.ENV_CONTROL_TOKEN}).", file=sys.stderr)
+        return 1
+
+    async def run() -> None:
+        await server.start()
+        print(f"Servidor de controlo em {server.host}:{server.port} (Ctrl+C para sair).", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except OSError as exc:
+        print(f"Não foi possível abrir a porta {args.serve}: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="RemoteResolution", description="Ajuste de resolução sem janela.")
+    action = p.add_mutually_exclusive_group(required=True)
+    action.add_argument("--list", action="store_true", help="lista os modos suportados")
+    action.add_argument("--set", type=_parse_size, metavar="WxH", help="aplica a resolução indicada")
+    action.add_argument("--restore", action="store_true", help="repõe a topologia anterior ao primeiro --set")
+    action.add_argument("--advise", action="store_true", help="modos por custo numa sessão remota, com recomendação")
+    action.add_argument("--serve", type=int, metavar="PORTA", help="servidor JSON-RPC (127.0.0.1 por omissão)")
+    action.add_argument("--sweep", type=_parse_sweep, nargs="?", const="sizes", metavar="MODOS",
+                        help="mede o tempo de troca de cada modo: sizes (omissão), all ou LxA[@HZ[/BPP]],...")
+    p.add_argument("--monitor", metavar="DISPOSITIVO", help=r"ex.: \\.\DISPLAY2 (omissão: principal)")
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.add_argument("--hz", type=int, default=0, metavar="HZ", help="com --set: frequência (omissão: o driver escolhe)")
+    p.add_argument("--bpp", type=int, default=0, metavar="BITS", help="com --set: profundidade de cor, ex.: 16 ou 32")
+    p.add_argument("--low-bandwidth", action="store_true",
+                   help="com --set: menor frequência/bpp aceitável desse tamanho")
+    p.add_argument("--viewport", type=_parse_size, metavar="WxH", help="com --advise: área útil do ecrã do analista")
+    p.add_argument("--bind", default="127.0.0.1", metavar="ENDEREÇO", help="com --serve: ex.: 0.0.0.0 (exige token)")
+    p.add_argument("--token", help="com --serve: segredo exigido pelo método auth")
+    p.add_argument("--report", metavar="FICHEIRO", help="com --sweep: relatório em JSON ou CSV (.csv)")
+    p.add_argument("--settle-timeout", type=float, default=10.0, metavar="S",
+                   help="com --sweep: prazo para cada modo estabilizar")
+    p.add_argument("--trace", action="store_true", help="registo de desempenho (JSON trace-event do Chrome)")
+    return p
+
+
+def main(argv=None) -> int:
+    _attach_console()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.low_bandwidth and (args.hz or args.bpp):
+        parser.error("--low-bandwidth não se combina com --hz/--bpp")
+    if args.trace:
+        import tracing
+
+        tracing.enable()
+    try:
+        import win_display
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    win_display.enable_dpi_awareness()
+    if args.list:
+        return cmd_list(args, win_display)
+    if args.set:
+        return cmd_set(args, win_display)
+    if args.advise:
+        return cmd_advise(args, win_display)
+    if args.serve is not None:
+        return cmd_serve(args, win_display)
+    if args.sweep is not None:
+        return cmd_sweep(args, win_display)
+    return cmd_restore(args, win_display)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""Servidor de controlo local: JSON-RPC 2.0, uma mensagem por linha, sobre TCP.
+
+Métodos: auth, list, test, apply, restore, status, advise. O "backend" decide o que cada um faz:
+`DisplayBackend` usa win_display diretamente (modo sem janela), a GUI fornece o seu
+próprio backend, que executa as chamadas na thread do Tk.
+
+Exemplo de pedido:  {"jsonrpc": "2.0", "id": 1, "method": "apply", "params": {"width": 1280, "height": 720}}
+
+Fora do loopback (orquestração de várias máquinas, ver fleet.py) é obrigatório um
+token: cada ligação começa por {"method": "auth", "params": {"token": "..."}}.
+`apply` aceita "restore_after" (segundos): a topologia original volta sozinha nesse
+prazo, a menos que chegue outro apply/restore antes.
+
+`test` e `apply` aceitam o modo completo: "frequency" (Hz) e "bpp" opcionais (omissos ou
+0 = o driver escolhe), ou "preset": "low-bandwidth" (a variante mais barata do tamanho).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import ipaddress
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Protocol
+
+import bandwidth
+
+# Códigos de erro JSON-RPC 2.0.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# Erro da aplicação (intervalo -32000..-32099 reservado pela especificação).
+UNAUTHORIZED = -32001
+
+# Segredo para aceitar ligações de outras máquinas (GUI e --serve).
+ENV_CONTROL_TOKEN = "RR_CONTROL_TOKEN"
+
+# Métodos que alteram o ecrã: executados um de cada vez, por ordem de chegada.
+_MUTANTES = {"apply", "restore"}
+_MAX_LINHA = 64 * 1024
+
+
+class Backend(Protocol):
+    def list_modes(self) -> list[dict[str, int]]: ...
+
+    def test(self, width: int, height: int, frequency: int = 0, bpp: int = 0) -> bool: ...
+
+    def apply(self, width: int, height: int, frequency: int = 0, bpp: int = 0) -> tuple[bool, str]: ...
+
+    def preset_mode(self, preset: str, width: int, height: int) -> Optional[tuple[int, int]]: ...
+
+    def restore(self) -> tuple[bool, str]: ...
+
+    def status(self) -> dict[str, Any]: ...
+
+    def advise(self, viewport: Optional[tuple[int, int]], limit: int) -> dict[str, Any]: ...
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _restore_after(params: Any) -> Optional[float]:
+    value = params.get("restore_after") if isinstance(params, dict) else None
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise RpcError(INVALID_PARAMS, "restore_after tem de ser um número de segundos positivo")
+    return float(value)
+
+
+def _advise_params(params: Any) -> tuple[Optional[tuple[int, int]], int]:
+    """`advise`: ecrã do analista opcional ({width, height}) e tamanho do ranking."""
+    limit = params.get("limit", 10) if isinstance(params, dict) else 10
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+        raise RpcError(INVALID_PARAMS, "limit tem de ser um inteiro não negativo")
+    if not params or (isinstance(params, dict) and "width" not in params and "height" not in params):
+        return None, limit
+    return _size_params(params), limit
+
+
+def _size_params(params: Any) -> tuple[int, int]:
+    if isinstance(params, list) and len(params) == 2:
+        w, h = params
+    elif isinstance(params, dict):
+        w, h = params.get("width"), params.get("height")
+    else:
+        raise RpcError(INVALID_PARAMS, "esperado {width, height}")
+    if not isinstance(w, int) or not isinstance(h, int) or w <= 0 or h <= 0:
+        raise RpcError(INVALID_PARAMS, "width/height têm de ser inteiros positivos")
+    return w, h
+
+
+def _mode_params(params: Any) -> tuple[int, int, Optional[str]]:
+    """`test`/`apply`: (frequency, bpp, preset); 0 = o driver escolhe."""
+    if not isinstance(params, dict):
+        return 0, 0, None
+    frequency, bpp, preset = params.get("frequency", 0), params.get("bpp", 0), params.get("preset")
+    for name, value in (("frequency", frequency), ("bpp", bpp)):
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise RpcError(INVALID_PARAMS, f"{name} tem de ser um inteiro não negativo")
+    if preset is not None:
+        if preset != bandwidth.PRESET_BAIXO_DEBITO:
+            raise RpcError(INVALID_PARAMS, f"preset desconhecido: {preset!r}")
+        if frequency or bpp:
+            raise RpcError(INVALID_PARAMS, "preset e frequency/bpp são exclusivos")
+    return frequency, bpp, preset
+
+
+class DisplayBackend:
+    """Backend direto sobre win_display (sem GUI); guarda a topologia inicial para restore."""
+
+    def __init__(self, device: Optional[str] = None):
+        import win_display
+
+        self._wd = win_display
+        self.device = device
+        self.original = win_display.capture_topology()
+        self.original_size = win_display.get_current_resolution(device)
+
+    def list_modes(self) -> list[dict[str, int]]:
+        return [m._asdict() for m in self._wd.enumerate_modes(self.device)]
+
+    def test(self, width: int, height: int, frequency: int = 0, bpp: int = 0) -> bool:
+        return self._wd.test_resolution(width, height, self.device, frequency, bpp)
+
+    def apply(self, width: int, height: int, frequency: int = 0, bpp: int = 0) -> tuple[bool, str]:
+        return self._wd.change_resolution(width, height, self.device, frequency, bpp)
+
+    def preset_mode(self, preset: str, width: int, height: int) -> Optional[tuple[int, int]]:
+        return bandwidth.preset_mode(self._wd.enumerate_modes(self.device), preset, width, height)
+
+    def restore(self) -> tuple[bool, str]:
+        return self._wd.restore_topology(self.original)
+
+    def status(self) -> dict[str, Any]:
+        w, h = self._wd.get_current_resolution(self.device)
+        mode = self._wd.get_current_mode(self.device)
+        return {"current": [w, h], "mode": mode._asdict() if mode else None, "device": self.device}
+
+    def advise(self, viewport: Optional[tuple[int, int]], limit: int) -> dict[str, Any]:
+        catalog = self._wd.enumerate_modes(self.device)
+        # Sem ecrã do analista: nada maior do que a resolução original deste monitor.
+        return bandwidth.report(catalog, viewport, viewport or self.original_size, limit)
+
+
+class ControlServer:
+    """Aceita vários clientes em simultâneo; apply/restore passam por um lock único."""
+
+    def __init__(self, backend: Backend, host: str = "127.0.0.1", port: int = 0, token: Optional[str] = None):
+        if not token and not is_loopback(host):
+            raise ValueError("é obrigatório um token para aceitar ligações fora de 127.0.0.1")
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.token = token or None
+        self._restore_timer: Optional[asyncio.TimerHandle] = None
+        self.restore_at: Optional[float] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # Chamadas ao backend (bloqueantes); fechado em stop().
+        self._executor = ThreadPoolExecutor(thread_name_prefix="control-rpc")
+
+    # ── Despacho ───────────────────────────────────────────────────────────────
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _call(self, method: str, params: Any) -> Any:
+        b = self.backend
+        if method == "list":
+            return await self._run(b.list_modes)
+        if method == "status":
+            status = await self._run(b.status)
+            if isinstance(status, dict):
+                status = {**status, "restore_at": self.restore_at}
+            return status
+        if method == "advise":
+            viewport, limit = _advise_params(params)
+            return await self._run(b.advise, viewport, limit)
+        if method == "test":
+            w, h = _size_params(params)
+            target = await self._target(params, w, h)
+            if target is None:
+                return False
+            return await self._run(b.test, w, h, *target)
+        if method == "apply":
+            w, h = _size_params(params)
+            restore_after = _restore_after(params)
+            target = await self._target(params, w, h)
+            if target is None:
+                return {"ok": False, "error": f"Nenhum modo {w}x{h} para o preset.", "restore_at": self.restore_at}
+            self._cancel_auto_restore()
+            ok, erro = await self._run(b.apply, w, h, *target)
+            if ok and restore_after is not None:
+                self._schedule_auto_restore(restore_after)
+            return {"ok": ok, "error": erro, "restore_at": self.restore_at}
+        if method == "restore":
+            self._cancel_auto_restore()
+            ok, erro = await self._run(b.restore)
+            return {"ok": ok, "error": erro}
+        raise RpcError(METHOD_NOT_FOUND, f"método desconhecido: {method}")
+
+    async def _target(self, params: Any, width: int, height: int) -> Optional[tuple[int, int]]:
+        """(frequência, bpp) pedidos; com preset, resolvidos no catálogo do backend (None = sem modo)."""
+        frequency, bpp, preset = _mode_params(params)
+        if preset is None:
+            return frequency, bpp
+        return await self._run(self.backend.preset_mode, preset, width, height)
+
+    # ── Restauro automático (apply com restore_after) ──────────────────────────
+    def _cancel_auto_restore(self) -> None:
+        if self._restore_timer is not None:
+            self._restore_timer.cancel()
+        self._restore_timer = None
+        self.restore_at = None
+
+    def _schedule_auto_restore(self, seconds: float) -> None:
+        loop = asyncio.get_running_loop()
+        self.restore_at = time.time() + seconds
+        timer = loop.call_later(seconds, lambda: loop.create_task(self._auto_restore(timer)))
+        self._restore_timer = timer
+
+    async def _auto_restore(self, timer: asyncio.TimerHandle) -> None:
+        assert self._lock is not None
+        async with self._lock:
+            if self._restore_timer is not timer:
+                return  # substituído ou cancelado por outro apply/restore enquanto esperava
+            self._restore_timer = None
+            self.restore_at = None
+            try:
+                await self._run(self.backend.restore)
+            except Exception:
+                pass
+
+    def _check_token(self, params: Any) -> bool:
+        given = params.get("token") if isinstance(params, dict) else None
+        return isinstance(given, str) and hmac.compare_digest(given.encode(), (self.token or "").encode())
+
+    async def handle_message(self, raw: str, session: Optional[dict[str, Any]] = None) -> Optional[dict[str, Any]]:
+        """Processa uma linha JSON-RPC; devolve a resposta (None para notificações).
+
+        `session` guarda o estado da ligação (autenticada ou não).
+        """
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "JSON inválido"}}
+        if not isinstance(msg, dict) or not isinstance(msg.get("method"), str):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "pedido inválido"}}
+        req_id = msg.get("id")
+        method = msg["method"]
+        try:
+            if method == "auth":
+                if self.token is not None and not self._check_token(msg.get("params")):
+                    raise RpcError(UNAUTHORIZED, "token inválido")
+                if session is not None:
+                    session["auth"] = True
+                result: Any = True
+            elif self.token is not None and not (session or {}).get("auth"):
+                raise RpcError(UNAUTHORIZED, "autenticação necessária (método auth)")
+            elif method in _MUTANTES:
+                assert self._lock is not None
+                async with self._lock:
+                    result = await self._call(method, msg.get("params"))
+            else:
+                result = await self._call(method, msg.get("params"))
+        except RpcError as exc:
+            response = {"jsonrpc": "2.0", "id": req_id, "error": {"code": exc.code, "message": exc.message}}
+        except Exception as exc:
+            response = {"jsonrpc": "2.0", "id": req_id, "error": {"code": INTERNAL_ERROR, "message": str(exc)}}
+        else:
+            response = {"jsonrpc": "2.0", "id": req_id, "result": result}
+        return response if "id" in msg else None
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session: dict[str, Any] = {"auth": False}
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # linha acima do limite ou ligação cortada
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.handle_message(line.decode("utf-8", "replace"), session)
+                if response is not None:
+                    writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # ── Ciclo de vida ──────────────────────────────────────────────────────────
+    async def start(self) -> int:
+        """Abre o socket no loop atual; devolve a porta efetiva (útil com port=0)."""
+        self._lock = asyncio.Lock()
+        self._server = await asyncio.start_server(self._client, self.host, self.port, limit=_MAX_LINHA)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> int:
+        """Corre o servidor num loop próprio, numa thread daemon; devolve a porta."""
+        ready = threading.Event()
+        error: list[BaseException] = []
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as exc:
+                error.append(exc)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            loop.run_forever()
+            # Depois de stop(): termina as ligações ainda abertas antes de fechar o loop.
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="control-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+        return self.port
+
+    def stop(self) -> None:
+        loop, server = self._loop, self._server
+        # Sem esperar: uma chamada ainda no backend termina sozinha (ou pelo TIMEOUT dele).
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if loop is None or server is None:
+            return
+
+        def shutdown() -> None:
+            # Sem wait_closed(): clientes ainda ligados não podem atrasar o fecho da GUI.
+            self._cancel_auto_restore()
+            server.close()
+            loop.stop()
+
+        loop.call_soon_threadsafe(shutdown)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
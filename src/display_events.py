@@ -0,0 +1,142 @@
+"""Aviso de mudanças de ecrã feitas por terceiros (WM_DISPLAYCHANGE / WM_SETTINGCHANGE).
+
+Uma janela de topo invisível, numa thread própria, recebe as mensagens de difusão do
+Windows. Não pode ser uma janela HWND_MESSAGE: essas não recebem broadcasts. O callback
+corre nessa thread; a GUI reencaminha-o para a thread do Tk.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import sys
+import threading
+from ctypes import wintypes
+from typing import Callable, Optional
+
+WM_DESTROY = 0x0002
+WM_CLOSE = 0x0010
+WM_SETTINGCHANGE = 0x001A
+WM_DISPLAYCHANGE = 0x007E
+# wParam de WM_SETTINGCHANGE quando a área de trabalho muda (também numa troca de modo).
+SPI_SETWORKAREA = 0x002F
+
+MOTIVO_MODO = "display"
+MOTIVO_AREA = "workarea"
+
+_CLASSE = "RemoteResolutionDisplayEvents"
+
+
+def _win32():
+    # Só no Windows (WINFUNCTYPE e windll não existem noutros sistemas).
+    LRESULT = ctypes.c_ssize_t
+    WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+    class WNDCLASSW(ctypes.Structure):
+        _fields_ = [
+            ("style", wintypes.UINT),
+            ("lpfnWndProc", WNDPROC),
+            ("cbClsExtra", ctypes.c_int),
+            ("cbWndExtra", ctypes.c_int),
+            ("hInstance", wintypes.HINSTANCE),
+            ("hIcon", wintypes.HICON),
+            ("hCursor", wintypes.HANDLE),
+            ("hbrBackground", wintypes.HBRUSH),
+            ("lpszMenuName", wintypes.LPCWSTR),
+            ("lpszClassName", wintypes.LPCWSTR),
+        ]
+
+    user32 = ctypes.WinDLL("user32", use_last_error=True)
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+    user32.DefWindowProcW.restype = LRESULT
+    user32.RegisterClassW.argtypes = [ctypes.POINTER(WNDCLASSW)]
+    user32.RegisterClassW.restype = wintypes.ATOM
+    user32.CreateWindowExW.argtypes = [
+        wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+        ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+        wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+    ]
+    user32.CreateWindowExW.restype = wintypes.HWND
+    user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+    user32.DispatchMessageW.argtypes = [ctypes.POINTER(wintypes.MSG)]
+    user32.TranslateMessage.argtypes = [ctypes.POINTER(wintypes.MSG)]
+    user32.PostMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+    user32.DestroyWindow.argtypes = [wintypes.HWND]
+    user32.PostQuitMessage.argtypes = [ctypes.c_int]
+    user32.UnregisterClassW.argtypes = [wintypes.LPCWSTR, wintypes.HINSTANCE]
+    kernel32.GetModuleHandleW.argtypes = [wintypes.LPCWSTR]
+    kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+    return user32, kernel32, WNDPROC, WNDCLASSW
+
+
+class DisplayChangeListener:
+    """Chama `on_change(motivo)` a cada mudança de modo ou da área de trabalho."""
+
+    def __init__(self, on_change: Callable[[str], None]):
+        self._on_change = on_change
+        self._hwnd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wndproc = None  # referência ao callback ctypes enquanto a janela existir
+        self._user32 = None
+
+    def start(self) -> bool:
+        """Cria a janela na thread do listener; False se não foi possível (ou fora do Windows)."""
+        if sys.platform != "win32" or self._thread is not None:
+            return False
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="display-events", daemon=True)
+        self._thread.start()
+        ready.wait(timeout=5)
+        return self._hwnd is not None
+
+    def _run(self, ready: threading.Event) -> None:
+        try:
+            user32, kernel32, WNDPROC, WNDCLASSW = _win32()
+
+            def wndproc(hwnd, msg, wparam, lparam):
+                if msg == WM_DISPLAYCHANGE:
+                    self._notify(MOTIVO_MODO)
+                elif msg == WM_SETTINGCHANGE and wparam == SPI_SETWORKAREA:
+                    self._notify(MOTIVO_AREA)
+                elif msg == WM_CLOSE:
+                    user32.DestroyWindow(hwnd)
+                    return 0
+                elif msg == WM_DESTROY:
+                    user32.PostQuitMessage(0)
+                    return 0
+                return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+            self._wndproc = WNDPROC(wndproc)
+            hinst = kernel32.GetModuleHandleW(None)
+            wc = WNDCLASSW(lpfnWndProc=self._wndproc, hInstance=hinst, lpszClassName=_CLASSE)
+            user32.RegisterClassW(ctypes.byref(wc))
+            # Janela de topo sem WS_VISIBLE: nunca aparece, mas recebe as difusões.
+            hwnd = user32.CreateWindowExW(0, _CLASSE, _CLASSE, 0, 0, 0, 0, 0, None, None, hinst, None)
+            if not hwnd:
+                return
+            self._user32 = user32
+            self._hwnd = hwnd
+        except Exception:
+            return
+        finally:
+            ready.set()
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnregisterClassW(_CLASSE, hinst)
+        self._hwnd = None
+
+    def _notify(self, motivo: str) -> None:
+        try:
+            self._on_change(motivo)
+        except Exception:
+            pass  # uma exceção não pode atravessar o WNDPROC
+
+    def stop(self, timeout: float = 2) -> None:
+        hwnd, thread = self._hwnd, self._thread
+        if hwnd is not None and self._user32 is not None:
+            self._user32.PostMessageW(hwnd, WM_CLOSE, 0, 0)
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
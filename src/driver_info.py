@@ -1,14 +1,160 @@
-"""Informações do adaptador de vídeo via PowerShell (CIM/WMI), sem wmic."""
+"""Informações do adaptador de vídeo: Win32/registo nativo, com PowerShell (CIM/WMI) como recurso."""
 
 from __future__ import annotations
 
 import json
+import queue
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import Future
 from typing import Any, Optional
 
+import ps_host
+import tracing
 
-def _run_powershell(command: str) -> Optional[str]:
+# Sessão PowerShell reutilizável (opcional): ver enable_persistent_host().
+_host: Optional[ps_host.PowerShellHost] = None
+
+# Resultado de get_driver_info() reaproveitado durante CACHE_TTL segundos.
+CACHE_TTL = 300.0
+_cache: Optional[tuple[float, str]] = None
+_inflight: Optional[Future] = None
+_cache_lock = threading.Lock()
+
+
+# Classe de dispositivos "Display" no registo: DriverDesc, DriverVersion, MatchingDeviceId...
+_CLASSE_VIDEO = r"SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}"
+_VALORES_CLASSE = ("DriverDesc", "DriverVersion", "MatchingDeviceId", "ProviderName", "DriverDate")
+_ATTACHED_TO_DESKTOP = 0x00000001
+_MIRRORING_DRIVER = 0x00000008
+
+
+def _read_class_entries() -> list[dict[str, str]]:
+    import winreg
+
+    entries: list[dict[str, str]] = []
+    try:
+        root = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _CLASSE_VIDEO)
+    except OSError:
+        return entries
+    with root:
+        i = 0
+        while True:
+            try:
+                sub = winreg.EnumKey(root, i)
+            except OSError:
+                break
+            i += 1
+            # Subchaves de instância são numéricas (0000, 0001...); "Properties" é protegida.
+            if not sub.isdigit():
+                continue
+            try:
+                key = winreg.OpenKey(root, sub)
+            except OSError:
+                continue
+            entry: dict[str, str] = {}
+            with key:
+                for name in _VALORES_CLASSE:
+                    try:
+                        value, _ = winreg.QueryValueEx(key, name)
+                    except OSError:
+                        continue
+                    entry[name] = str(value)
+            if entry:
+                entries.append(entry)
+    return entries
+
+
+def _match_class_entry(device_id: str, entries: list[dict[str, str]]) -> Optional[dict[str, str]]:
+    # MatchingDeviceId é um prefixo em minúsculas do DeviceID (ex.: pci\ven_8086&dev_3e92).
+    dev = device_id.lower()
+    best: Optional[dict[str, str]] = None
+    for entry in entries:
+        match = entry.get("MatchingDeviceId", "").lower()
+        if match and dev.startswith(match):
+            if best is None or len(match) > len(best.get("MatchingDeviceId", "")):
+                best = entry
+    return best
+
+
+def driver_version(device_id: str) -> str:
+    """DriverVersion da classe de vídeo para um DeviceID de EnumDisplayDevicesW ("" se não houver)."""
+    entry = _match_class_entry(device_id, _read_class_entries()) or {}
+    return entry.get("DriverVersion", "")
+
+
+def _format_native(devices: list[dict[str, Any]], entries: list[dict[str, str]]) -> Optional[str]:
+    """Combina as saídas de EnumDisplayDevicesW com as chaves da classe de vídeo."""
+    adapters: dict[str, dict[str, Any]] = {}
+    for dev in devices:
+        flags = int(dev.get("StateFlags") or 0)
+        if flags & _MIRRORING_DRIVER:
+            continue
+        # Uma placa com várias saídas aparece várias vezes com o mesmo DeviceID.
+        ident = dev.get("DeviceID") or dev.get("DeviceString") or ""
+        if not ident:
+            continue
+        prev = adapters.get(ident)
+        if prev is None or (flags & _ATTACHED_TO_DESKTOP and not prev["flags"] & _ATTACHED_TO_DESKTOP):
+            adapters[ident] = {"dev": dev, "flags": flags}
+    lines: list[str] = []
+    matched = False
+    for item in adapters.values():
+        entry = _match_class_entry(item["dev"].get("DeviceID") or "", entries) or {}
+        matched = matched or bool(entry)
+        name = entry.get("DriverDesc") or item["dev"].get("DeviceString") or "—"
+        ver = entry.get("DriverVersion") or "—"
+        st = "OK" if item["flags"] & _ATTACHED_TO_DESKTOP else "Inativo"
+        lines.append(f"{name}  |  Driver: {ver}  |  Status: {st}")
+    # Sem nenhuma correspondência no registo, o PowerShell tende a dar mais informação.
+    if not matched:
+        return None
+    return "\n".join(lines)
+
+
+@tracing.traced("driver_info.native", "driver")
+def _native_driver_info() -> Optional[str]:
+    try:
+        import win_display
+
+        return _format_native(win_display.list_display_adapters(), _read_class_entries())
+    except Exception:
+        return None
+
+
+def enable_persistent_host(argv: Optional[list[str]] = None) -> None:
+    """Passa a usar um PowerShell aquecido nas consultas seguintes à primeira.
+
+    A primeira consulta continua a correr CIM e WMI em paralelo a frio; a sessão aquece
+    logo a seguir, na mesma thread de fundo.
+    """
+    global _host
+    if _host is None:
+        _host = ps_host.PowerShellHost(argv)
+
+
+def shutdown() -> None:
+    global _host
+    host, _host = _host, None
+    if host is not None:
+        host.close()
+
+
+@tracing.traced("powershell", "subprocess")
+def _run_powershell(command: str, warm: bool = True) -> Optional[str]:
+    host = _host if warm else None
+    if host is not None:
+        try:
+            rc, out = host.run(command, timeout=15)
+        except ps_host.HostStartError:
+            pass  # Sem sessão persistente: segue para o arranque a frio.
+        except ps_host.HostError:
+            return None
+        else:
+            out = out.strip()
+            return out if rc == 0 and out else None
     try:
         kw: dict[str, Any] = {
             "args": [
@@ -55,30 +201,105 @@ def _format_json_block(raw: str) -> Optional[str]:
     return "\n".join(lines) if lines else None
 
 
-def get_driver_info() -> str:
-    if sys.platform != "win32":
-        return "Apenas Windows."
+# CIM: Windows 8+ / servidor moderno (substitui wmic de forma suportada).
+_CIM_CMD = (
+    "Get-CimInstance -ClassName Win32_VideoController | "
+    "Select-Object Name,DriverVersion,Status | ConvertTo-Json -Compress"
+)
+# WMI: fallback para ambientes mais antigos onde CIM pode falhar.
+_WMI_CMD = (
+    "Get-WmiObject Win32_VideoController | "
+    "Select-Object Name,DriverVersion,Status | ConvertTo-Json -Compress"
+)
+_INDISPONIVEL = "Informação não disponível (PowerShell ou permissões)."
 
-    # CIM: Windows 8+ / servidor moderno (substitui wmic de forma suportada).
-    cim_cmd = (
-        "Get-CimInstance -ClassName Win32_VideoController | "
-        "Select-Object Name,DriverVersion,Status | ConvertTo-Json -Compress"
-    )
-    raw = _run_powershell(cim_cmd)
-    if raw:
-        formatted = _format_json_block(raw)
-        if formatted:
-            return formatted
 
-    # WMI: fallback para ambientes mais antigos onde CIM pode falhar.
-    wmi_cmd = (
-        "Get-WmiObject Win32_VideoController | "
-        "Select-Object Name,DriverVersion,Status | ConvertTo-Json -Compress"
-    )
-    raw = _run_powershell(wmi_cmd)
-    if raw:
-        formatted = _format_json_block(raw)
+def _query_powershell(command: str, warm: bool = True) -> Optional[str]:
+    raw = _run_powershell(command, warm)
+    return _format_json_block(raw) if raw else None
+
+
+def _first_success(commands: list[str]) -> Optional[str]:
+    """Lança as consultas em paralelo (processos a frio) e devolve a primeira resposta válida."""
+    results: queue.Queue = queue.Queue()
+    for cmd in commands:
+        # Threads daemon: a consulta perdedora não atrasa o fecho da aplicação.
+        threading.Thread(target=lambda c=cmd: results.put(_query_powershell(c, warm=False)), daemon=True).start()
+    for _ in commands:
+        formatted = results.get()
         if formatted:
             return formatted
+    return None
+
+
+def _query_driver_info() -> str:
+    if sys.platform != "win32":
+        return "Apenas Windows."
+
+    # Nativo: EnumDisplayDevicesW + registo, sem lançar processos.
+    native = _native_driver_info()
+    if native:
+        return native
+
+    host = _host
+    if host is not None and host.alive:
+        # A sessão aquecida executa um comando de cada vez: em série já é rápido.
+        for cmd in (_CIM_CMD, _WMI_CMD):
+            formatted = _query_powershell(cmd)
+            if formatted:
+                return formatted
+        return _INDISPONIVEL
+
+    # Arranque a frio: CIM e WMI em corrida, fica a primeira que responder. A sessão
+    # persistente (se pedida) aquece depois, para as consultas seguintes.
+    formatted = _first_success([_CIM_CMD, _WMI_CMD])
+    if host is not None:
+        _warm_host(host)
+    return formatted or _INDISPONIVEL
+
+
+def _warm_host(host: ps_host.PowerShellHost) -> None:
+    """Arranca o processo da sessão com um comando vazio; falhas ficam para o próximo pedido."""
+    try:
+        host.run("$null", timeout=15)
+    except ps_host.HostError:
+        pass
+
+
+def cached_driver_info(max_age: float = CACHE_TTL) -> Optional[str]:
+    """Valor em cache se ainda for recente; nunca consulta o sistema."""
+    with _cache_lock:
+        if _cache is not None and time.monotonic() - _cache[0] <= max_age:
+            return _cache[1]
+    return None
+
+
+def prefetch() -> Future:
+    """Consulta em segundo plano (partilhada por pedidos simultâneos); devolve um Future."""
+    global _inflight
+    with _cache_lock:
+        if _inflight is not None and not _inflight.done():
+            return _inflight
+        future: Future = Future()
+        _inflight = future
+
+    def worker() -> None:
+        global _cache
+        try:
+            info = _query_driver_info()
+        except Exception as exc:
+            future.set_exception(exc)
+            return
+        with _cache_lock:
+            _cache = (time.monotonic(), info)
+        future.set_result(info)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
 
-    return "Informação não disponível (PowerShell ou permissões)."
+def get_driver_info(max_age: float = CACHE_TTL) -> str:
+    cached = cached_driver_info(max_age)
+    if cached is not None:
+        return cached
+    return prefetch().result()
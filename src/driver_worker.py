@@ -0,0 +1,390 @@
+"""Chamadas a win_display num processo auxiliar, com prazo rígido por chamada.
+
+Alguns drivers nunca regressam de ChangeDisplaySettingsExW: dentro do processo da GUI,
+isso pendura a janela e obriga a matá-la (sem a pergunta de restauro do fecho). Aqui
+cada chamada vai por um pipe a um processo filho; se o prazo passar, o filho é morto,
+outro arranca no seu lugar e quem chamou recebe DriverTimeout (a GUI mostra-o na barra
+de estado como qualquer outro erro do driver).
+
+Protocolo (uma linha JSON por mensagem, UTF-8):
+    pedido:   {"id": 7, "fn": "change_resolution", "args": [1280, 720, null, 0, 0]}
+    resposta: {"id": 7, "result": [true, ""]}   ou   {"id": 7, "error": "mensagem"}
+    recusa do driver em (ok, erro): {"id": 7, "result": [false, "mensagem", -2]} (DISP_CHANGE_*)
+
+O filho é `python driver_worker.py` (ou `RemoteResolution.exe --driver-worker`) e só
+importa win_display. Ligado por omissão no Windows; RR_DRIVER_WORKER=0 desliga,
+RR_DRIVER_WORKER=1 liga noutros sistemas (com RR_USER32_BACKEND). O supervisor é
+experimentado em Linux com um filho que pendura de propósito:
+
+    python scripts/driver_worker_check.py
+"""
+
+from __future__ import annotations
+
+import io
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import tracing
+
+ENV_DRIVER_WORKER = "RR_DRIVER_WORKER"
+# Mesmos nomes de win_display / user32_trace (sem importar win_display no processo da GUI).
+_ENV_USER32_BACKEND = "RR_USER32_BACKEND"
+_ENV_USER32_RECORD = "RR_USER32_RECORD"
+
+# Prazo de cada chamada, em segundos. Há drivers que demoram 4–6 s numa troca legítima.
+PRAZO_PADRAO = 5.0
+PRAZOS = {
+    "change_resolution": 30.0,
+    "restore_topology": 30.0,
+    "enumerate_modes": 15.0,
+}
+MAX_PROCESSOS = 4  # testes CDS_TEST em paralelo (mode_probe) sem esperar uns pelos outros
+# Funções que devolvem (ok, erro); o erro pode trazer o código do driver (DriverError).
+_RESULTADO_OK_ERRO = ("change_resolution", "restore_topology")
+
+# Funções de win_display servidas pelo filho.
+FUNCOES = (
+    "capture_topology",
+    "change_resolution",
+    "enumerate_modes",
+    "get_current_mode",
+    "get_current_resolution",
+    "get_display_identity",
+    "list_monitors",
+    "restore_topology",
+    "test_resolution",
+)
+
+# A gravação de user32 (RR_USER32_RECORD) tem de acontecer onde as chamadas acontecem:
+# no filho. Retirada aqui, antes de a GUI importar win_display, e passada só ao filho.
+_record_path: Optional[str] = None
+
+
+class WorkerError(Exception):
+    """O processo auxiliar falhou (arranque, pipe fechado, resposta ilegível)."""
+
+
+class DriverTimeout(WorkerError):
+    """O driver não respondeu dentro do prazo; o processo auxiliar foi reiniciado."""
+
+
+class RemoteError(WorkerError):
+    """A função levantou uma exceção no filho (que continua utilizável)."""
+
+
+def wanted() -> bool:
+    value = os.environ.get(ENV_DRIVER_WORKER, "").strip()
+    if value:
+        return value != "0"
+    return sys.platform == "win32" and not os.environ.get(_ENV_USER32_BACKEND)
+
+
+def _detach_recording() -> None:
+    global _record_path
+    if wanted() and _record_path is None:
+        _record_path = os.environ.pop(_ENV_USER32_RECORD, None)
+
+
+_detach_recording()
+
+
+def default_argv() -> List[str]:
+    if getattr(sys, "frozen", False):
+        # Executável do PyInstaller: o ponto de entrada reconhece --driver-worker.
+        return [sys.executable, "--driver-worker"]
+    return [sys.executable, os.path.abspath(__file__)]
+
+
+# ── Conversão de valores (JSON ↔ tipos de win_display) ─────────────────────────
+def _monitor_state(item: Sequence[Any]) -> Any:
+    from mode_catalog import DisplayMode, MonitorState
+
+    device, mode, x, y = item
+    return MonitorState(device, DisplayMode(*mode), x, y)
+
+
+def _encode_args(fn: str, args: Sequence[Any]) -> List[Any]:
+    if fn == "restore_topology":
+        return [[[s.device, list(s.mode), s.x, s.y] for s in args[0]]]
+    return list(args)
+
+
+def _decode_args(fn: str, args: List[Any]) -> List[Any]:
+    if fn == "restore_topology":
+        return [[_monitor_state(item) for item in args[0]]]
+    return args
+
+
+def _encode_result(fn: str, value: Any) -> Any:
+    if fn in _RESULTADO_OK_ERRO:
+        ok, erro = value
+        code = getattr(erro, "code", None)
+        return [ok, erro] if code is None else [ok, erro, code]
+    to_flat = getattr(value, "to_flat", None)
+    return to_flat() if to_flat is not None else value
+
+
+def _decode_result(fn: str, value: Any) -> Any:
+    from mode_catalog import DisplayMode, DriverError, ModeCatalog
+
+    if fn in _RESULTADO_OK_ERRO:
+        ok, erro, *code = value
+        return ok, DriverError(erro, code[0]) if code else erro
+    if fn == "enumerate_modes":
+        return ModeCatalog.from_flat(value)
+    if fn == "capture_topology":
+        return [_monitor_state(item) for item in value]
+    if fn == "get_current_mode":
+        return DisplayMode(*value) if value is not None else None
+    if fn == "list_monitors":
+        return [tuple(item) for item in value]
+    if isinstance(value, list):
+        return tuple(value)  # (ok, erro), (w, h), identidade
+    return value
+
+
+# ── Processo filho ─────────────────────────────────────────────────────────────
+def serve(table: Optional[Dict[str, Callable[..., Any]]] = None) -> int:
+    """Ciclo do filho: lê pedidos do stdin até o pipe fechar. `table` substitui win_display."""
+    stdin = io.open(0, "r", encoding="utf-8", closefd=False)
+    stdout = io.open(1, "w", encoding="utf-8", closefd=False, newline="\n")
+    if table is None:
+        import win_display
+
+        win_display.enable_dpi_awareness()
+        table = {name: getattr(win_display, name) for name in FUNCOES}
+    for line in stdin:
+        try:
+            request = json.loads(line)
+            call_id, fn, args = request["id"], request["fn"], request.get("args", [])
+        except (ValueError, KeyError, TypeError):
+            continue
+        try:
+            if fn not in table:
+                raise ValueError(f"função desconhecida: {fn}")
+            response = {"id": call_id, "result": _encode_result(fn, table[fn](*_decode_args(fn, args)))}
+        except Exception as exc:
+            response = {"id": call_id, "error": str(exc) or type(exc).__name__}
+        stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+        stdout.flush()
+    return 0
+
+
+# ── Supervisor (processo da GUI) ───────────────────────────────────────────────
+class _Process:
+    """Um filho e a fila das suas linhas de saída (lidas por uma thread própria)."""
+
+    def __init__(self, argv: Sequence[str], env: Dict[str, str]):
+        kw: dict[str, Any] = {
+            "args": list(argv),
+            "stdin": subprocess.PIPE,
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.DEVNULL,
+            "text": True,
+            "encoding": "utf-8",
+            "errors": "replace",
+            "bufsize": 1,
+            "env": env,
+        }
+        if sys.platform == "win32":
+            kw["creationflags"] = subprocess.CREATE_NO_WINDOW
+        try:
+            self.proc = subprocess.Popen(**kw)
+        except OSError as exc:
+            raise WorkerError(f"não foi possível lançar o processo auxiliar: {exc}") from exc
+        self.lines: queue.Queue = queue.Queue()
+        threading.Thread(target=self._pump, name="driver-worker-pipe", daemon=True).start()
+
+    def _pump(self) -> None:
+        try:
+            for line in self.proc.stdout:
+                self.lines.put(line)
+        except (OSError, ValueError):
+            pass
+        self.lines.put(None)
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def call(self, call_id: int, fn: str, args: List[Any], timeout: float) -> Any:
+        try:
+            self.proc.stdin.write(json.dumps({"id": call_id, "fn": fn, "args": args}) + "\n")
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as exc:
+            raise WorkerError("o processo auxiliar terminou antes do pedido") from exc
+        try:
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            raise DriverTimeout(
+                f"O driver de vídeo não respondeu em {timeout:g} s ({fn}); processo auxiliar reiniciado."
+            ) from None
+        if line is None:
+            raise WorkerError(f"o processo auxiliar terminou a meio de {fn}")
+        try:
+            response = json.loads(line)
+        except ValueError as exc:
+            raise WorkerError("resposta ilegível do processo auxiliar") from exc
+        if response.get("id") != call_id:
+            raise WorkerError("resposta fora de ordem do processo auxiliar")
+        if "error" in response:
+            raise RemoteError(response["error"])
+        return response.get("result")
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+class DriverClient:
+    """Conjunto de até `max_processes` filhos; cada chamada usa um livre durante o seu prazo.
+
+    Um filho que passe do prazo (ou morra) é morto e substituído de imediato, para que a
+    chamada seguinte não pague o arranque. Seguro entre threads.
+    """
+
+    def __init__(
+        self,
+        argv: Optional[Sequence[str]] = None,
+        max_processes: int = MAX_PROCESSOS,
+        deadlines: Optional[Dict[str, float]] = None,
+    ):
+        self.argv = list(argv or default_argv())
+        self.deadlines = {**PRAZOS, **(deadlines or {})}
+        # O filho chama win_display diretamente (e não lança filhos seus).
+        self.env = {k: v for k, v in os.environ.items() if k not in (tracing.ENV_TRACE, tracing.ENV_TRACE_PROFILE)}
+        self.env[ENV_DRIVER_WORKER] = "0"
+        # Com o registo ligado aqui (RR_TRACE ou --trace), cada filho grava o seu ficheiro
+        # e este processo junta-os ao seu: as chamadas a user32 acontecem lá.
+        child_trace = tracing.child_trace_path()
+        if child_trace:
+            self.env[tracing.ENV_TRACE] = child_trace
+        if _record_path:
+            # Um só ficheiro de gravação: um só filho.
+            self.env[_ENV_USER32_RECORD] = _record_path
+            max_processes = 1
+        self.max_processes = max(1, max_processes)
+        self._cond = threading.Condition()
+        self._idle: List[_Process] = []
+        self._count = 1
+        self._closed = False
+        self._ids = itertools.count(1)
+        self.restarts = 0
+        # O primeiro filho arranca já, em paralelo com a construção da janela.
+        self._idle.append(self._spawn())
+
+    def _spawn(self) -> _Process:
+        """Lança um filho para um lugar já reservado em `_count` (liberta-o se falhar)."""
+        try:
+            proc = _Process(self.argv, self.env)
+        except WorkerError:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        tracing.merge_child(proc.pid)
+        return proc
+
+    def _acquire(self) -> _Process:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise WorkerError("processo auxiliar já encerrado")
+                if self._idle:
+                    return self._idle.pop()
+                if self._count < self.max_processes:
+                    self._count += 1
+                    break
+                self._cond.wait()
+        return self._spawn()
+
+    def _release(self, proc: _Process) -> None:
+        with self._cond:
+            if not self._closed:
+                self._idle.append(proc)
+                self._cond.notify()
+                return
+        proc.close()
+
+    def _replace(self, proc: _Process) -> None:
+        """Mata um filho pendurado (ou morto) e deixa outro à espera no seu lugar."""
+        proc.kill()
+        with self._cond:
+            self.restarts += 1
+            if self._closed:
+                self._count -= 1
+                return
+        try:
+            fresh = self._spawn()
+        except WorkerError:
+            return  # o lugar ficou livre: o próximo pedido volta a tentar
+        self._release(fresh)
+
+    def call(self, fn: str, *args: Any) -> Any:
+        proc = self._acquire()
+        try:
+            result = proc.call(next(self._ids), fn, _encode_args(fn, args), self.deadlines.get(fn, PRAZO_PADRAO))
+        except RemoteError:
+            self._release(proc)
+            raise
+        except WorkerError:
+            self._replace(proc)
+            raise
+        self._release(proc)
+        return _decode_result(fn, result)
+
+    def function(self, fn: str) -> Callable[..., Any]:
+        """Substituto de win_display.<fn> com a mesma assinatura."""
+        if fn not in FUNCOES:
+            raise ValueError(f"função desconhecida: {fn}")
+
+        def proxy(*args: Any, **kwargs: Any) -> Any:
+            if kwargs:
+                # O protocolo só leva argumentos posicionais (ver _encode_args).
+                raise TypeError(f"{fn}() pelo processo auxiliar não aceita argumentos nomeados: {', '.join(kwargs)}")
+            return self.call(fn, *args)
+
+        proxy.__name__ = fn
+        return proxy
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for proc in idle:
+            proc.close()
+
+
+
+class DriverFunctions:
+    """Fachada com as funções de FUNCOES, pelos nomes de win_display, servidas por `client`.
+
+    Quem usa win_display diretamente passa a usar isto sem mudar as chamadas.
+    """
+
+    def __init__(self, client: DriverClient):
+        self.client = client
+        for name in FUNCOES:
+            setattr(self, name, client.function(name))
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
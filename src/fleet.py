@@ -0,0 +1,231 @@
+"""Orquestração do lado do analista: o mesmo plano de resolução em várias máquinas.
+
+Cada cliente corre o servidor de controlo (`--serve PORTA --bind 0.0.0.0 --token ...`
+ou a GUI com RR_CONTROL_PORT/RR_CONTROL_BIND/RR_CONTROL_TOKEN). Para cada máquina, em
+paralelo e com limite de concorrência:
+
+    auth → test do modo pedido e, se recusado, de cada alternativa → apply do primeiro
+    aceite (com restore_after, se o plano tiver prazo de restauro, e o preset do plano:
+    com --low-bandwidth cada cliente escolhe a menor frequência/bpp desse tamanho)
+
+Exemplo (lista de máquinas "host:porta", uma por linha):
+
+    py -3 src\\fleet.py sala3.txt --mode 1920x1080 --fallback 1600x900 --restore-after 7200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from bandwidth import PRESET_BAIXO_DEBITO
+from control_server import ENV_CONTROL_TOKEN
+
+Tamanho = Tuple[int, int]
+
+CONCORRENCIA = 16
+TIMEOUT = 20.0
+
+
+class Endpoint(NamedTuple):
+    host: str
+    port: int
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class Plan(NamedTuple):
+    target: Tamanho
+    fallbacks: Tuple[Tamanho, ...] = ()
+    restore_after: Optional[float] = None  # segundos; None = fica até alguém restaurar
+    preset: Optional[str] = None  # ex.: "low-bandwidth"; None = o driver escolhe frequência/bpp
+
+    @property
+    def candidates(self) -> Tuple[Tamanho, ...]:
+        return (self.target,) + tuple(m for m in self.fallbacks if m != self.target)
+
+
+class HostResult(NamedTuple):
+    endpoint: Endpoint
+    ok: bool
+    applied: Optional[Tamanho]
+    error: str
+    elapsed: float
+
+
+class FleetError(Exception):
+    """Resposta de erro JSON-RPC de um cliente."""
+
+
+def parse_endpoint(text: str, default_port: int = 8765) -> Endpoint:
+    text = text.strip()
+    host, sep, port = text.rpartition(":")
+    if not sep or "]" in port:  # sem porta (ou IPv6 sem porta: "[::1]")
+        host, port = text, str(default_port)
+    host = host.strip("[]")
+    if not host or not port.isdigit():
+        raise ValueError(f"endereço inválido: {text!r} (use host:porta)")
+    return Endpoint(host, int(port))
+
+
+def read_endpoints(path: str, default_port: int = 8765) -> List[Endpoint]:
+    """Um endereço por linha; linhas vazias e comentários (#) são ignorados."""
+    endpoints = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                endpoints.append(parse_endpoint(line, default_port))
+    return endpoints
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+
+    async def call(self, method: str, params: Any = None) -> Any:
+        msg: dict[str, Any] = {"jsonrpc": "2.0", "id": next(self._ids), "method": method}
+        if params is not None:
+            msg["params"] = params
+        self.writer.write((json.dumps(msg) + "\n").encode("utf-8"))
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise FleetError("ligação fechada pelo cliente")
+        response = json.loads(line)
+        if not isinstance(response, dict):
+            raise FleetError(f"resposta inválida a {method}")
+        if "error" in response:
+            error = response["error"]
+            raise FleetError(str(error.get("message", "erro") if isinstance(error, dict) else error))
+        return response.get("result")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def _push(endpoint: Endpoint, plan: Plan, token: Optional[str]) -> Tamanho:
+    reader, writer = await asyncio.open_connection(endpoint.host, endpoint.port)
+    conn = _Connection(reader, writer)
+    try:
+        if token:
+            await conn.call("auth", {"token": token})
+        refused = []
+        for w, h in plan.candidates:
+            params: dict[str, Any] = {"width": w, "height": h}
+            if plan.preset is not None:
+                params["preset"] = plan.preset
+            if not await conn.call("test", params):
+                refused.append(f"{w}x{h}")
+                continue
+            if plan.restore_after is not None:
+                params["restore_after"] = plan.restore_after
+            result = await conn.call("apply", params)
+            if not isinstance(result, dict):
+                raise FleetError(f"resposta inválida a apply: {result!r}")
+            if result.get("ok"):
+                return w, h
+            refused.append(f"{w}x{h} ({result.get('error') or 'falhou'})")
+        raise FleetError("nenhum modo aceite: " + ", ".join(refused))
+    finally:
+        conn.close()
+
+
+async def push_plan(endpoint: Endpoint, plan: Plan, token: Optional[str] = None, timeout: float = TIMEOUT) -> HostResult:
+    """Aplica o plano numa máquina; nunca levanta exceção (o erro fica no resultado)."""
+    t0 = time.perf_counter()
+    try:
+        applied = await asyncio.wait_for(_push(endpoint, plan, token), timeout)
+    except asyncio.TimeoutError:
+        return HostResult(endpoint, False, None, f"tempo esgotado ({timeout:g} s)", time.perf_counter() - t0)
+    except (OSError, FleetError, ValueError) as exc:
+        return HostResult(endpoint, False, None, str(exc) or type(exc).__name__, time.perf_counter() - t0)
+    except Exception as exc:
+        # Cliente com versão diferente ou resposta inesperada: uma máquina não derruba a frota.
+        return HostResult(endpoint, False, None, f"{type(exc).__name__}: {exc}", time.perf_counter() - t0)
+    return HostResult(endpoint, True, applied, "", time.perf_counter() - t0)
+
+
+async def run_fleet(
+    endpoints: Sequence[Endpoint],
+    plan: Plan,
+    token: Optional[str] = None,
+    concurrency: int = CONCORRENCIA,
+    timeout: float = TIMEOUT,
+) -> List[HostResult]:
+    """Resultados pela ordem de `endpoints`; no máximo `concurrency` ligações em simultâneo."""
+    gate = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(endpoint: Endpoint) -> HostResult:
+        async with gate:
+            return await push_plan(endpoint, plan, token, timeout)
+
+    return list(await asyncio.gather(*(one(e) for e in endpoints)))
+
+
+def summarize(results: Sequence[HostResult], plan: Plan) -> str:
+    lines = []
+    for r in results:
+        if r.ok and r.applied is not None:
+            lines.append(f"  ✔ {r.endpoint}  {r.applied[0]}x{r.applied[1]}  ({r.elapsed * 1000:.0f} ms)")
+        else:
+            lines.append(f"  ✘ {r.endpoint}  {r.error}  ({r.elapsed * 1000:.0f} ms)")
+    ok = sum(1 for r in results if r.ok)
+    fallback = sum(1 for r in results if r.ok and r.applied != plan.target)
+    lines.append(f"{ok}/{len(results)} máquinas alteradas" + (f" ({fallback} com modo alternativo)" if fallback else ""))
+    return "\n".join(lines)
+
+
+def _parse_size(text: str) -> Tamanho:
+    try:
+        w, h = text.lower().replace("×", "x").split("x")
+        return int(w), int(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {text!r} (use LARGURAxALTURA)") from None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="fleet", description="Aplica um plano de resolução a várias máquinas.")
+    p.add_argument("hosts", help="ficheiro com um host:porta por linha")
+    p.add_argument("--mode", type=_parse_size, required=True, metavar="WxH", help="resolução pretendida")
+    p.add_argument("--fallback", type=_parse_size, action="append", default=[], metavar="WxH",
+                   help="alternativa se a máquina recusar a anterior (repetível, por ordem)")
+    p.add_argument("--restore-after", type=float, metavar="SEG", help="cada cliente restaura sozinho após SEG segundos")
+    p.add_argument("--low-bandwidth", action="store_true", help="menor frequência/bpp aceitável em cada cliente")
+    p.add_argument("--port", type=int, default=8765, help="porta para linhas sem porta")
+    p.add_argument("--concurrency", type=int, default=CONCORRENCIA)
+    p.add_argument("--timeout", type=float, default=TIMEOUT, help="prazo por máquina, em segundos")
+    p.add_argument("--token", help=f"segredo dos clientes (omissão: {ENV_CONTROL_TOKEN})")
+    p.add_argument("--json", action="store_true", help="resultados em JSON")
+    args = p.parse_args(argv)
+
+    try:
+        endpoints = read_endpoints(args.hosts, args.port)
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    plan = Plan(args.mode, tuple(args.fallback), args.restore_after, PRESET_BAIXO_DEBITO if args.low_bandwidth else None)
+    token = args.token or os.environ.get(ENV_CONTROL_TOKEN) or None
+    results = asyncio.run(run_fleet(endpoints, plan, token, args.concurrency, args.timeout))
+    if args.json:
+        print(json.dumps([
+            {"host": str(r.endpoint), "ok": r.ok, "applied": list(r.applied) if r.applied else None,
+             "error": r.error, "elapsed_ms": round(r.elapsed * 1000, 1)}
+            for r in results
+        ], ensure_ascii=False))
+    else:
+        print(summarize(results, plan))
+    return 0 if results and all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
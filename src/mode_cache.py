@@ -0,0 +1,158 @@
+"""Cache em disco do catálogo de modos de vídeo (por adaptador, driver e monitor)."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from mode_catalog import ModeCatalog
+
+# Incrementar sempre que o formato gravado mudar: entradas antigas são ignoradas.
+# v2: modos completos (largura, altura, frequência, bpp, orientação).
+FORMATO_VERSAO = 2
+NOME_FICHEIRO = "modos.json"
+_MAX_ENTRADAS = 4
+
+Identidade = Tuple[str, str, str]  # (adaptador, versão do driver, monitor)
+
+# Um lock por ficheiro, partilhado por todas as instâncias que o usam neste processo.
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "RemoteResolution")
+
+
+def make_key(adapter: str, driver_version: str, monitor: str) -> str:
+    return "|".join((adapter.strip(), driver_version.strip(), monitor.strip()))
+
+
+def monitor_key(identity: Identidade) -> str:
+    """Chave por adaptador e monitor, sem a versão do driver (guardada dentro da entrada)."""
+    adapter, _driver, monitor = identity
+    return "|".join((adapter.strip(), monitor.strip()))
+
+
+class JsonStore:
+    """Ficheiro {"v": versão, "entries": {chave: valor}} com as `max_entries` chaves mais recentes.
+
+    Base dos ficheiros locais (modos, recusas, latências). Escritas atómicas (temporário
+    + os.replace); erros de disco ignorados, como numa cache. Uma `version` diferente da
+    gravada faz o ficheiro contar como vazio: incrementá-la sempre que o formato mudar.
+    Ler-alterar-gravar (put, update) corre sob um lock por ficheiro: a fila de trocas,
+    o pool de CDS_TEST e o varrimento escrevem ao mesmo tempo.
+    """
+
+    def __init__(self, name: str, version: int, max_entries: int, path: Optional[str] = None):
+        self.path = path or os.path.join(default_cache_dir(), name)
+        self.version = version
+        self.max_entries = max_entries
+        self._lock = _lock_for(self.path)
+
+    def read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("v") != self.version:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def write(self, entries: Dict[str, Any]) -> None:
+        folder = os.path.dirname(self.path)
+        prefix = "." + os.path.splitext(os.path.basename(self.path))[0] + "-"
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=prefix, dir=folder)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"v": self.version, "entries": entries}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Any:
+        return self.read().get(key)
+
+    def put(self, key: str, value: Any) -> None:
+        """Grava `value` como a entrada mais recente (None apaga a chave)."""
+        self.update(key, lambda _old: value)
+
+    def update(self, key: str, change: Callable[[Any], Any]) -> Any:
+        """Grava change(valor atual) na chave, sem outra escrita pelo meio; devolve o novo valor."""
+        with self._lock:
+            entries = self.read()
+            value = change(entries.pop(key, None))
+            if value is not None:
+                # Mantém só as chaves mais recentes (dict preserva a ordem de inserção).
+                while len(entries) >= self.max_entries:
+                    entries.pop(next(iter(entries)))
+                entries[key] = value
+            self.write(entries)
+        return value
+
+    # Entradas por monitor que caducam quando o driver muda: {"driver": versão, ...}.
+    def get_monitor(self, identity: Optional[Identidade]) -> Optional[Dict[str, Any]]:
+        if identity is None:
+            return None
+        return _current_driver(self.get(monitor_key(identity)), identity)
+
+    def put_monitor(self, identity: Identidade, entry: Optional[Dict[str, Any]]) -> None:
+        self.update_monitor(identity, lambda _old: entry)
+
+    def update_monitor(
+        self, identity: Identidade, change: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Como update(); `change` recebe a entrada atual (None se de outro driver)."""
+
+        def apply(old: Any) -> Optional[Dict[str, Any]]:
+            entry = change(_current_driver(old, identity))
+            return None if entry is None else {**entry, "driver": identity[1].strip()}
+
+        return self.update(monitor_key(identity), apply)
+
+
+def _current_driver(entry: Any, identity: Identidade) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict) or entry.get("driver") != identity[1].strip():
+        return None  # nunca visto, ou driver atualizado desde então
+    return entry
+
+
+class ModeCache:
+    """Catálogos de modos persistidos em JSON compacto, um por identidade de ecrã."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._store = JsonStore(NOME_FICHEIRO, FORMATO_VERSAO, _MAX_ENTRADAS, path)
+        self.path = self._store.path
+
+    def load(self, key: str) -> Optional[ModeCatalog]:
+        flat = self._store.get(key)
+        if not isinstance(flat, list):
+            return None
+        try:
+            return ModeCatalog.from_flat(flat)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    def save(self, key: str, catalog: ModeCatalog) -> None:
+        # Lista plana de inteiros (CAMPOS por modo): bem mais compacta que objetos em JSON.
+        self._store.put(key, catalog.to_flat())
+
+    def revalidate(self, key: str, enumerate_modes: Callable[[], ModeCatalog]) -> Tuple[ModeCatalog, bool]:
+        """Reenumera e atualiza o disco; devolve (catálogo, mudou_face_ao_cache)."""
+        fresh = enumerate_modes()
+        changed = fresh != self.load(key)
+        if changed:
+            self.save(key, fresh)
+        return fresh, changed
@@ -0,0 +1,253 @@
+"""Catálogo compacto de modos de vídeo (colunas em arrays) com consultas indexadas."""
+
+from __future__ import annotations
+
+import math
+import operator
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+Tamanho = Tuple[int, int]
+
+# Número de inteiros por modo em to_flat()/from_flat().
+CAMPOS = 5
+
+# Secções dos atalhos, pela ordem de apresentação; proporção de referência (largura/altura).
+SECOES_ASPECTO: List[Tuple[str, Tuple[float, ...]]] = [
+    ("16:9", (16 / 9,)),
+    ("16:10", (16 / 10,)),
+    ("4:3 / 5:4", (4 / 3, 5 / 4)),
+    ("Ultrawide", (64 / 27, 43 / 18, 12 / 5)),
+]
+SECAO_OUTRAS = "Outras"
+# 1366×768 e 1360×768 são "16:9" de marketing, não exatos: tolerância relativa.
+_TOLERANCIA = 0.02
+
+_np = None
+_np_checked = False
+
+
+def _numpy():
+    # NumPy é opcional e caro de importar: só na primeira classificação, nunca no arranque.
+    global _np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+
+            _np = numpy
+        except ImportError:
+            _np = None
+    return _np
+
+
+class DisplayMode(NamedTuple):
+    width: int
+    height: int
+    frequency: int = 0
+    bpp: int = 0
+    orientation: int = 0
+
+    @property
+    def size(self) -> Tamanho:
+        return self.width, self.height
+
+
+def mode_matches(mode: Optional[DisplayMode], width: int, height: int, frequency: int = 0, bpp: int = 0) -> bool:
+    """O modo lido corresponde ao pedido? Frequência/bpp a 0 (escolha do driver) não contam."""
+    if mode is None or mode.size != (width, height):
+        return False
+    # 59 ou 60 Hz: o driver arredonda 59,94 Hz de formas diferentes na escrita e na leitura.
+    if frequency > 1 and mode.frequency > 1 and abs(mode.frequency - frequency) > 1:
+        return False
+    return not bpp or mode.bpp == bpp
+
+
+class MonitorState(NamedTuple):
+    """Modo e posição de um monitor no ambiente de trabalho."""
+
+    device: str
+    mode: DisplayMode
+    x: int
+    y: int
+
+
+class DriverError(str):
+    """Mensagem de erro de uma troca recusada pelo driver, com o código DISP_CHANGE_* em `code`.
+
+    É o `erro` de (ok, erro), tipado Union[str, DriverError] em win_display.Resultado: as
+    outras falhas continuam a ser texto simples. Quem só mostra o texto não muda; quem
+    decide pelo motivo usa win_display.error_code() (aceita os dois) em vez de comparar
+    mensagens, que podem ser reescritas ou traduzidas.
+    """
+
+    code: int
+
+    def __new__(cls, text: str, code: int) -> "DriverError":
+        self = super().__new__(cls, text)
+        self.code = code
+        return self
+
+
+def reduced_aspect(width: int, height: int) -> Tamanho:
+    g = math.gcd(width, height) or 1
+    return width // g, height // g
+
+
+def _classify_ratio(ratio: float) -> str:
+    for name, refs in SECOES_ASPECTO:
+        for ref in refs:
+            if abs(ratio - ref) <= ref * _TOLERANCIA:
+                return name
+    return SECAO_OUTRAS
+
+
+def classify_aspect(sizes: Sequence[Tamanho]) -> List[str]:
+    """Nome da secção de cada tamanho (vetorizado com NumPy quando disponível)."""
+    if not sizes:
+        return []
+    np = _numpy()
+    if np is None:
+        return [_classify_ratio(w / h) if h else SECAO_OUTRAS for w, h in sizes]
+    arr = np.asarray(sizes, dtype=np.float64)
+    heights = np.where(arr[:, 1] > 0, arr[:, 1], np.nan)
+    ratios = arr[:, 0] / heights
+    labels = np.full(len(sizes), SECAO_OUTRAS, dtype=object)
+    # Percorre ao contrário para a primeira secção da lista ganhar em caso de empate.
+    for name, refs in reversed(SECOES_ASPECTO):
+        ref = np.asarray(refs)
+        hit = (np.abs(ratios[:, None] - ref[None, :]) <= ref[None, :] * _TOLERANCIA).any(axis=1)
+        labels[hit] = name
+    return labels.tolist()
+
+
+class ModeCatalog:
+    """Modos ordenados por área, guardados coluna a coluna em `array('I')`.
+
+    Um índice {(w, h): (início, fim)} aponta para a fatia de cada tamanho, pelo que
+    as consultas por tamanho não percorrem o catálogo inteiro.
+    """
+
+    __slots__ = ("widths", "heights", "frequencies", "bpps", "orientations", "_index", "_sizes")
+
+    def __init__(self, modes: Iterable[Sequence[int]] = ()):
+        rows = [tuple(int(v) for v in m) + (0,) * (CAMPOS - len(m)) for m in modes]
+        self._set_columns(*(zip(*rows) if rows else [()] * CAMPOS))
+
+    def _set_columns(self, *columns: Sequence[int]) -> None:
+        # Linhas (área, w, h, freq, bpp, orientação): a ordem natural dos tuplos é a do
+        # catálogo, pelo que set() e sorted() correm em C, sem função-chave por modo.
+        rows = sorted(set(zip(map(operator.mul, columns[0], columns[1]), *columns)))
+        ordered = list(zip(*rows)) if rows else [()] * (CAMPOS + 1)
+        self.widths = array("I", ordered[1])
+        self.heights = array("I", ordered[2])
+        self.frequencies = array("I", ordered[3])
+        self.bpps = array("I", ordered[4])
+        self.orientations = array("I", ordered[5])
+        self._build_index()
+
+    def _build_index(self) -> None:
+        # Cada tamanho é uma fatia contígua: dict() guarda a ordem da primeira ocorrência e o
+        # valor da última, ou seja, o fim da fatia; o ciclo Python é por tamanho, não por modo.
+        ends = dict(zip(zip(self.widths, self.heights), range(1, len(self.widths) + 1)))
+        index: Dict[Tamanho, Tuple[int, int]] = {}
+        start = 0
+        for size, end in ends.items():
+            index[size] = (start, end)
+            start = end
+        self._index = index
+        self._sizes = list(ends)
+
+    # ── Serialização compacta ──────────────────────────────────────────────────
+    def to_flat(self) -> List[int]:
+        flat: List[int] = []
+        for i in range(len(self.widths)):
+            flat.extend((self.widths[i], self.heights[i], self.frequencies[i], self.bpps[i], self.orientations[i]))
+        return flat
+
+    @classmethod
+    def from_flat(cls, flat: Sequence[int]) -> "ModeCatalog":
+        if len(flat) % CAMPOS:
+            raise ValueError("lista de modos com tamanho inválido")
+        return cls.from_packed(flat)
+
+    @classmethod
+    def from_packed(cls, flat: Sequence[int], count: Optional[int] = None) -> "ModeCatalog":
+        """Catálogo a partir dos primeiros `count` modos de uma lista/array plana (CAMPOS por modo).
+
+        Colunas por fatias com passo; deduplicação e ordenação sem ciclo Python por modo.
+        """
+        end = (len(flat) // CAMPOS if count is None else count) * CAMPOS
+        catalog = cls.__new__(cls)
+        catalog._set_columns(*(flat[c:end:CAMPOS] for c in range(CAMPOS)))
+        return catalog
+
+    # ── Acesso ─────────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.widths)
+
+    def __getitem__(self, i: int) -> DisplayMode:
+        return DisplayMode(self.widths[i], self.heights[i], self.frequencies[i], self.bpps[i], self.orientations[i])
+
+    def __iter__(self) -> Iterator[DisplayMode]:
+        for i in range(len(self.widths)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ModeCatalog):
+            return NotImplemented
+        return (
+            self.widths == other.widths
+            and self.heights == other.heights
+            and self.frequencies == other.frequencies
+            and self.bpps == other.bpps
+            and self.orientations == other.orientations
+        )
+
+    # ── Consultas ──────────────────────────────────────────────────────────────
+    def sizes(self) -> List[Tamanho]:
+        """Tamanhos distintos, do menor para o maior em área."""
+        return list(self._sizes)
+
+    def has_size(self, width: int, height: int) -> bool:
+        return (width, height) in self._index
+
+    def by_size(self, width: int, height: int) -> List[DisplayMode]:
+        start, end = self._index.get((width, height), (0, 0))
+        return [self[i] for i in range(start, end)]
+
+    def best_refresh(self, width: int, height: int) -> Optional[DisplayMode]:
+        modes = self.by_size(width, height)
+        if not modes:
+            return None
+        return max(modes, key=lambda m: (m.frequency, m.bpp))
+
+    def nearest(self, width: int, height: int) -> Optional[DisplayMode]:
+        """Modo suportado mais próximo: soma das diferenças relativas de área e proporção.
+
+        None para catálogo vazio ou tamanho pedido sem largura/altura positivas.
+        """
+        if not self._sizes or width <= 0 or height <= 0:
+            return None
+        if (width, height) in self._index:
+            return self.best_refresh(width, height)
+        target_area = width * height
+        target_ratio = width / height
+
+        def distance(size: Tamanho) -> float:
+            w, h = size
+            if not w or not h:
+                return math.inf  # modo degenerado vindo do driver: nunca é o mais próximo
+            return abs(w * h - target_area) / target_area + abs(w / h - target_ratio) / target_ratio
+
+        w, h = min(self._sizes, key=distance)
+        return self.best_refresh(w, h) if w and h else None
+
+    def group_by_aspect(self, sizes: Optional[Sequence[Tamanho]] = None) -> Dict[str, List[Tamanho]]:
+        """Agrupa tamanhos pelas secções de SECOES_ASPECTO (mais "Outras")."""
+        sizes = list(self._sizes if sizes is None else sizes)
+        grouped: Dict[str, List[Tamanho]] = {name: [] for name, _ in SECOES_ASPECTO}
+        grouped[SECAO_OUTRAS] = []
+        for size, label in zip(sizes, classify_aspect(sizes)):
+            grouped[label].append(size)
+        return grouped
@@ -0,0 +1,92 @@
+"""Modelo da lista de resoluções: filtro por escrita com índice de prefixos e janela visível.
+
+A Listbox da GUI só materializa as linhas da janela atual; este módulo não depende de
+tkinter e decide que linhas existem, que texto têm e quais passam no filtro.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Container, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from mode_catalog import ModeCatalog, classify_aspect
+
+Tamanho = Tuple[int, int]
+MARCA_ATUAL = "  ← atual"
+MARCA_RECUSADA = "  ⚠ recusada pelo driver"
+MARCA_LENTA = "  ⏱ troca lenta ({})"
+
+
+def _tokens(size: Tamanho, aspect: str, freqs: Sequence[int]) -> List[str]:
+    w, h = size
+    tokens = [str(w), str(h), f"{w}x{h}", f"{w}×{h}", aspect.lower()]
+    tokens.extend(f"{f}hz" for f in freqs if f)
+    return tokens
+
+
+class ModeListModel:
+    """Linhas (tamanhos) com um índice {prefixo: linhas} construído uma única vez."""
+
+    def __init__(self, sizes: Sequence[Tamanho], catalog: Optional[ModeCatalog] = None):
+        self.sizes: List[Tamanho] = list(sizes)
+        self.row_of: Dict[Tamanho, int] = {size: i for i, size in enumerate(self.sizes)}
+        self._index: Dict[str, Set[int]] = {}
+        for row, (size, aspect) in enumerate(zip(self.sizes, classify_aspect(self.sizes))):
+            freqs = sorted({m.frequency for m in catalog.by_size(*size)}) if catalog is not None else []
+            for token in _tokens(size, aspect, freqs):
+                for n in range(1, len(token) + 1):
+                    self._index.setdefault(token[:n], set()).add(row)
+        self.visible: List[int] = list(range(len(self.sizes)))
+        self.query = ""
+
+    def __len__(self) -> int:
+        return len(self.visible)
+
+    def set_filter(self, query: str) -> List[int]:
+        """Filtra por todos os termos (prefixos; "1920 16:9", "1280x", "75hz")."""
+        self.query = query
+        terms = query.lower().replace(" x ", "x").split()
+        if not terms:
+            self.visible = list(range(len(self.sizes)))
+            return self.visible
+        rows: Optional[Set[int]] = None
+        for term in terms:
+            hits = self._index.get(term, set())
+            rows = set(hits) if rows is None else rows & hits
+            if not rows:
+                break
+        self.visible = sorted(rows or ())
+        return self.visible
+
+    def text(
+        self,
+        row: int,
+        current: Optional[Tamanho],
+        refused: Container[Tamanho] = (),
+        slow: Optional[Mapping[Tamanho, str]] = None,
+    ) -> str:
+        """`slow`: tamanhos com troca lenta no último varrimento (mode_sweep) e a duração em texto."""
+        w, h = self.sizes[row]
+        if (w, h) == current:
+            tag = MARCA_ATUAL
+        elif (w, h) in refused:
+            tag = MARCA_RECUSADA
+        elif slow and (w, h) in slow:
+            tag = MARCA_LENTA.format(slow[w, h])
+        else:
+            tag = ""
+        return f"  {w} × {h}{tag}"
+
+    def position(self, row: int) -> Optional[int]:
+        """Posição de uma linha do modelo dentro da lista filtrada (None se escondida)."""
+        # `visible` está sempre ordenada: pesquisa binária.
+        pos = bisect_left(self.visible, row)
+        if pos < len(self.visible) and self.visible[pos] == row:
+            return pos
+        return None
+
+    def window(self, first: int, count: int) -> List[int]:
+        return self.visible[first:first + count]
+
+    def clamp_first(self, first: int, count: int) -> int:
+        return max(0, min(first, len(self.visible) - count))
@@ -0,0 +1,106 @@
+"""Teste de modos (CDS_TEST) em paralelo, com memória por sessão."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+Modo = Tuple[int, ...]  # (w, h) ou (w, h, frequência, bpp)
+ResultCallback = Callable[[Modo, Optional[bool]], None]
+
+
+class ValidityCache:
+    """Memoriza o resultado de `probe(*modo)` e corre os testes pendentes num pool.
+
+    Cada modo é testado no máximo uma vez por sessão; pedidos repetidos enquanto o
+    teste está em curso só acrescentam o callback. Os callbacks correm na thread do
+    pool: quem mexe em widgets tem de os reencaminhar para a thread do Tk.
+
+    Só respostas do driver ficam memorizadas. Um teste que falha com exceção (p. ex.
+    driver_worker.DriverTimeout) entrega None aos callbacks, fica em `failed()` e volta
+    a correr no próximo pedido; check() deixa a exceção seguir para quem chamou.
+    """
+
+    def __init__(self, probe: Callable[..., bool], max_workers: int = 4):
+        self._probe = probe
+        self._results: Dict[Modo, bool] = {}
+        self._failed: Set[Modo] = set()
+        # Por (geração, modo): um pedido depois de invalidate() não espera por um teste antigo.
+        self._pending: Dict[Tuple[int, Modo], List[ResultCallback]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cds-test")
+
+    def get(self, mode: Modo) -> Optional[bool]:
+        with self._lock:
+            return self._results.get(mode)
+
+    def failed(self, mode: Modo) -> bool:
+        """O último teste deste modo não obteve resposta do driver."""
+        with self._lock:
+            return mode in self._failed
+
+    def _store(self, mode: Modo, ok: Optional[bool], generation: int) -> None:
+        # Com o lock. Resultado de antes de invalidate(): entrega-se mas não fica memorizado.
+        if generation != self._generation:
+            return
+        if ok is None:
+            self._failed.add(mode)
+        else:
+            self._results[mode] = ok
+            self._failed.discard(mode)
+
+    def request(self, modes: Iterable[Modo], on_result: ResultCallback) -> None:
+        """Agenda os modos ainda desconhecidos; os já conhecidos respondem de imediato."""
+        known: List[Tuple[Modo, bool]] = []
+        with self._lock:
+            for mode in modes:
+                key = (self._generation, mode)
+                if mode in self._results:
+                    known.append((mode, self._results[mode]))
+                elif key in self._pending:
+                    self._pending[key].append(on_result)
+                else:
+                    self._pending[key] = [on_result]
+                    self._executor.submit(self._probe_async, mode, self._generation)
+        for mode, ok in known:
+            on_result(mode, ok)
+
+    def _probe_async(self, mode: Modo, generation: int) -> None:
+        ok: Optional[bool]
+        try:
+            ok = bool(self._probe(*mode))
+        except Exception:
+            ok = None
+        with self._lock:
+            self._store(mode, ok, generation)
+            callbacks = self._pending.pop((generation, mode), [])
+        for cb in callbacks:
+            cb(mode, ok)
+
+    def check(self, mode: Modo) -> bool:
+        """Resposta síncrona (usa a memória quando existe); exceções do teste seguem."""
+        with self._lock:
+            cached = self._results.get(mode)
+            generation = self._generation
+        if cached is not None:
+            return cached
+        try:
+            ok = bool(self._probe(*mode))
+        except Exception:
+            with self._lock:
+                self._store(mode, None, generation)
+            raise
+        with self._lock:
+            self._store(mode, ok, generation)
+        return ok
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
+            self._failed.clear()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,236 @@
+"""Varrimento de trocas de modo: quanto custa mudar para cada modo neste cliente.
+
+Aplica cada modo, um de cada vez, e mede desde o início da troca:
+  - retorno: até ChangeDisplaySettingsExW regressar (a chamada síncrona ao driver);
+  - estável: até o modo em uso coincidir com o pedido — lido logo a seguir a um
+    WM_DISPLAYCHANGE ("evento") ou por leituras periódicas ("leitura").
+A topologia original é reposta no fim, mesmo com Ctrl+C a meio. O relatório sai em
+JSON ou CSV e o último de cada monitor fica no cache local, para a GUI assinalar as
+trocas lentas. Há drivers que levam 4–6 s por troca e outros 300 ms.
+
+    RemoteResolution.exe --sweep --report latencias.csv
+    RemoteResolution.exe --sweep 1920x1080,1280x720@60,1024x768@60/16
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from mode_cache import Identidade, JsonStore
+from mode_catalog import DisplayMode, ModeCatalog, mode_matches
+
+FORMATO_VERSAO = 1  # dos relatórios e do ficheiro (ver mode_cache.JsonStore)
+NOME_FICHEIRO = "latencias.json"
+_MAX_MONITORES = 8
+
+PRAZO_ESTAVEL = 10.0  # s desde o início da troca; depois disso conta como falhada
+INTERVALO_LEITURA = 0.02  # s entre leituras do modo em uso
+LENTO_MS = 2000.0  # a GUI assinala trocas mais demoradas do que isto
+
+VIA_EVENTO = "evento"
+VIA_LEITURA = "leitura"
+VIA_PRAZO = "prazo"  # o driver aceitou, mas o modo não mudou dentro do prazo
+
+CAMPOS_CSV = ("width", "height", "frequency", "bpp", "ok", "return_ms", "stable_ms", "via", "error")
+
+Modo = Tuple[int, ...]  # (w, h) ou (w, h, frequência, bpp), como no ValidityCache
+Tamanho = Tuple[int, int]
+
+
+class Sample(NamedTuple):
+    width: int
+    height: int
+    frequency: int  # 0 = escolha do driver
+    bpp: int
+    ok: bool
+    error: str
+    return_ms: float
+    stable_ms: Optional[float]  # None: recusada ou não estabilizou no prazo
+    via: str  # VIA_EVENTO, VIA_LEITURA, VIA_PRAZO ou "" (recusada)
+
+    @property
+    def mode(self) -> Modo:
+        if not (self.frequency or self.bpp):
+            return self.width, self.height
+        return self.width, self.height, self.frequency, self.bpp
+
+    @property
+    def cost_ms(self) -> float:
+        """Tempo até o ecrã ficar utilizável: infinito se não estabilizou, o retorno se recusada."""
+        if self.via == VIA_PRAZO:
+            return math.inf
+        return self.stable_ms if self.stable_ms is not None else self.return_ms
+
+
+def targets(catalog: ModeCatalog, which: str = "sizes") -> List[Modo]:
+    """Modos a varrer: um por tamanho ("sizes", o driver escolhe Hz/bpp) ou todos ("all")."""
+    if which != "all":
+        return list(catalog.sizes())
+    modes = ((m.width, m.height, m.frequency if m.frequency > 1 else 0, m.bpp) for m in catalog)
+    return list(dict.fromkeys(modes))  # sem repetir modos que só diferem na orientação
+
+
+def parse_modes(text: str) -> List[Modo]:
+    """"1920x1080,1280x720@60,1024x768@60/16" → [(1920, 1080), (1280, 720, 60, 0), ...]."""
+    modes: List[Modo] = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        size, _, extra = item.lower().replace("×", "x").partition("@")
+        w, h = size.split("x")
+        if not extra:
+            modes.append((int(w), int(h)))
+            continue
+        frequency, _, bpp = extra.partition("/")
+        modes.append((int(w), int(h), int(frequency.rstrip("hz") or 0), int(bpp or 0)))
+    return modes
+
+
+def _order(modes: Sequence[Modo], original: Optional[DisplayMode]) -> List[Modo]:
+    # O modo original no fim: no início seria uma "troca" para o próprio modo, sem custo.
+    if original is None:
+        return list(modes)
+    same = [m for m in modes if m[:2] == original.size]
+    return [m for m in modes if m[:2] != original.size] + same
+
+
+def _measure(
+    display: Any, mode: Modo, device: Optional[str], changed: Optional[threading.Event], timeout: float, poll: float
+) -> Sample:
+    w, h = mode[:2]
+    frequency, bpp = (mode[2], mode[3]) if len(mode) == 4 else (0, 0)
+    if changed is not None:
+        changed.clear()
+    start = time.perf_counter()
+    ok, erro = display.switch_mode(w, h, device, frequency, bpp)
+    return_ms = (time.perf_counter() - start) * 1000
+    if not ok:
+        return Sample(w, h, frequency, bpp, False, erro, return_ms, None, "")
+    deadline = start + timeout
+    while True:
+        notified = changed is not None and changed.is_set()
+        if mode_matches(display.get_current_mode(device), w, h, frequency, bpp):
+            stable_ms = (time.perf_counter() - start) * 1000
+            return Sample(w, h, frequency, bpp, True, "", return_ms, stable_ms, VIA_EVENTO if notified else VIA_LEITURA)
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            erro = f"O modo em uso não passou a {w}×{h} em {timeout:g} s."
+            return Sample(w, h, frequency, bpp, False, erro, return_ms, None, VIA_PRAZO)
+        if notified:
+            changed.clear()  # aviso de uma mudança intermédia: espera pelo seguinte
+        if changed is not None:
+            changed.wait(min(poll, remaining))
+        else:
+            time.sleep(min(poll, remaining))
+
+
+def sweep(
+    display: Any,
+    modes: Sequence[Modo],
+    device: Optional[str] = None,
+    changed: Optional[threading.Event] = None,
+    timeout: float = PRAZO_ESTAVEL,
+    poll: float = INTERVALO_LEITURA,
+    progress: Optional[Callable[[int, int, Sample], None]] = None,
+) -> dict:
+    """Troca para cada modo de `modes`, mede-o e devolve o relatório.
+
+    `display` é win_display (switch_mode, get_current_mode, capture_topology,
+    restore_topology, get_display_identity). `changed` é marcado por quem recebe
+    WM_DISPLAYCHANGE; sem ele, a estabilidade só se vê por leitura. Ctrl+C termina o
+    varrimento com um relatório parcial ("interrupted").
+    """
+    topology = display.capture_topology()
+    original = display.get_current_mode(device)
+    identity = display.get_display_identity(device)
+    order = _order(modes, original)
+    samples: List[Sample] = []
+    report: Dict[str, Any] = {
+        "v": FORMATO_VERSAO,
+        "created": time.time(),
+        "device": device,
+        "identity": list(identity) if identity else None,
+        "original": list(original) if original else None,
+        "interrupted": False,
+    }
+    try:
+        for i, mode in enumerate(order, 1):
+            sample = _measure(display, mode, device, changed, timeout, poll)
+            samples.append(sample)
+            if progress is not None:
+                progress(i, len(order), sample)
+    except KeyboardInterrupt:
+        report["interrupted"] = True
+    finally:
+        if topology:
+            ok, erro = display.restore_topology(topology)
+        elif original is not None:
+            ok, erro = display.switch_mode(original.width, original.height, device, original.frequency, original.bpp)
+        else:
+            ok, erro = False, "Modo original desconhecido."
+        report["restored"] = {"ok": ok, "error": erro}
+        report["samples"] = [_round(s)._asdict() for s in samples]
+    return report
+
+
+def _round(sample: Sample) -> Sample:
+    stable = round(sample.stable_ms, 1) if sample.stable_ms is not None else None
+    return sample._replace(return_ms=round(sample.return_ms, 1), stable_ms=stable)
+
+
+def samples_of(report: dict) -> List[Sample]:
+    return [Sample(**item) for item in report.get("samples", [])]
+
+
+def slow_sizes(samples: Sequence[Sample], limit_ms: float = LENTO_MS) -> Dict[Tamanho, float]:
+    """Tamanhos cuja troca mais rápida medida demora pelo menos `limit_ms` (ms; inf = nunca estabilizou)."""
+    best: Dict[Tamanho, float] = {}
+    for s in samples:
+        size = (s.width, s.height)
+        best[size] = min(best.get(size, s.cost_ms), s.cost_ms)
+    return {size: ms for size, ms in best.items() if ms >= limit_ms}
+
+
+# ── Relatório em ficheiro ──────────────────────────────────────────────────────
+def write_report(report: dict, path: str) -> None:
+    """JSON, ou CSV (uma linha por modo) se o nome acabar em .csv."""
+    if not path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        return
+    import csv
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CAMPOS_CSV)
+        writer.writeheader()
+        for item in report.get("samples", []):
+            writer.writerow({k: item[k] for k in CAMPOS_CSV})
+
+
+def cost_text(ms: float) -> str:
+    return "não estabilizou" if math.isinf(ms) else f"{ms / 1000:.1f} s"
+
+
+class LatencyStore:
+    """Último relatório de cada monitor (válido enquanto a versão do driver não mudar)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._store = JsonStore(NOME_FICHEIRO, FORMATO_VERSAO, _MAX_MONITORES, path)
+        self.path = self._store.path
+
+    def save(self, report: dict) -> None:
+        identity = report.get("identity")
+        if not identity or not report.get("samples"):
+            return
+        self._store.put_monitor(tuple(identity), {"report": report})
+
+    def load(self, identity: Optional[Identidade]) -> List[Sample]:
+        entry = self._store.get_monitor(identity)
+        if entry is None:
+            return []
+        try:
+            return samples_of(entry["report"])
+        except (KeyError, TypeError):
+            return []
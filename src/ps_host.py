@@ -0,0 +1,166 @@
+"""Sessão PowerShell persistente: um único processo aquecido para vários comandos.
+
+Protocolo (uma linha por pedido, UTF-8):
+    pedido:   "<id> <comando em base64>\\n"
+    resposta: saída do comando, seguida da linha "<<RR-FIM:<id>:<rc>>>"
+"""
+
+from __future__ import annotations
+
+import base64
+import itertools
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+_FIM = "<<RR-FIM:"
+
+# Ciclo lido do stdin: descodifica, executa e termina cada resposta com o marcador.
+_BOOTSTRAP = (
+    "$ErrorActionPreference='Stop';"
+    "[Console]::OutputEncoding=New-Object Text.UTF8Encoding $false;"
+    "while(($l=[Console]::In.ReadLine()) -ne $null){"
+    "$p=$l.Split(' ',2);$rc=0;"
+    "try{$o=Invoke-Expression ([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($p[1])))"
+    "|Out-String -Width 8192}catch{$o=$_|Out-String;$rc=1};"
+    "[Console]::Out.Write($o);[Console]::Out.WriteLine('');"
+    "[Console]::Out.WriteLine('" + _FIM + "'+$p[0]+':'+$rc+'>>');[Console]::Out.Flush()}"
+)
+
+POWERSHELL_ARGV = ["powershell", "-NoProfile", "-NonInteractive", "-Command", _BOOTSTRAP]
+
+
+class HostError(Exception):
+    """O comando não terminou: tempo esgotado ou processo caiu a meio."""
+
+
+class HostStartError(HostError):
+    """Não foi possível lançar o processo (PowerShell ausente, política...)."""
+
+
+class PowerShellHost:
+    """Processo filho de longa duração, iniciado no primeiro pedido e reiniciado se cair."""
+
+    def __init__(self, argv: Optional[Sequence[str]] = None):
+        self.argv = list(argv or POWERSHELL_ARGV)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.Queue] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # um comando de cada vez (run() fica com ele até à resposta)
+        self._closed = False
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _start(self) -> None:
+        kw: dict[str, Any] = {
+            "args": self.argv,
+            "stdin": subprocess.PIPE,
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.DEVNULL,
+            "text": True,
+            "encoding": "utf-8",
+            "errors": "replace",
+            "bufsize": 1,
+        }
+        if sys.platform == "win32":
+            kw["creationflags"] = subprocess.CREATE_NO_WINDOW
+        try:
+            proc = subprocess.Popen(**kw)
+        except OSError as exc:
+            raise HostStartError(str(exc)) from exc
+        lines: queue.Queue = queue.Queue()
+        # Fila própria por processo: linhas de um filho morto nunca chegam ao seguinte.
+        threading.Thread(target=self._pump, args=(proc, lines), daemon=True).start()
+        self._proc, self._lines = proc, lines
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: queue.Queue) -> None:
+        try:
+            for line in proc.stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+
+    def _kill(self) -> None:
+        proc, self._proc, self._lines = self._proc, None, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def run(self, command: str, timeout: float = 15) -> tuple[int, str]:
+        """Executa `command` e devolve (rc, saída). Levanta HostError em falha/tempo."""
+        with self._lock:
+            if self._closed:
+                raise HostError("sessão PowerShell encerrada")
+            if not self.alive:
+                self._kill()
+                self._start()
+                if self._closed:  # close() chegou durante o arranque
+                    self._kill()
+                    raise HostError("sessão PowerShell encerrada")
+            assert self._proc is not None and self._lines is not None
+            cmd_id = next(self._ids)
+            payload = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            try:
+                self._proc.stdin.write(f"{cmd_id} {payload}\n")
+                self._proc.stdin.flush()
+            except (OSError, ValueError) as exc:
+                self._kill()
+                raise HostError("processo terminou antes do pedido") from exc
+
+            marker = f"{_FIM}{cmd_id}:"
+            deadline = time.monotonic() + timeout
+            out: list[str] = []
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    line = self._lines.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    # Comando pendurado: o processo deixa de ser reutilizável.
+                    self._kill()
+                    raise HostError(f"tempo esgotado ({timeout:g} s)") from None
+                if line is None:
+                    self._kill()
+                    raise HostError("processo terminou a meio do comando")
+                if line.startswith(marker):
+                    rc_text = line[len(marker):].strip().rstrip(">")
+                    try:
+                        rc = int(rc_text)
+                    except ValueError:
+                        rc = 1
+                    return rc, "".join(out).lstrip("\ufeff")
+                out.append(line)
+
+    def close(self) -> None:
+        """Termina a sessão sem esperar por um comando em curso (chamado no fecho da GUI)."""
+        self._closed = True
+        if not self._lock.acquire(blocking=False):
+            # Comando em curso: mata o processo; run() vê o pipe fechar e levanta HostError.
+            proc = self._proc
+            if proc is not None:
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+            return
+        try:
+            proc = self._proc
+            if proc is not None and proc.poll() is None:
+                try:
+                    proc.stdin.close()
+                    proc.wait(timeout=2)
+                except (OSError, ValueError, subprocess.TimeoutExpired):
+                    pass
+            self._kill()
+        finally:
+            self._lock.release()
@@ -4,16 +4,62 @@
 # ──────────────────────────────────────────────────────────────────────────────
 
 import sys
+
+import tracing
+
+if __name__ == "__main__":
+    # --trace tem de ser lido antes de importar win_display/driver_info (instrumentados à importação).
+    tracing.enable_from_argv(sys.argv)
+
+# Processo auxiliar do driver (driver_worker): só serve chamadas a win_display pelo stdin.
+if __name__ == "__main__" and sys.argv[1:2] == ["--driver-worker"]:
+    import driver_worker
+
+    sys.exit(driver_worker.serve())
+
+# Modo linha de comando (--list/--set/--restore): sai antes de importar tkinter,
+# driver_info e o resto da GUI.
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import cli
+
+    sys.exit(cli.main(sys.argv[1:]))
+
+import os
+import queue
+import threading
+import time
 import tkinter as tk
+from concurrent.futures import Future, InvalidStateError
 from tkinter import messagebox
 
+import apply_queue
+import bad_modes
+import bandwidth
+import control_server
+import display_events
 import driver_info
-from win_display import (
-    change_resolution,
-    get_current_resolution,
-    get_supported_resolutions,
-    test_resolution,
-)
+import driver_worker  # antes de win_display: a gravação de user32 passa para o filho
+import mode_cache
+import mode_catalog
+import mode_list
+import mode_probe
+import mode_sweep
+import win_display
+from win_display import enable_dpi_awareness, error_code
+
+# No Windows, as chamadas ao driver correm num processo auxiliar com prazo: um driver
+# pendurado custa um erro na barra de estado, não a janela. driver_info fica neste
+# processo (só lê o registo/WMI, em segundo plano). A App chama sempre pela fachada
+# `_display`: win_display (chamadas diretas) ou as mesmas funções pelo processo auxiliar.
+_driver = None
+_display = win_display
+if driver_worker.wanted():
+    try:
+        _driver = driver_worker.DriverClient()
+    except driver_worker.WorkerError:
+        pass  # sem processo auxiliar: chamadas diretas, como antes
+    else:
+        _display = driver_worker.DriverFunctions(_driver)
 
 # ── Edite com as resoluções DO SEU MONITOR ─────────────────────────────────────
 MINHAS_RESOLUCOES = [
@@ -68,16 +114,140 @@ PERFIS_RESOLUCAO = {
     ],
 }
 
-SECOES_RESOLUCAO = [
-    ("16:9", {(1280, 720), (1360, 768), (1366, 768), (1600, 900), (1920, 1080), (2048, 1152), (2560, 1440), (3840, 2160)}),
-    ("16:10", {(1280, 800), (1440, 900), (1680, 1050), (1920, 1200), (2560, 1600)}),
-    ("4:3 / 5:4", {(1024, 768), (1152, 864), (1280, 1024), (1400, 1050), (1600, 1200)}),
-    ("Ultrawide", {(2560, 1080), (3440, 1440)}),
-]
+ERRO_NAO_SUPORTADA = "Resolução não suportada pelo driver de vídeo."
+
+# Frequência e profundidade de cor pedidas ao aplicar um tamanho (menu por cima da lista).
+PRESET_DRIVER = "Escolha do driver"
+PRESET_BAIXO_DEBITO = "Baixo débito (menor Hz/bpp)"
+
+# Porta do servidor de controlo local (JSON-RPC); vazio = desligado.
+ENV_CONTROL_PORT = "RR_CONTROL_PORT"
+# Endereço de escuta (omissão 127.0.0.1); fora do loopback exige RR_CONTROL_TOKEN.
+ENV_CONTROL_BIND = "RR_CONTROL_BIND"
+# Área útil do ecrã do analista ("1600x900"), para a recomendação por largura de banda.
+ENV_VIEWPORT = "RR_VIEWPORT"
+
+def mode_key(w, h, frequency=0, bpp=0):
+    """Chave do ValidityCache: só o tamanho quando o driver escolhe frequência e bpp."""
+    return (w, h) if not (frequency or bpp) else (w, h, frequency, bpp)
+
+
+def mode_text(w, h, frequency=0, bpp=0):
+    text = f"{w} × {h}"
+    if frequency:
+        text += f" @ {frequency} Hz"
+    if bpp:
+        text += f", {bpp} bpp"
+    return text
+
 
 AUTOR = "Thomaz Arthur"
 VERSAO = "1.1.2"
 
+# ── Controlo remoto (JSON-RPC) ─────────────────────────────────────────────────
+def _settle(future, result=None, error=None):
+    """Resolve `future`, salvo se close() já o tiver falhado."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class AppControlBackend:
+    """Backend do servidor de controlo: cada pedido corre na thread do Tk, pela fila da App."""
+
+    TIMEOUT = 120
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pending = set()  # Futures à espera da thread do Tk
+        self._closed = False
+
+    def close(self):
+        """Falha os pedidos à espera: depois de destroy() a fila da App já não é processada."""
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, set()
+        for future in pending:
+            _settle(future, error=RuntimeError("aplicação a fechar"))
+
+    def _wait(self, run):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("aplicação a fechar")
+            self._pending.add(future)
+        self.app._ui_queue.put((lambda _: run(future), None))
+        try:
+            return future.result(timeout=self.TIMEOUT)
+        finally:
+            with self._lock:
+                self._pending.discard(future)
+
+    def _on_ui(self, fn, *args):
+        def run(future):
+            try:
+                _settle(future, fn(*args))
+            except Exception as exc:
+                _settle(future, error=exc)
+
+        return self._wait(run)
+
+    def _queued(self, fn, *args):
+        # apply/restore passam pela fila de trocas: espera pelo resultado final.
+        def run(future):
+            try:
+                fn(*args, on_done=lambda result: _settle(future, result))
+            except Exception as exc:
+                _settle(future, error=exc)
+
+        return self._wait(run)
+
+    def list_modes(self):
+        return self._on_ui(lambda: [m._asdict() for m in self.app.catalog])
+
+    def test(self, width, height, frequency=0, bpp=0):
+        return self._on_ui(lambda: self.app._validity).check(mode_key(width, height, frequency, bpp))
+
+    def apply(self, width, height, frequency=0, bpp=0):
+        # Sem frequency/bpp o driver escolhe: o preset do menu só vale para cliques na janela.
+        return self._queued(lambda on_done: self.app.apply_res(width, height, on_done, frequency, bpp))
+
+    def preset_mode(self, preset, width, height):
+        return self._on_ui(lambda: bandwidth.preset_mode(self.app.catalog, preset, width, height))
+
+    def restore(self):
+        return self._queued(self.app.restore)
+
+    def advise(self, viewport, limit):
+        def report():
+            app = self.app
+            cap = viewport or app._viewport() or app.original_res
+            return bandwidth.report(app.catalog, viewport, cap, limit, app._accepts_size)
+
+        return self._on_ui(report)
+
+    def status(self):
+        def snapshot():
+            app = self.app
+            mode = app._display.get_current_mode(app.device)
+            return {
+                "current": list(app.current_res),
+                "mode": mode._asdict() if mode else None,
+                "original": list(app.original_res),
+                "device": app.device,
+                # None = monitor principal (null em JSON).
+                "changed": sorted(app._changed_devices, key=lambda d: d or ""),
+                "startup": dict(app.startup_times),
+            }
+
+        return self._on_ui(snapshot)
+
+
 # ── GUI ────────────────────────────────────────────────────────────────────────
 class App(tk.Tk):
     BG = "#0d1117"
@@ -90,9 +260,20 @@ class App(tk.Tk):
     SUBTEXT = "#8b949e"
     YELLOW = "#d29922"
     WIN_WIDTH = 760
-    WIN_HEIGHT = 760
+    WIN_HEIGHT = 790
+    LIST_ROWS = 8
+    # Ao fechar, espera no máximo isto por uma troca de modo já em curso.
+    APPLY_CLOSE_TIMEOUT = 15
+    # WM_DISPLAYCHANGE chega em rajadas (uma por monitor): agrupa-as antes de reler.
+    DISPLAY_EVENT_DELAY_MS = 250
 
     def __init__(self):
+        # Arranque por fases: o esqueleto pinta logo; catálogo, testes CDS_TEST e driver
+        # chegam de threads de fundo. startup_times guarda os marcos (ms desde o início).
+        self._t0 = time.perf_counter()
+        self.startup_times = {}
+        self._startup_pending = {"catalogo", "atalhos"}
+        self._display = _display  # win_display ou o processo auxiliar, com as mesmas funções
         super().__init__()
         self.title("REMOTE SOLUTION")
         self.resizable(False, False)
@@ -109,15 +290,301 @@ class App(tk.Tk):
         self.overrideredirect(True)
         self.bind("<Map>", self._on_map_reborderless, add="+")
 
-        self.original_res = get_current_resolution()
+        # Resultados de threads de fundo: só a thread do Tk mexe em widgets.
+        self._ui_queue = queue.Queue()
+        self.after(50, self._drain_ui_queue)
+        # Trocas de modo num único worker; cliques repetidos substituem o pendente.
+        self._apply_queue = apply_queue.ApplyQueue(lambda cb, result: self._ui_queue.put((cb, result)))
+
+        # Topologia completa (todos os monitores) capturada ao abrir: é o que "Restaurar" repõe.
+        # Driver sem resposta: a janela abre na mesma, só com o principal e o tamanho dado pelo Tk.
+        self._startup_error = None
+        self.original_topology = self._read_at_startup(self._display.capture_topology, [])
+        self.monitors = self._read_at_startup(self._display.list_monitors, [])
+        self.device = None  # None = monitor principal
+        self._changed_devices = set()
+        self.original_res = self.original_res_primary = self._read_at_startup(
+            self._display.get_current_resolution, (self.winfo_screenwidth(), self.winfo_screenheight())
+        )
+        # Modo completo (frequência e bpp incluídos) do principal: restauro sem topologia.
+        self.original_mode_primary = self._read_at_startup(self._display.get_current_mode, None)
         self.current_res = self.original_res
-        self.supported = get_supported_resolutions()
-        self.supported_set = {(w, h) for w, h in self.supported}
+        self._mode_cache = mode_cache.ModeCache()
+        self._catalog_keys = {}  # identidade (adaptador, driver, monitor) do catálogo em uso
+        self._identities = {}
+        # Modos recusados em trocas reais de sessões anteriores (monitor atual): sem CDS_TEST.
+        self._bad_modes = bad_modes.BadModeStore()
+        self._known_bad = {}
+        # Último varrimento de latências (--sweep) deste monitor: tamanho → duração em texto.
+        self._latencies = mode_sweep.LatencyStore()
+        self._slow_sizes = {}
+        self._catalog_loading = set()  # monitores cujo catálogo ainda está a ser enumerado
+        # Índice de modos completos; `supported` são os tamanhos distintos, por área.
+        self.catalog = self._load_catalog(self.device)
+        self.supported = self.catalog.sizes()
         self.perfil_var = tk.StringVar(value="Padrão (recomendado)")
+        # CDS_TEST memorizado na sessão (por monitor): atalhos e lista partilham os resultados.
+        self._validity_by_device = {}
+        self._validity = self._validity_for(self.device)
+        self._quick_buttons = {}
+        self._quick_frames = {}
+        self._quick_shown = None
+        self._recommended = None
+        # PowerShell só arranca se o caminho nativo falhar: a primeira consulta corre CIM
+        # e WMI em paralelo a frio, as seguintes (Atualizar) usam a sessão já aquecida.
+        driver_info.enable_persistent_host()
+        driver_info.prefetch()
+        self._driver_dialog = None
 
         self._build()
         self._center()
-        self._check_driver_warning()
+        if self.device not in self._catalog_loading:
+            self._startup_done("catalogo")
+            self._check_driver_warning()
+        self.after_idle(self._on_first_paint)
+        self._control = self._control_backend = None
+        self._start_control_server()
+        # Mudanças feitas por terceiros (AnyDesk, Windows, o próprio utilizador) chegam por aqui.
+        self._display_refresh_pending = False
+        self._display_events = display_events.DisplayChangeListener(
+            lambda motivo: self._ui_queue.put((self._on_display_event, motivo))
+        )
+        self._display_events.start()
+        if tracing.enabled:
+            self._status(f"⏺  Registo de desempenho ativo: {tracing.path}", warn=True)
+        if self._startup_error is not None:
+            self._status(f"✘  Driver sem resposta ao abrir (resolução original incompleta): {self._startup_error}", warn=True)
+
+    def _read_at_startup(self, read, fallback):
+        """Leitura do driver no arranque; depois da primeira falha as restantes não esperam pelo prazo."""
+        if self._startup_error is not None:
+            return fallback
+        try:
+            return read()
+        except driver_worker.WorkerError as exc:
+            self._startup_error = exc
+            return fallback
+
+    def _start_control_server(self):
+        port = os.environ.get(ENV_CONTROL_PORT, "").strip()
+        if not port:
+            return
+        backend = AppControlBackend(self)
+        try:
+            server = control_server.ControlServer(
+                backend,
+                host=os.environ.get(ENV_CONTROL_BIND, "").strip() or "127.0.0.1",
+                port=int(port),
+                token=os.environ.get(control_server.ENV_CONTROL_TOKEN) or None,
+            )
+            server.start_in_thread()
+        except (OSError, ValueError) as exc:
+            self._status(f"⚠  Servidor de controlo indisponível: {exc}", warn=True)
+            return
+        self._control, self._control_backend = server, backend
+
+    def _run_in_background(self, fn, on_done, on_error=None):
+        """Corre `fn` numa thread; on_done(resultado) ou on_error(exceção) na thread do Tk."""
+
+        def worker():
+            try:
+                result = fn()
+            except Exception as exc:
+                self._ui_queue.put((on_error or self._report_background_error, exc))
+                return
+            self._ui_queue.put((on_done, result))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _report_background_error(self, exc):
+        self.report_callback_exception(type(exc), exc, exc.__traceback__)
+
+    def _process_ui_queue(self):
+        while True:
+            try:
+                callback, result = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(result)
+            except Exception:
+                # Um callback com erro não pode parar os resultados que vêm atrás dele.
+                self.report_callback_exception(*sys.exc_info())
+
+    def _drain_ui_queue(self):
+        try:
+            self._process_ui_queue()
+        finally:
+            self.after(50, self._drain_ui_queue)
+
+    def _display_identity(self, device):
+        try:
+            return self._display.get_display_identity(device)
+        except Exception:
+            return None
+
+    def _mode_cache_key(self, device):
+        identity = self._display_identity(device)
+        return mode_cache.make_key(*identity) if identity else None
+
+    def _load_catalog(self, device):
+        """Catálogo em cache (ou vazio) de imediato; a enumeração corre sempre em segundo plano."""
+        identity = self._identities[device] = self._display_identity(device)
+        key = self._catalog_keys[device] = mode_cache.make_key(*identity) if identity else None
+        # Mesma identidade: um driver novo deixa as recusas antigas para trás.
+        self._known_bad = self._bad_modes.load(identity)
+        slow = mode_sweep.slow_sizes(self._latencies.load(identity))
+        self._slow_sizes = {size: mode_sweep.cost_text(ms) for size, ms in slow.items()}
+        cached = self._mode_cache.load(key) if key is not None else None
+        if cached is None:
+            # Sem cache: a janela abre com a lista vazia e preenche-se quando a enumeração acabar.
+            self._catalog_loading.add(device)
+
+            def enumerate_fresh():
+                catalog = self._display.enumerate_modes(device)
+                if key is not None:
+                    self._mode_cache.save(key, catalog)
+                return device, (catalog, True)
+
+            self._run_in_background(
+                enumerate_fresh, self._on_modes_revalidated, lambda exc: self._on_modes_failed(device, exc)
+            )
+            return mode_catalog.ModeCatalog()
+        # Cache válido: arranque imediato e reenumeração fora do caminho crítico.
+        self._run_in_background(
+            lambda: (device, self._mode_cache.revalidate(key, lambda: self._display.enumerate_modes(device))),
+            self._on_modes_revalidated,
+            lambda exc: self._on_modes_failed(device, exc),
+        )
+        return cached
+
+    def _validity_for(self, device):
+        if device not in self._validity_by_device:
+            self._validity_by_device[device] = mode_probe.ValidityCache(
+                lambda w, h, frequency=0, bpp=0: self._display.test_resolution(w, h, device, frequency, bpp)
+            )
+        return self._validity_by_device[device]
+
+    def _on_modes_revalidated(self, result):
+        device, (catalog, changed) = result
+        first_load = device in self._catalog_loading
+        self._catalog_loading.discard(device)
+        if device in self._validity_by_device and changed and not first_load:
+            self._validity_by_device[device].invalidate()
+        if not changed or device != self.device:
+            return
+        self.catalog = catalog
+        self.supported = catalog.sizes()
+        self._refresh_catalog_views()
+        self._startup_done("catalogo")
+
+    def _on_modes_failed(self, device, exc):
+        """Enumeração falhada (driver_worker.DriverTimeout, por exemplo): sai do estado "a enumerar"."""
+        first_load = device in self._catalog_loading
+        self._catalog_loading.discard(device)
+        if device != self.device:
+            return
+        if first_load:
+            # Sem cache: fica o catálogo vazio, com os botões no estado correspondente.
+            self._refresh_catalog_views()
+            self._startup_done("catalogo")
+            self._status(f"✘  Não foi possível enumerar os modos: {exc}", warn=True)
+        else:
+            self._status(f"⚠  Não foi possível reenumerar os modos (lista em cache): {exc}", warn=True)
+
+    def _count_label(self):
+        if self.device in self._catalog_loading:
+            return "…", self.SUBTEXT
+        return str(len(self.supported)), self.RED if len(self.supported) <= 2 else self.GREEN
+
+    @tracing.traced("App._refresh_catalog_views", "tk")
+    def _refresh_catalog_views(self):
+        text, color = self._count_label()
+        self.lbl_count.config(text=text, fg=color)
+        self._fill_list()
+        self._render_quick_buttons()
+        self._update_recommendation()
+        if self.device not in self._catalog_loading:
+            self._check_driver_warning()
+
+    # ── Marcos do arranque ─────────────────────────────────────────────────────
+    def _elapsed_ms(self):
+        return round((time.perf_counter() - self._t0) * 1000, 1)
+
+    def _on_first_paint(self):
+        self.startup_times["first_paint_ms"] = self._elapsed_ms()
+
+    def _startup_done(self, stage):
+        """Interativo = catálogo carregado e atalhos do perfil visível já testados."""
+        if stage not in self._startup_pending:
+            return
+        self._startup_pending.discard(stage)
+        self.startup_times[f"{stage}_ms"] = self._elapsed_ms()
+        if not self._startup_pending:
+            self.startup_times["interactive_ms"] = self._elapsed_ms()
+            with tracing.span("arranque", "tk", **self.startup_times):
+                pass
+
+    def _original_res_of(self, device):
+        if device is None:
+            return self.original_res_primary
+        for state in self.original_topology:
+            if state.device == device:
+                return state.mode.size
+        return self._display.get_current_resolution(device)
+
+    def _select_monitor(self, label):
+        device = self._monitor_labels.get(label)
+        if device == self.device:
+            return
+        try:
+            original = self._original_res_of(device)
+            current = self._display.get_current_resolution(device)
+        except driver_worker.WorkerError as exc:
+            # Fica no monitor anterior, com o menu de acordo.
+            previous = next(text for text, dev in self._monitor_labels.items() if dev == self.device)
+            self.monitor_var.set(previous)
+            self._status(f"✘  Não foi possível ler {label}: {exc}", warn=True)
+            return
+        self.device = device
+        self.original_res = original
+        self.current_res = current
+        self.catalog = self._load_catalog(device)
+        self.supported = self.catalog.sizes()
+        self._validity = self._validity_for(device)
+        self.lbl_orig.config(text=f"{self.original_res[0]} × {self.original_res[1]}")
+        self.lbl_cur.config(text=f"{self.current_res[0]} × {self.current_res[1]}")
+        self._refresh_catalog_views()
+
+    def _on_display_event(self, _motivo):
+        if self._display_refresh_pending:
+            return
+        self._display_refresh_pending = True
+        self.after(self.DISPLAY_EVENT_DELAY_MS, self._refresh_display_state)
+
+    def _refresh_display_state(self):
+        # Leitura barata (modo atual + identidade); só se reenumera se o hardware mudou.
+        self._display_refresh_pending = False
+        device = self.device
+        self._run_in_background(
+            lambda: (device, self._display.get_current_resolution(device), self._mode_cache_key(device)),
+            self._on_display_state,
+        )
+
+    def _on_display_state(self, result):
+        device, current, key = result
+        if device != self.device:
+            return
+        if key != self._catalog_keys.get(device):
+            # Outro adaptador, driver ou monitor: catálogo e testes CDS_TEST deixam de valer.
+            self._validity_for(device).invalidate()
+            self.catalog = self._load_catalog(device)
+            self.supported = self.catalog.sizes()
+            self._refresh_catalog_views()
+        if current != self.current_res:
+            self._set_current(current)
+            if not self._apply_queue.busy:
+                self._status(f"ℹ  Resolução alterada fora da aplicação para {current[0]} × {current[1]}.", warn=True)
 
     def _check_driver_warning(self):
         if len(self.supported) == 0:
@@ -289,6 +756,7 @@ class App(tk.Tk):
             self._maximized = True
             self._btn_max.config(text="\u2750")
 
+    @tracing.traced("App._build", "tk")
     def _build(self):
         self._build_custom_titlebar()
 
@@ -342,15 +810,47 @@ class App(tk.Tk):
             pady=4,
             anchor="w",
         ).grid(row=2, column=0, sticky="w")
-        count_color = self.RED if len(self.supported) <= 2 else self.GREEN
-        tk.Label(
+        count_text, count_color = self._count_label()
+        self.lbl_count = tk.Label(
             info,
-            text=str(len(self.supported)),
+            text=count_text,
             bg=self.PANEL,
             fg=count_color,
             font=("Consolas", 10, "bold"),
             padx=6,
-        ).grid(row=2, column=1, sticky="w")
+        )
+        self.lbl_count.grid(row=2, column=1, sticky="w")
+        if len(self.monitors) > 1:
+            # Primeiro o principal; cada entrada mostra o dispositivo e o nome do monitor.
+            self._monitor_labels = {}
+            for name, desc, primary in sorted(self.monitors, key=lambda m: not m[2]):
+                short = name.rsplit("\\", 1)[-1]  # \\.\DISPLAY2 -> DISPLAY2
+                self._monitor_labels[f"{short} — {desc}"] = None if primary else name
+            tk.Label(
+                info,
+                text="Monitor:",
+                bg=self.PANEL,
+                fg=self.SUBTEXT,
+                font=("Consolas", 9),
+                padx=10,
+                pady=4,
+                anchor="w",
+            ).grid(row=3, column=0, sticky="w")
+            labels = list(self._monitor_labels)
+            self.monitor_var = tk.StringVar(value=labels[0])
+            monitor_menu = tk.OptionMenu(info, self.monitor_var, *labels, command=self._select_monitor)
+            monitor_menu.config(
+                bg=self.PANEL,
+                fg=self.TEXT,
+                activebackground=self.BORDER,
+                activeforeground=self.TEXT,
+                highlightthickness=0,
+                bd=0,
+                relief="flat",
+                font=("Segoe UI", 9),
+            )
+            monitor_menu["menu"].config(bg=self.PANEL, fg=self.TEXT, activebackground=self.BLUE, activeforeground="white")
+            monitor_menu.grid(row=3, column=1, sticky="w")
 
         tk.Label(
             self,
@@ -370,7 +870,7 @@ class App(tk.Tk):
             fg=self.SUBTEXT,
             font=("Segoe UI", 9),
         ).pack(side="left")
-        perfil_menu = tk.OptionMenu(perfil_row, self.perfil_var, *PERFIS_RESOLUCAO.keys(), command=lambda _: self._render_quick_buttons())
+        perfil_menu = tk.OptionMenu(perfil_row, self.perfil_var, *PERFIS_RESOLUCAO.keys(), command=lambda _: self._show_quick_profile())
         perfil_menu.config(
             bg=self.PANEL,
             fg=self.TEXT,
@@ -383,11 +883,47 @@ class App(tk.Tk):
         )
         perfil_menu["menu"].config(bg=self.PANEL, fg=self.TEXT, activebackground=self.BLUE, activeforeground="white")
         perfil_menu.pack(side="left", padx=(8, 0))
+        # Recomendação: maior modo que cabe no ecrã do analista, com o menor débito.
+        self.btn_recommended = tk.Button(
+            perfil_row,
+            text="💡  …",
+            command=self.apply_recommended,
+            bg=self.YELLOW,
+            fg=self.BG,
+            font=("Consolas", 9, "bold"),
+            relief="flat",
+            bd=0,
+            padx=10,
+            pady=4,
+            activebackground="#e3b341",
+            activeforeground=self.BG,
+        )
+        self.btn_recommended.pack(side="right")
+        self.viewport_var = tk.StringVar(value=os.environ.get(ENV_VIEWPORT, ""))
+        tk.Entry(
+            perfil_row,
+            textvariable=self.viewport_var,
+            bg=self.PANEL,
+            fg=self.TEXT,
+            insertbackground=self.TEXT,
+            relief="flat",
+            font=("Consolas", 9),
+            width=10,
+        ).pack(side="right", padx=(6, 8))
+        tk.Label(
+            perfil_row,
+            text="Ecrã do analista:",
+            bg=self.BG,
+            fg=self.SUBTEXT,
+            font=("Segoe UI", 9),
+        ).pack(side="right")
+        self.viewport_var.trace_add("write", lambda *_: self._update_recommendation())
+        self._update_recommendation()
 
         quick = tk.Frame(self, bg=self.BG)
         quick.pack(padx=14, fill="x")
         self.quick = quick
-        self._render_quick_buttons()
+        self._show_quick_profile()
 
         tk.Label(
             self,
@@ -398,29 +934,81 @@ class App(tk.Tk):
             padx=14,
             anchor="w",
         ).pack(fill="x", pady=(12, 4))
+        filter_row = tk.Frame(self, bg=self.BG)
+        filter_row.pack(fill="x", padx=14, pady=(0, 4))
+        tk.Label(
+            filter_row,
+            text="Filtrar:",
+            bg=self.BG,
+            fg=self.SUBTEXT,
+            font=("Segoe UI", 9),
+        ).pack(side="left")
+        self.filter_var = tk.StringVar()
+        tk.Entry(
+            filter_row,
+            textvariable=self.filter_var,
+            bg=self.PANEL,
+            fg=self.TEXT,
+            insertbackground=self.TEXT,
+            relief="flat",
+            font=("Consolas", 10),
+            width=24,
+        ).pack(side="left", padx=(8, 0))
+        tk.Label(
+            filter_row,
+            text="ex.: 1920, 1280x, 16:9, 75hz",
+            bg=self.BG,
+            fg=self.SUBTEXT,
+            font=("Segoe UI", 8),
+        ).pack(side="left", padx=(8, 0))
+        self.filter_var.trace_add("write", lambda *_: self._on_filter_change())
+        self.preset_var = tk.StringVar(value=PRESET_DRIVER)
+        preset_menu = tk.OptionMenu(filter_row, self.preset_var, PRESET_DRIVER, PRESET_BAIXO_DEBITO)
+        preset_menu.config(
+            bg=self.PANEL,
+            fg=self.TEXT,
+            activebackground=self.BORDER,
+            activeforeground=self.TEXT,
+            highlightthickness=0,
+            bd=0,
+            relief="flat",
+            font=("Segoe UI", 9),
+        )
+        preset_menu["menu"].config(bg=self.PANEL, fg=self.TEXT, activebackground=self.BLUE, activeforeground="white")
+        preset_menu.pack(side="right")
+        tk.Label(
+            filter_row,
+            text="Hz/cor:",
+            bg=self.BG,
+            fg=self.SUBTEXT,
+            font=("Segoe UI", 9),
+        ).pack(side="right", padx=(0, 8))
+
         list_frame = tk.Frame(self, bg=self.BG)
         list_frame.pack(padx=14, fill="both")
-        sb = tk.Scrollbar(list_frame, orient="vertical")
+        # A Listbox só contém as LIST_ROWS linhas visíveis; a barra é gerida à mão.
+        sb = tk.Scrollbar(list_frame, orient="vertical", command=self._on_list_scroll)
+        self.list_scrollbar = sb
         self.listbox = tk.Listbox(
             list_frame,
-            yscrollcommand=sb.set,
             bg=self.PANEL,
             fg=self.TEXT,
             selectbackground=self.BLUE,
             selectforeground="white",
             font=("Consolas", 10),
-            height=8,
+            height=self.LIST_ROWS,
             width=26,
             relief="flat",
             bd=0,
             activestyle="none",
         )
-        sb.config(command=self.listbox.yview)
         sb.pack(side="right", fill="y")
         self.listbox.pack(side="left", fill="both", expand=True)
+        self.listbox.bind("<<ListboxSelect>>", self._on_list_select)
+        self.listbox.bind("<MouseWheel>", self._on_list_wheel)
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
         self._fill_list()
-        if not self.supported:
-            self.listbox.insert("end", "  Nenhuma resolução detectada")
 
         btn_frame = tk.Frame(self, bg=self.BG)
         btn_frame.pack(fill="x", padx=14, pady=12)
@@ -499,45 +1087,199 @@ class App(tk.Tk):
         )
         self.status_bar.pack(fill="x", side="bottom")
 
-    def apply_res(self, w, h):
-        if (w, h) == self.current_res:
+    def _preset_for(self, w, h):
+        """(frequência, bpp) do preset escolhido no menu; (0, 0) = o driver escolhe."""
+        if self.preset_var.get() != PRESET_BAIXO_DEBITO:
+            return 0, 0
+        return bandwidth.preset_mode(self.catalog, bandwidth.PRESET_BAIXO_DEBITO, w, h) or (0, 0)
+
+    def apply_res(self, w, h, on_done=None, frequency=None, bpp=None):
+        """Agenda a troca para w×h; o resultado (ok, erro) chega a on_done na thread do Tk.
+
+        frequency/bpp None seguem o preset do menu; 0 deixa a escolha ao driver.
+        """
+        if frequency is None or bpp is None:
+            frequency, bpp = self._preset_for(w, h)
+        if (w, h) == self.current_res and not (frequency or bpp) and not self._apply_queue.busy:
             self._status(f"ℹ  {w}×{h} já é a resolução atual.", warn=True)
+            if on_done is not None:
+                on_done((True, ""))
             return
-        if not test_resolution(w, h):
-            self._status(f"✘  {w}×{h} não é aceita pelo driver desta máquina.", warn=True)
-            return
-        ok, erro = change_resolution(w, h)
+        device, validity = self.device, self._validity
+        label = mode_text(w, h, frequency, bpp)
+        key = mode_key(w, h, frequency, bpp)
+        identity, known_bad = self._identities.get(device), key in self._known_bad
+
+        def job():
+            if not validity.check(key):
+                return False, ERRO_NAO_SUPORTADA
+            current = self._display.get_current_mode(device)
+            if (
+                current is not None
+                and current.size == (w, h)
+                and frequency in (0, current.frequency)
+                and bpp in (0, current.bpp)
+            ):
+                return True, ""
+            ok, erro = self._display.change_resolution(w, h, device, frequency, bpp)
+            self._learn_from_switch(device, identity, key, ok, erro, known_bad)
+            return ok, erro
+
+        slow = self._slow_sizes.get((w, h))
+        self._submit_change(
+            f"A aplicar {label}" + (f" (troca lenta: {slow})" if slow else ""),
+            job,
+            lambda result: self._on_apply_done((w, h), label, device, result, on_done),
+        )
+
+    def _learn_from_switch(self, device, identity, key, ok, erro, known_bad):
+        """Thread do worker: grava (ou apaga) a recusa em disco e avisa a thread do Tk."""
         if ok:
-            self.current_res = (w, h)
-            self.lbl_cur.config(text=f"{w} × {h}")
-            self._fill_list()
-            self._status(f"✔  Resolução alterada para {w} × {h}.")
+            if not known_bad:
+                return
+            self._bad_modes.forget(identity, key)
+            failure = None
+        else:
+            failure = self._bad_modes.record(identity, key, error_code(erro))
+            if failure is None:
+                return
+        self._ui_queue.put((self._on_bad_mode_learned, (device, key, failure)))
+
+    def _on_bad_mode_learned(self, result):
+        device, key, failure = result
+        if device != self.device:
+            return
+        if failure is None:
+            self._known_bad.pop(key, None)
+        else:
+            self._known_bad[key] = failure
+        self._restyle_quick_modes((key[:2],))
+        self._render_list_window()
+        self._update_recommendation()
+
+    def _submit_change(self, label, job, on_done):
+        self._status(f"⏳  {label}…")
+        if self._apply_queue.submit(label, job, on_done, on_start=lambda lbl: self._status(f"⏳  {lbl}…")):
+            self._status(f"⏳  {label}… (pedido anterior descartado)")
+
+    @tracing.traced("App._set_current", "tk")
+    def _set_current(self, size):
+        previous = self.current_res
+        self.current_res = size
+        self.lbl_cur.config(text=f"{size[0]} × {size[1]}")
+        self._mark_current(previous, size)
+        self._restyle_quick_modes((previous, size))
+
+    def _on_apply_done(self, size, label, device, result, on_done):
+        ok, erro = result
+        if result in (apply_queue.SUBSTITUIDO, apply_queue.CANCELADO):
+            pass
+        elif ok:
+            self._changed_devices.add(device)
+            if device == self.device:
+                self._set_current(size)
+            self._status(f"✔  Resolução alterada para {label}.")
+        elif erro == ERRO_NAO_SUPORTADA:
+            self._status(f"✘  {label} não é aceita pelo driver desta máquina.", warn=True)
         else:
+            if error_code(erro) is None:
+                # Modo relido diferente do pedido, ou driver sem resposta: estado desconhecido.
+                self._changed_devices.add(device)
             self._status(f"✘  {erro}", warn=True)
+        if on_done is not None:
+            on_done((ok, erro))
 
     def apply_from_list(self):
-        sel = self.listbox.curselection()
-        if not sel or not self.supported:
+        if self._selected_row is None:
             self._status("⚠  Selecione uma resolução na lista.", warn=True)
             return
-        self.apply_res(*self.supported[sel[0]])
+        self.apply_res(*self._list_model.sizes[self._selected_row])
 
-    def restore(self):
-        w, h = self.original_res
-        if (w, h) == self.current_res:
+    def _restore_all(self):
+        # Todos os monitores numa só troca de modo (CDS_NORESET + commit).
+        # Modo exato de cada monitor: tamanho, frequência, bpp, orientação e posição.
+        if self.original_topology:
+            return self._display.restore_topology(self.original_topology)
+        m = self.original_mode_primary
+        if m is not None:
+            return self._display.change_resolution(m.width, m.height, None, m.frequency, m.bpp)
+        return self._display.change_resolution(*self.original_res_primary)
+
+    def restore(self, on_done=None):
+        if not self._changed_devices and self.original_res == self.current_res and not self._apply_queue.busy:
             self._status("ℹ  Resolução já está no valor original.", warn=True)
+            if on_done is not None:
+                on_done((True, ""))
             return
-        ok, erro = change_resolution(w, h)
-        if ok:
-            self.current_res = (w, h)
-            self.lbl_cur.config(text=f"{w} × {h}")
-            self._fill_list()
+        self._submit_change(
+            "A restaurar a resolução original",
+            self._restore_all,
+            lambda result: self._on_restore_done(result, on_done),
+        )
+
+    def _on_restore_done(self, result, on_done):
+        ok, erro = result
+        if result in (apply_queue.SUBSTITUIDO, apply_queue.CANCELADO):
+            pass
+        elif ok:
+            self._changed_devices.clear()
+            self._set_current(self.original_res)
+            w, h = self.original_res
             self._status(f"✔  Resolução restaurada para {w} × {h}.")
         else:
             self._status(f"✘  Erro ao restaurar: {erro}", warn=True)
+        if on_done is not None:
+            on_done((ok, erro))
 
     def show_driver_info(self):
-        messagebox.showinfo("Driver de Vídeo", f"Informações do adaptador de vídeo:\n\n{driver_info.get_driver_info()}")
+        info = driver_info.cached_driver_info()
+        if info is not None:
+            messagebox.showinfo("Driver de Vídeo", f"Informações do adaptador de vídeo:\n\n{info}")
+            return
+        if self._driver_dialog is not None and self._driver_dialog.winfo_exists():
+            self._driver_dialog.lift()
+            return
+        # Consulta ainda em curso: janela própria que se preenche sem bloquear o mainloop.
+        dlg = tk.Toplevel(self, bg=self.PANEL)
+        dlg.title("Driver de Vídeo")
+        dlg.transient(self)
+        dlg.resizable(False, False)
+        lbl = tk.Label(
+            dlg,
+            text="Informações do adaptador de vídeo:\n\n⏳  A consultar o driver…",
+            bg=self.PANEL,
+            fg=self.TEXT,
+            font=("Segoe UI", 9),
+            justify="left",
+            anchor="w",
+            padx=16,
+            pady=12,
+        )
+        lbl.pack(fill="both", expand=True)
+        tk.Button(
+            dlg,
+            text="OK",
+            command=dlg.destroy,
+            bg=self.BLUE,
+            fg="white",
+            font=("Segoe UI", 9, "bold"),
+            relief="flat",
+            cursor="hand2",
+            padx=18,
+            pady=4,
+            bd=0,
+            activebackground="#1a5fc8",
+            activeforeground="white",
+        ).pack(pady=(0, 12))
+        self._driver_dialog = dlg
+
+        def fill(result):
+            if dlg.winfo_exists():
+                lbl.config(text=f"Informações do adaptador de vídeo:\n\n{result}")
+
+        self._run_in_background(
+            lambda: driver_info.prefetch().result(), fill, lambda exc: fill(f"✘  Falha na consulta: {exc}")
+        )
 
     def on_close(self):
         self._awaiting_reborderless = False
@@ -547,63 +1289,279 @@ class App(tk.Tk):
             self.attributes("-alpha", 1.0)
         except tk.TclError:
             pass
-        if self.current_res != self.original_res:
-            if messagebox.askyesno(
-                "Restaurar resolução?",
-                f"A resolução foi alterada para {self.current_res[0]}×{self.current_res[1]}.\n\n"
-                "Deseja restaurar a resolução original antes de sair?",
-            ):
-                change_resolution(*self.original_res)
-        self.destroy()
+        try:
+            # Uma troca em curso não se interrompe a meio: espera-se por ela e o pendente é cancelado.
+            if not self._apply_queue.close(timeout=self.APPLY_CLOSE_TIMEOUT):
+                self._changed_devices.add(self.device)  # estado desconhecido: oferece o restauro
+            self._process_ui_queue()
+            if self._changed_devices or self.current_res != self.original_res:
+                if len(self._changed_devices) > 1:
+                    resumo = f"A resolução de {len(self._changed_devices)} monitores foi alterada."
+                else:
+                    resumo = f"A resolução foi alterada para {self.current_res[0]}×{self.current_res[1]}."
+                if messagebox.askyesno(
+                    "Restaurar resolução?",
+                    f"{resumo}\n\nDeseja restaurar a resolução original antes de sair?",
+                ):
+                    self._restore_on_close()
+        finally:
+            # Fecha tudo mesmo que o restauro falhe: threads, processos e a janela.
+            if self._control is not None:
+                # Pedidos à espera da fila do Tk falham já, em vez de esperarem TIMEOUT após destroy().
+                self._control_backend.close()
+                self._control.stop()
+            self._display_events.stop()
+            for validity in self._validity_by_device.values():
+                validity.shutdown()
+            driver_info.shutdown()
+            if _driver is not None:
+                _driver.close()
+            self.destroy()
+
+    def _restore_on_close(self):
+        try:
+            ok, erro = self._restore_all()
+        except driver_worker.WorkerError as exc:  # DriverTimeout: o driver não respondeu a tempo
+            ok, erro = False, str(exc)
+        if not ok:
+            messagebox.showerror(
+                "Restaurar resolução",
+                f"Não foi possível restaurar a resolução original:\n\n{erro}",
+            )
 
+    # ── Lista de resoluções (virtualizada) ─────────────────────────────────────
+    @tracing.traced("App._fill_list", "tk")
     def _fill_list(self):
+        """Reconstrói o modelo; só chamado quando o catálogo muda, não a cada troca de modo."""
+        self._list_model = mode_list.ModeListModel(self.supported, self.catalog)
+        self._list_model.set_filter(self.filter_var.get())
+        self._selected_row = self._list_model.row_of.get(self.current_res)
+        self._list_first = 0
+        self._scroll_to_row(self._selected_row)
+        self._render_list_window()
+
+    @tracing.traced("App._render_list_window", "tk")
+    def _render_list_window(self):
+        model, rows = self._list_model, self.LIST_ROWS
+        self._list_first = model.clamp_first(self._list_first, rows)
         self.listbox.delete(0, "end")
-        for idx, (w, h) in enumerate(self.supported):
-            tag = "  ← atual" if (w, h) == self.current_res else ""
-            self.listbox.insert("end", f"  {w} × {h}{tag}")
-            if (w, h) == self.current_res:
-                self.listbox.selection_set(idx)
-                self.listbox.see(idx)
+        if not len(model):
+            if self.device in self._catalog_loading:
+                vazio = "  ⏳ A enumerar modos…"
+            elif not model.sizes:
+                vazio = "  Nenhuma resolução detectada"
+            else:
+                vazio = "  Nenhuma resolução com este filtro"
+            self.listbox.insert("end", vazio)
+            self.list_scrollbar.set(0.0, 1.0)
+            return
+        window = model.window(self._list_first, rows)
+        self.listbox.insert(
+            "end", *(model.text(row, self.current_res, self._known_bad, self._slow_sizes) for row in window)
+        )
+        if self._selected_row in window:
+            self.listbox.selection_set(window.index(self._selected_row))
+        n = len(model)
+        self.list_scrollbar.set(self._list_first / n, (self._list_first + len(window)) / n)
+
+    def _scroll_to_row(self, row):
+        pos = None if row is None else self._list_model.position(row)
+        if pos is None:
+            return
+        if pos < self._list_first:
+            self._list_first = pos
+        elif pos >= self._list_first + self.LIST_ROWS:
+            self._list_first = pos - self.LIST_ROWS + 1
+
+    @tracing.traced("App._mark_current", "tk")
+    def _mark_current(self, old, new):
+        """Troca só as linhas do antigo e do novo modo atual, se estiverem visíveis."""
+        model = self._list_model
+        self._selected_row = model.row_of.get(new, self._selected_row)
+        window = model.window(self._list_first, self.LIST_ROWS)
+        for size in (old, new):
+            row = model.row_of.get(size)
+            if row is None or row not in window:
+                continue
+            i = window.index(row)
+            self.listbox.delete(i)
+            self.listbox.insert(i, model.text(row, self.current_res, self._known_bad, self._slow_sizes))
+        if self._selected_row in window:
+            self.listbox.selection_clear(0, "end")
+            self.listbox.selection_set(window.index(self._selected_row))
+
+    def _on_filter_change(self):
+        self._list_model.set_filter(self.filter_var.get())
+        self._list_first = 0
+        self._scroll_to_row(self._selected_row)
+        self._render_list_window()
+
+    def _on_list_select(self, _event=None):
+        sel = self.listbox.curselection()
+        window = self._list_model.window(self._list_first, self.LIST_ROWS)
+        if sel and sel[0] < len(window):
+            self._selected_row = window[sel[0]]
+
+    def _on_list_scroll(self, *args):
+        # Mesmo protocolo de Listbox.yview: ("moveto", fração) ou ("scroll", n, "units"|"pages").
+        n = len(self._list_model)
+        if not n:
+            return
+        if args[0] == "moveto":
+            self._list_first = int(float(args[1]) * n)
+        elif args[0] == "scroll":
+            step = self.LIST_ROWS if args[2] == "pages" else 1
+            self._list_first += int(args[1]) * step
+        self._render_list_window()
+
+    def _on_list_wheel(self, event):
+        self._on_list_scroll("scroll", -1 if event.delta > 0 else 1, "units")
+        return "break"
+
+    def _move_selection(self, delta):
+        model = self._list_model
+        if not len(model):
+            return "break"
+        pos = model.position(self._selected_row) if self._selected_row is not None else None
+        pos = 0 if pos is None else max(0, min(pos + delta, len(model) - 1))
+        self._selected_row = model.visible[pos]
+        self._scroll_to_row(self._selected_row)
+        self._render_list_window()
+        return "break"
 
     def _status(self, msg, warn=False):
         self.status_bar.config(text=msg, fg=self.YELLOW if warn else "#3fb950")
 
     def _center(self):
         self.update_idletasks()
-        w, h = self.WIN_WIDTH, self.WIN_HEIGHT
+        # Com DPI declarado, o Tk já escala as fontes (em pontos); o tamanho em px não.
+        scale = max(1.0, self.winfo_fpixels("1i") / 96)
+        w, h = round(self.WIN_WIDTH * scale), round(self.WIN_HEIGHT * scale)
         x = (self.winfo_screenwidth() // 2) - (w // 2)
         y = (self.winfo_screenheight() // 2) - (h // 2)
         self.geometry(f"{w}x{h}+{x}+{y}")
 
-    def _render_quick_buttons(self):
-        for widget in self.quick.winfo_children():
-            widget.destroy()
+    def _quick_button_style(self, mode):
+        if self.device in self._catalog_loading:
+            return self.PANEL, self.SUBTEXT, "disabled"
+        if not self.catalog.has_size(*mode):
+            return self.BORDER, self.SUBTEXT, "disabled"
+        if self._known_badmode(mode) and mode != self.current_res:
+            # DISP_CHANGE_BADMODE numa sessão anterior: nem se testa.
+            return self.BORDER, self.SUBTEXT, "disabled"
+        available = self._validity.get(mode)
+        if available is None and self._validity.failed(mode):
+            # O teste ficou sem resposta (driver pendurado): a troca real mostra o erro.
+            return (self.BLUE, "white", "normal") if mode == self.current_res else (self.PANEL, self.TEXT, "normal")
+        if available is None:
+            # Teste CDS_TEST ainda em curso.
+            return self.PANEL, self.SUBTEXT, "disabled"
+        if mode == self.current_res:
+            return self.BLUE, "white", "normal"
+        if available:
+            # Amarelo: o driver já falhou este modo (DISP_CHANGE_FAILED); fica a escolha ao analista.
+            return (self.YELLOW, self.BG, "normal") if mode in self._known_bad else (self.GREEN, "white", "normal")
+        return self.BORDER, self.SUBTEXT, "disabled"
 
-        perfil = self.perfil_var.get()
-        resolutions = PERFIS_RESOLUCAO.get(perfil, MINHAS_RESOLUCOES)
-        if not resolutions:
+    def _known_badmode(self, mode):
+        failure = self._known_bad.get(mode)
+        return failure is not None and failure.badmode
+
+    def _style_quick_button(self, btn, mode):
+        bg, fg, state = self._quick_button_style(mode)
+        btn.config(bg=bg, fg=fg, state=state, cursor="hand2" if state == "normal" else "arrow")
+
+    def _register_quick_button(self, btn, mode):
+        self._style_quick_button(btn, mode)
+        self._quick_buttons.setdefault(mode, []).append(btn)
+
+    def _restyle_quick_modes(self, modes):
+        # Um modo pode estar em vários perfis: atualiza todos os botões desse modo.
+        for mode in modes:
+            for btn in self._quick_buttons.get(mode, []):
+                self._style_quick_button(btn, mode)
+
+    def _on_probe_result(self, result):
+        mode, ok = result
+        self._restyle_quick_modes((mode,))
+        if ok is False and self._recommended is not None and mode == self._recommended.mode.size:
+            self._update_recommendation()
+        self._check_quick_probed()
+
+    def _check_quick_probed(self):
+        if "atalhos" not in self._startup_pending or self.device in self._catalog_loading:
             return
+        shown = PERFIS_RESOLUCAO.get(self.perfil_var.get(), MINHAS_RESOLUCOES)
+        if all(
+            self._validity.get(m) is not None or self._validity.failed(m)
+            for m in shown
+            if self.catalog.has_size(*m) and not self._known_badmode(m)
+        ):
+            self._startup_done("atalhos")
+
+    def _probe_quick_buttons(self):
+        # Enquanto o catálogo é enumerado, testa já todos os atalhos (em paralelo com a enumeração).
+        loading = self.device in self._catalog_loading
+        pending = [
+            m for m in self._quick_buttons
+            if (loading or self.catalog.has_size(*m)) and self._validity.get(m) is None and not self._known_badmode(m)
+        ]
+        if pending:
+            self._validity.request(
+                pending,
+                lambda mode, ok: self._ui_queue.put((self._on_probe_result, (mode, ok))),
+            )
+        else:
+            self._check_quick_probed()
+
+    # ── Recomendação por largura de banda ──────────────────────────────────────
+    def _viewport(self):
+        """Ecrã do analista indicado na caixa ("1600x900"); None se vazio ou inválido."""
+        text = self.viewport_var.get().strip().lower().replace("×", "x").replace(" ", "")
+        w, sep, h = text.partition("x")
+        if not sep or not w.isdigit() or not h.isdigit() or not int(w) or not int(h):
+            return None
+        return int(w), int(h)
 
-        grouped = {name: [] for name, _ in SECOES_RESOLUCAO}
-        grouped["Outras"] = []
+    def _accepts_size(self, size):
+        # Tamanhos ainda por testar contam como aceites; saem os recusados pelo driver,
+        # no CDS_TEST desta sessão ou numa troca real de uma sessão anterior.
+        return size not in self._known_bad and self._validity.get(size) is not False
+
+    def _update_recommendation(self):
+        if self.device in self._catalog_loading:
+            self._recommended = None
+            self.btn_recommended.config(text="💡  …", state="disabled", cursor="arrow")
+            return
+        # Sem ecrã do analista: nada maior do que a resolução original desta máquina.
+        cap = self._viewport() or self.original_res
+        best = self._recommended = bandwidth.recommend(self.catalog, cap, self._accepts_size)
+        if best is None:
+            self.btn_recommended.config(text="💡  —", state="disabled", cursor="arrow")
+            return
+        m = best.mode
+        hz = f" @ {m.frequency} Hz" if m.frequency else ""
+        escala = "" if best.fits else " (com escala)"
+        self.btn_recommended.config(text=f"💡  {m.width}×{m.height}{hz}{escala}", state="normal", cursor="hand2")
 
-        for item in resolutions:
-            assigned = False
-            for sec_name, sec_set in SECOES_RESOLUCAO:
-                if item in sec_set:
-                    grouped[sec_name].append(item)
-                    assigned = True
-                    break
-            if not assigned:
-                grouped["Outras"].append(item)
+    def apply_recommended(self):
+        if self._recommended is not None:
+            # O modo exato recomendado (frequência de omissão do hardware fica com o driver).
+            m = self._recommended.mode
+            self.apply_res(m.width, m.height, frequency=m.frequency if m.frequency > 1 else 0, bpp=m.bpp)
 
+    @tracing.traced("App._build_quick_frame", "tk")
+    def _build_quick_frame(self, resolutions):
+        """Grelha de um perfil, construída uma única vez (secções pela proporção de cada tamanho)."""
+        frame = tk.Frame(self.quick, bg=self.BG)
+        grouped = self.catalog.group_by_aspect(resolutions)
         row = 0
-        for sec_name, _ in SECOES_RESOLUCAO:
+        for sec_name in [name for name, _ in mode_catalog.SECOES_ASPECTO] + [mode_catalog.SECAO_OUTRAS]:
             section_res = grouped.get(sec_name, [])
             if not section_res:
                 continue
             tk.Label(
-                self.quick,
+                frame,
                 text=sec_name,
                 bg=self.BG,
                 fg=self.SUBTEXT,
@@ -613,59 +1571,46 @@ class App(tk.Tk):
             row += 1
             col = 0
             for w, h in section_res:
-                available = (w, h) in self.supported_set and test_resolution(w, h)
-                color = self.GREEN if available else self.BORDER
-                fg = "white" if available else self.SUBTEXT
-                state = "normal" if available else "disabled"
-                tk.Button(
-                    self.quick,
+                btn = tk.Button(
+                    frame,
                     text=f"{w}×{h}",
-                    bg=color,
-                    fg=fg,
                     font=("Consolas", 9, "bold"),
                     relief="flat",
                     bd=0,
-                    cursor="hand2" if available else "arrow",
-                    state=state,
                     padx=10,
                     pady=6,
                     command=lambda ww=w, hh=h: self.apply_res(ww, hh),
-                ).grid(row=row, column=col, padx=(0, 6), pady=(0, 6), sticky="w")
+                )
+                self._register_quick_button(btn, (w, h))
+                btn.grid(row=row, column=col, padx=(0, 6), pady=(0, 6), sticky="w")
                 col += 1
                 if col >= 5:
                     row += 1
                     col = 0
             row += 1
+        return frame
 
-        if grouped["Outras"]:
-            tk.Label(
-                self.quick,
-                text="Outras",
-                bg=self.BG,
-                fg=self.SUBTEXT,
-                font=("Segoe UI Semibold", 8),
-                anchor="w",
-            ).grid(row=row, column=0, sticky="w", pady=(4, 2))
-            row += 1
-            for col, (w, h) in enumerate(grouped["Outras"]):
-                available = (w, h) in self.supported_set and test_resolution(w, h)
-                color = self.GREEN if available else self.BORDER
-                fg = "white" if available else self.SUBTEXT
-                state = "normal" if available else "disabled"
-                tk.Button(
-                    self.quick,
-                    text=f"{w}×{h}",
-                    bg=color,
-                    fg=fg,
-                    font=("Consolas", 9, "bold"),
-                    relief="flat",
-                    bd=0,
-                    cursor="hand2" if available else "arrow",
-                    state=state,
-                    padx=10,
-                    pady=6,
-                    command=lambda ww=w, hh=h: self.apply_res(ww, hh),
-                ).grid(row=row, column=col, padx=(0, 6), pady=(0, 6), sticky="w")
+    @tracing.traced("App._show_quick_profile", "tk")
+    def _show_quick_profile(self):
+        """Troca de perfil: mostra a grelha em cache (constrói-a só na primeira vez)."""
+        perfil = self.perfil_var.get()
+        frame = self._quick_frames.get(perfil)
+        if frame is None:
+            frame = self._build_quick_frame(PERFIS_RESOLUCAO.get(perfil, MINHAS_RESOLUCOES))
+            self._quick_frames[perfil] = frame
+            self._probe_quick_buttons()
+        if frame is self._quick_shown:
+            return
+        if self._quick_shown is not None:
+            self._quick_shown.pack_forget()
+        frame.pack(fill="x")
+        self._quick_shown = frame
+
+    @tracing.traced("App._render_quick_buttons", "tk")
+    def _render_quick_buttons(self):
+        """Catálogo ou monitor mudou: as grelhas mantêm-se, só o estado dos botões muda."""
+        self._restyle_quick_modes(list(self._quick_buttons))
+        self._probe_quick_buttons()
 
 
 def main():
@@ -683,7 +1628,14 @@ def main():
         pass
 
     ctypes.windll.user32.ShowWindow(ctypes.windll.kernel32.GetConsoleWindow(), 0)
-    App().mainloop()
+    # Antes de qualquer janela: tamanhos reais a 125–150 % (Tk, WM_DISPLAYCHANGE, GetSystemMetrics).
+    enable_dpi_awareness()
+    tracing.start_profile()
+    with tracing.span("App.__init__", "tk"):
+        app = App()
+    # Perfil do arranque até ao primeiro ciclo ocioso do mainloop (janela já pintada).
+    app.after_idle(tracing.stop_profile)
+    app.mainloop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+"""Registo de desempenho para diagnóstico no terreno ("a ferramenta encrava").
+
+Desligado por omissão e sem custo: `traced` e `wrap_dll` devolvem a própria função /
+DLL quando o registo não está ligado no momento da importação. Liga-se com a variável
+RR_TRACE (caminho do ficheiro, ou "1" para o caminho por omissão) ou com --trace, antes
+de importar win_display, driver_info e a GUI.
+
+Saída: JSON "trace event" do Chrome (abrir em chrome://tracing ou ui.perfetto.dev) e,
+com RR_TRACE_PROFILE=1 ou --trace-profile, um dump cProfile do arranque (<ficheiro>.prof).
+
+Processos filhos (driver_worker) gravam o seu próprio ficheiro (child_trace_path()), que
+o processo principal junta ao seu no dump; um filho morto por prazo não chega a gravar.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+ENV_TRACE = "RR_TRACE"
+ENV_TRACE_PROFILE = "RR_TRACE_PROFILE"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+enabled = False
+path: Optional[str] = None
+# (nome, categoria, início ns, duração ns, tid, args)
+_events: List[Tuple[str, str, int, int, int, Optional[Dict[str, Any]]]] = []
+_thread_names: Dict[int, str] = {}
+_origin = time.perf_counter_ns()
+_profiler = None
+_profile_wanted = False
+# Ficheiros dos processos filhos, juntados a este no dump (ver merge_child).
+_children: List[str] = []
+_merged: List[Dict[str, Any]] = []
+_PID = "{pid}"
+
+
+def default_path() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "RemoteResolution", f"trace-{os.getpid()}.json")
+
+
+def enable(trace_path: Optional[str] = None, profile: bool = False) -> None:
+    """Liga o registo; só afeta o que for importado (ou embrulhado) a seguir."""
+    global enabled, path, _profile_wanted
+    if not enabled:
+        atexit.register(dump)
+    enabled = True
+    path = (trace_path or path or default_path()).replace(_PID, str(os.getpid()))
+    _profile_wanted = _profile_wanted or profile
+
+
+def enable_from_argv(argv: List[str]) -> None:
+    """Retira --trace / --trace-profile de argv (in place) e liga o registo se presentes."""
+    profile = "--trace-profile" in argv
+    if profile or "--trace" in argv:
+        argv[:] = [a for a in argv if a not in ("--trace", "--trace-profile")]
+        enable(profile=profile)
+
+
+def _record(name: str, cat: str, start: int, duration: int, args: Optional[Dict[str, Any]]) -> None:
+    tid = threading.get_ident()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    # list.append é atómico sob o GIL: sem lock no caminho quente.
+    _events.append((name, cat, start, duration, tid, args))
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name: str, cat: str, args: Optional[Dict[str, Any]]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _record(self.name, self.cat, self.start, time.perf_counter_ns() - self.start, self.args)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL = _NullSpan()
+
+
+def span(name: str, cat: str = "app", **args: Any):
+    """Contexto temporizado; com o registo desligado devolve sempre o mesmo objeto vazio."""
+    if not enabled:
+        return _NULL
+    return _Span(name, cat, args or None)
+
+
+def traced(name: str, cat: str = "app") -> Callable[[F], F]:
+    """Decorador: com o registo desligado à importação, devolve a função intacta."""
+
+    def decorate(fn: F) -> F:
+        if not enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*a: Any, **kw: Any) -> Any:
+            start = time.perf_counter_ns()
+            try:
+                return fn(*a, **kw)
+            finally:
+                _record(name, cat, start, time.perf_counter_ns() - start, None)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class _TracedDll:
+    """Embrulha cada função da DLL na primeira vez que é pedida (e guarda o embrulho)."""
+
+    def __init__(self, dll: Any, cat: str):
+        self._dll = dll
+        self._cat = cat
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._dll, name)
+        if callable(attr):
+            attr = traced(f"{self._cat}.{name}", self._cat)(attr)
+            setattr(self, name, attr)
+        return attr
+
+
+def wrap_dll(dll: Any, cat: str) -> Any:
+    return _TracedDll(dll, cat) if enabled else dll
+
+
+# ── cProfile do arranque ───────────────────────────────────────────────────────
+def start_profile() -> None:
+    global _profiler
+    if not _profile_wanted or _profiler is not None:
+        return
+    import cProfile
+
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop_profile() -> Optional[str]:
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None or path is None:
+        return None
+    profiler.disable()
+    out = os.path.splitext(path)[0] + ".prof"
+    try:
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        profiler.dump_stats(out)
+    except OSError:
+        return None
+    return out
+
+
+# ── Exportação ─────────────────────────────────────────────────────────────────
+def events() -> List[Dict[str, Any]]:
+    """Eventos no formato trace-event do Chrome (ph "X", tempos em µs)."""
+    pid = os.getpid()
+    out: List[Dict[str, Any]] = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+        for tid, tname in list(_thread_names.items())
+    ]
+    for name, cat, start, duration, tid, args in list(_events):
+        event: Dict[str, Any] = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - _origin) / 1000,
+            "dur": duration / 1000,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        out.append(event)
+    return out
+
+
+def child_trace_path() -> Optional[str]:
+    """RR_TRACE para um processo filho: ao lado deste ficheiro, com o pid do filho no nome."""
+    if not enabled or path is None:
+        return None
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{_PID}{ext or '.json'}"
+
+
+def merge_child(pid: int) -> None:
+    """O filho `pid` (lançado com child_trace_path()) grava ao terminar; junta-se no dump."""
+    template = child_trace_path()
+    if template is not None:
+        _children.append(template.replace(_PID, str(pid)))
+
+
+def _child_events() -> List[Dict[str, Any]]:
+    import json
+
+    out: List[Dict[str, Any]] = []
+    for child in _children:
+        try:
+            with open(child, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            os.remove(child)
+        except (OSError, ValueError):
+            continue  # morto antes de gravar, ou já junto num dump anterior
+        # perf_counter é o mesmo relógio em todos os processos: alinha pela origem de cada um.
+        shift = (data.get("otherData", {}).get("originNs", _origin) - _origin) / 1000
+        for event in data.get("traceEvents", []):
+            if "ts" in event:
+                event["ts"] += shift
+            out.append(event)
+    return out
+
+
+def dump(trace_path: Optional[str] = None) -> Optional[str]:
+    """Grava o JSON (também corre no atexit); devolve o caminho ou None se falhou."""
+    import json
+
+    out = trace_path or path
+    if not enabled or out is None:
+        return None
+    stop_profile()
+    try:
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        # Acumula entre dumps: um filho já junto deixa de ter ficheiro próprio.
+        _merged.extend(_child_events())
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": events() + _merged, "displayTimeUnit": "ms", "otherData": {"originNs": _origin}}, f
+            )
+    except OSError:
+        return None
+    return out
+
+
+_env = os.environ.get(ENV_TRACE, "").strip()
+if _env:
+    enable(None if _env == "1" else _env, profile=os.environ.get(ENV_TRACE_PROFILE) == "1")
+del _env
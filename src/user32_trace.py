@@ -0,0 +1,284 @@
+"""Gravação e reprodução das chamadas a user32 (regressões de desempenho fora do Windows).
+
+Gravação, na máquina do cliente: com RR_USER32_RECORD=<ficheiro> (".gz" comprime),
+win_display embrulha o user32 verdadeiro e cada chamada a GetSystemMetrics,
+EnumDisplayDevicesW, EnumDisplaySettingsW e ChangeDisplaySettingsExW fica numa linha
+JSON com argumentos, resultado, estruturas preenchidas e latência.
+
+Reprodução, em qualquer sistema: RR_USER32_BACKEND=user32_trace:replay_from_env e
+RR_USER32_REPLAY=<ficheiro> (RR_USER32_REPLAY_SPEED=2 reproduz ao dobro da velocidade).
+Cada chamada devolve a próxima resposta gravada para os mesmos argumentos, com a mesma
+latência; esgotadas, recomeçam do início (arranques repetidos nos benchmarks). Chamadas
+que a sessão gravada nunca fez contam em `misses` e respondem como "não há" (0 / BADMODE)
+com a latência mediana dessa função.
+
+    python scripts/bench.py --user32-trace cliente-nvidia.jsonl.gz
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+ENV_USER32_REPLAY = "RR_USER32_REPLAY"
+ENV_USER32_REPLAY_SPEED = "RR_USER32_REPLAY_SPEED"
+
+# Incrementar sempre que o formato gravado mudar.
+FORMATO_VERSAO = 1
+
+# Nome curto de cada função no ficheiro (uma linha por chamada: mantém-no pequeno).
+_NOMES = {
+    "GetSystemMetrics": "GSM",
+    "EnumDisplayDevicesW": "EDD",
+    "EnumDisplaySettingsW": "EDS",
+    "ChangeDisplaySettingsExW": "CDS",
+}
+
+# Campos que win_display lê depois de EnumDisplaySettingsW / EnumDisplayDevicesW e os que
+# escreve antes de ChangeDisplaySettingsExW.
+_DM_SAIDA = (
+    "dmPelsWidth", "dmPelsHeight", "dmDisplayFrequency", "dmBitsPerPel",
+    "dmDisplayOrientation", "dmPositionX", "dmPositionY", "dmDriverVersion",
+)
+# Só os campos marcados em dmFields contam (o DEVMODE reutilizado traz restos de outras chamadas).
+_DM_ENTRADA = (
+    ("dmPelsWidth", 0x00080000),
+    ("dmPelsHeight", 0x00100000),
+    ("dmDisplayFrequency", 0x00400000),
+    ("dmBitsPerPel", 0x00040000),
+    ("dmDisplayOrientation", 0x00000080),
+    ("dmPositionX", 0x00000020),
+    ("dmPositionY", 0x00000020),
+)
+_DD_SAIDA = ("DeviceName", "DeviceString", "StateFlags", "DeviceID", "DeviceKey")
+
+DISP_CHANGE_BADMODE = -2
+# Abaixo disto a espera é ativa: time.sleep() tem granularidade de vários ms em alguns sistemas.
+_ESPERA_ATIVA = 0.002
+
+Chave = Tuple[Any, ...]
+
+
+def _struct(ref: Any) -> Any:
+    # ctypes.byref() guarda a estrutura em _obj; um ponteiro já é a própria estrutura.
+    return getattr(ref, "_obj", ref)
+
+
+def _fields(ref: Any, names: Tuple[str, ...]) -> Optional[List[Any]]:
+    if ref is None:
+        return None
+    obj = _struct(ref)
+    return [getattr(obj, name) for name in names]
+
+
+def _dm_input(ref: Any) -> Optional[Tuple[int, ...]]:
+    if ref is None:
+        return None
+    dm = _struct(ref)
+    fields = int(dm.dmFields)
+    return (fields, *(int(getattr(dm, name)) if fields & flag else 0 for name, flag in _DM_ENTRADA))
+
+
+def _key(short: str, args: tuple) -> Chave:
+    """Argumentos de entrada de uma chamada, na forma gravada (listas → tuplos)."""
+    if short == "GSM":
+        return (short, args[0])
+    if short == "EDD":
+        return (short, args[0], args[1], args[3])
+    if short == "EDS":
+        return (short, args[0], args[1])
+    return (short, args[0], _dm_input(args[1]), args[3])
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+
+# ── Gravação ───────────────────────────────────────────────────────────────────
+class Recorder:
+    """Embrulha uma DLL (ou dublê) e grava cada chamada das funções conhecidas."""
+
+    def __init__(self, dll: Any, path: str):
+        self._dll = dll
+        self.path = path
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file: Optional[IO[str]] = _open(path, "w")
+        header = {"v": FORMATO_VERSAO, "created": time.time(), "platform": sys.platform}
+        self._file.write(json.dumps(header) + "\n")
+        atexit.register(self.close)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._dll, name)
+        short = _NOMES.get(name)
+        if short is not None:
+            attr = self._wrap(short, attr)
+            setattr(self, name, attr)
+        return attr
+
+    def _wrap(self, short: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def call(*args: Any) -> Any:
+            start = time.perf_counter_ns()
+            result = fn(*args)
+            duration = time.perf_counter_ns() - start
+            self._write(short, args, result, start, duration)
+            return result
+
+        return call
+
+    def _write(self, short: str, args: tuple, result: Any, start: int, duration: int) -> None:
+        out = None
+        if result and short == "EDS":
+            out = _fields(args[2], _DM_SAIDA)
+        elif result and short == "EDD":
+            out = _fields(args[2], _DD_SAIDA)
+        # [função, argumentos, resultado, estrutura preenchida, início µs, duração µs, thread]
+        line = [
+            short, _key(short, args)[1:], int(result), out,
+            (start - self._origin) // 1000, duration // 1000, threading.get_ident(),
+        ]
+        text = json.dumps(line, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(text)
+            if short == "CDS":
+                # Uma troca de modo pode deixar o ecrã negro e a aplicação morta: grava já.
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            f, self._file = self._file, None
+        if f is not None:
+            f.close()
+
+
+def record(dll: Any, path: str) -> Any:
+    return Recorder(dll, path)
+
+
+# ── Reprodução ─────────────────────────────────────────────────────────────────
+class _Answer:
+    __slots__ = ("result", "out", "latency")
+
+    def __init__(self, result: int, out: Optional[List[Any]], latency: float):
+        self.result = result
+        self.out = out
+        self.latency = latency
+
+
+def _wait(seconds: float) -> None:
+    if seconds <= 0:
+        return
+    if seconds >= _ESPERA_ATIVA:
+        time.sleep(seconds)
+        return
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class Replayer:
+    """Interface de user32 servida a partir de um ficheiro gravado pelo Recorder."""
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed if speed > 0 else 1.0
+        self._answers: Dict[Chave, List[_Answer]] = {}
+        self._cursor: Dict[Chave, int] = {}
+        self._latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.misses = 0
+        self._load()
+        self._median = {short: statistics.median(v) for short, v in self._latencies.items()}
+
+    def _load(self) -> None:
+        with _open(self.path, "r") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("v") != FORMATO_VERSAO:
+                raise ValueError(f"{self.path}: formato de gravação desconhecido ({header.get('v')!r})")
+            for line in f:
+                if not line.strip():
+                    continue
+                short, key, result, out, _start_us, duration_us, _tid = json.loads(line)
+                if short == "CDS" and key[1] is not None:
+                    key[1] = tuple(key[1])
+                latency = duration_us / 1e6
+                self._answers.setdefault((short, *key), []).append(_Answer(result, out, latency))
+                self._latencies.setdefault(short, []).append(latency)
+
+    def _next(self, short: str, args: tuple) -> Optional[_Answer]:
+        key = _key(short, args)
+        with self._lock:
+            self.calls += 1
+            answers = self._answers.get(key)
+            if not answers:
+                self.misses += 1
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = (i + 1) % len(answers)
+            return answers[i]
+
+    def _answer(self, short: str, args: tuple, miss: int) -> int:
+        answer = self._next(short, args)
+        if answer is None:
+            _wait(self._median.get(short, 0.0) / self.speed)
+            return miss
+        _wait(answer.latency / self.speed)
+        if answer.out is not None:
+            obj = _struct(args[2])
+            names = _DM_SAIDA if short == "EDS" else _DD_SAIDA
+            for name, value in zip(names, answer.out):
+                setattr(obj, name, value)
+        return answer.result
+
+    def applied_sizes(self) -> List[Tuple[int, int]]:
+        """Tamanhos aplicados com sucesso na sessão gravada (trocas reais, sem CDS_TEST)."""
+        sizes: List[Tuple[int, int]] = []
+        for key, answers in self._answers.items():
+            if key[0] != "CDS":
+                continue
+            _short, _device, dm, flags = key
+            if dm is not None and not flags & 0x2 and any(a.result == 0 for a in answers):
+                if (dm[1], dm[2]) not in sizes:
+                    sizes.append((dm[1], dm[2]))
+        return sizes
+
+    def rewind(self) -> None:
+        """Volta ao início da sessão gravada (respostas e contadores)."""
+        with self._lock:
+            self._cursor.clear()
+            self.calls = self.misses = 0
+
+    def GetSystemMetrics(self, index: int) -> int:
+        return self._answer("GSM", (index,), 0)
+
+    def EnumDisplayDevicesW(self, device: Any, index: int, pdd: Any, flags: int) -> int:
+        return self._answer("EDD", (device, index, pdd, flags), 0)
+
+    def EnumDisplaySettingsW(self, device: Any, index: int, pdm: Any) -> int:
+        return self._answer("EDS", (device, index, pdm), 0)
+
+    def ChangeDisplaySettingsExW(self, device: Any, pdm: Any, hwnd: Any, flags: int, lparam: Any) -> int:
+        return self._answer("CDS", (device, pdm, hwnd, flags, lparam), DISP_CHANGE_BADMODE)
+
+
+def replay_from_env() -> Replayer:
+    """Fábrica para RR_USER32_BACKEND=user32_trace:replay_from_env."""
+    path = os.environ.get(ENV_USER32_REPLAY, "").strip()
+    if not path:
+        raise RuntimeError(f"defina {ENV_USER32_REPLAY} com o ficheiro gravado")
+    return Replayer(path, float(os.environ.get(ENV_USER32_REPLAY_SPEED, "1") or 1))
@@ -1,11 +1,25 @@
-"""API Win32 para leitura e alteração da resolução do monitor principal."""
+"""API Win32 para leitura e alteração da resolução dos monitores (principal por omissão)."""
 
 import ctypes
+import importlib
+import os
 import sys
+import threading
+import time
+from array import array
 from ctypes import wintypes
-from typing import List, Set, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-if sys.platform != "win32":
+import tracing
+from mode_catalog import CAMPOS, DisplayMode, DriverError, ModeCatalog, MonitorState, mode_matches
+
+# "módulo:fábrica" que devolve um objeto com a interface de user32 (benchmarks, testes).
+ENV_USER32_BACKEND = "RR_USER32_BACKEND"
+_BACKEND = os.environ.get(ENV_USER32_BACKEND, "").strip()
+# Ficheiro onde gravar cada chamada a user32, para reproduzir fora do Windows (user32_trace).
+ENV_USER32_RECORD = "RR_USER32_RECORD"
+
+if sys.platform != "win32" and not _BACKEND:
     raise RuntimeError("win_display só é suportado no Windows.")
 
 
@@ -44,16 +58,77 @@ class DEVMODE(ctypes.Structure):
     ]
 
 
+class DISPLAY_DEVICE(ctypes.Structure):
+    _fields_ = [
+        ("cb", wintypes.DWORD),
+        ("DeviceName", ctypes.c_wchar * 32),
+        ("DeviceString", ctypes.c_wchar * 128),
+        ("StateFlags", wintypes.DWORD),
+        ("DeviceID", ctypes.c_wchar * 128),
+        ("DeviceKey", ctypes.c_wchar * 128),
+    ]
+
+
+DM_POSITION = 0x00000020
+DM_DISPLAYORIENTATION = 0x00000080
+DM_BITSPERPEL = 0x00040000
 DM_PELSWIDTH = 0x00080000
 DM_PELSHEIGHT = 0x00100000
+DM_DISPLAYFREQUENCY = 0x00400000
 CDS_TEST = 0x00000002
 CDS_UPDATEREGISTRY = 0x00000001
+CDS_NORESET = 0x10000000
 DISP_CHANGE_SUCCESSFUL = 0
 DISP_CHANGE_BADMODE = -2
 DISP_CHANGE_FAILED = -1
 DISP_CHANGE_NOTUPDATED = 3
+ENUM_CURRENT_SETTINGS = -1
+DISPLAY_DEVICE_ATTACHED_TO_DESKTOP = 0x00000001
+DISPLAY_DEVICE_PRIMARY_DEVICE = 0x00000004
+DISPLAY_DEVICE_MIRRORING_DRIVER = 0x00000008
+DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2 = -4
+PROCESS_PER_MONITOR_DPI_AWARE = 2
+
+
+_DEVMODE_SIZE = ctypes.sizeof(DEVMODE)
+_PDEVMODE = ctypes.POINTER(DEVMODE)
+
+
+def _prototype(dll: Any) -> Any:
+    """Declara argtypes/restype: conversão fixa por chamada e sem truncar valores de retorno."""
+    dll.GetSystemMetrics.argtypes = [ctypes.c_int]
+    dll.GetSystemMetrics.restype = ctypes.c_int
+    dll.EnumDisplayDevicesW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, ctypes.POINTER(DISPLAY_DEVICE), wintypes.DWORD]
+    dll.EnumDisplayDevicesW.restype = wintypes.BOOL
+    dll.EnumDisplaySettingsW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, _PDEVMODE]
+    dll.EnumDisplaySettingsW.restype = wintypes.BOOL
+    dll.ChangeDisplaySettingsExW.argtypes = [wintypes.LPCWSTR, _PDEVMODE, wintypes.HWND, wintypes.DWORD, wintypes.LPVOID]
+    dll.ChangeDisplaySettingsExW.restype = wintypes.LONG
+    return dll
+
+
+def _load_user32() -> Any:
+    if _BACKEND:
+        module, _, factory = _BACKEND.partition(":")
+        dll = getattr(importlib.import_module(module), factory)()
+        # Dublês em Python recebem os argumentos tal como estão; DLLs falsas em C são declaradas.
+        return _prototype(dll) if isinstance(dll, ctypes.CDLL) else dll
+    # Instância própria: os protótipos não afetam ctypes.windll.user32 noutros módulos.
+    return _prototype(ctypes.WinDLL("user32", use_last_error=True))
+
 
-user32 = ctypes.windll.user32
+def _record_if_asked(dll: Any) -> Any:
+    path = os.environ.get(ENV_USER32_RECORD, "").strip()
+    if not path:
+        return dll
+    import user32_trace
+
+    return user32_trace.record(dll, path)
+
+
+_dll = _load_user32()
+# Com o registo de desempenho ligado, cada chamada a user32 fica num span.
+user32 = tracing.wrap_dll(_record_if_asked(_dll), "user32")
 
 ERROS_DRIVER = {
     DISP_CHANGE_BADMODE: "Resolução não suportada pelo driver de vídeo.",
@@ -65,43 +140,406 @@ ERROS_DRIVER = {
 }
 
 _MIN_WIDTH = 800
+# Leituras do modo em uso depois de uma troca aceite, até o driver refletir o pedido.
+_CONFIRMACAO_TENTATIVAS = 5
+_CONFIRMACAO_INTERVALO = 0.05  # s
+
+
+# (ok, erro) das trocas: erro vazio no sucesso; DriverError (com o código em .code) quando o
+# driver recusou, texto simples nas outras falhas (modo relido diferente, por exemplo).
+Resultado = Tuple[bool, Union[str, DriverError]]
+
+
+def _erro(result: int) -> DriverError:
+    return DriverError(ERROS_DRIVER.get(result, f"Erro desconhecido (código {result})."), result)
+
+
+def error_code(erro: Union[str, DriverError]) -> Optional[int]:
+    """Código DISP_CHANGE_* de um erro de change_resolution e afins.
+
+    None quando o driver não recusou: modo relido diferente do pedido, driver sem
+    resposta (driver_worker) ou outra falha fora do ChangeDisplaySettingsExW.
+    """
+    return erro.code if isinstance(erro, DriverError) else None
+
+
+def _on_device(device: str, erro: Union[str, DriverError]) -> Union[str, DriverError]:
+    # Prefixo do monitor sem perder o código do driver.
+    text = f"{device}: {erro}"
+    code = error_code(erro)
+    return text if code is None else DriverError(text, code)
+
+
+def enable_dpi_awareness() -> Optional[str]:
+    """Declara o processo "per-monitor DPI aware"; chamar antes de criar qualquer janela.
+
+    Sem isto, a 125–150 % o Windows virtualiza GetSystemMetrics e a geometria do Tk.
+    Tenta a API do Windows 10 1703+, depois a do 8.1 e por fim a do Vista (só DPI do
+    sistema). Devolve o nível obtido, ou None (dublê de user32 ou nenhuma API aceitou).
+    """
+    if _BACKEND or sys.platform != "win32":
+        return None
+    dll = ctypes.windll.user32
+    try:
+        if dll.SetProcessDpiAwarenessContext(ctypes.c_void_p(DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2)):
+            return "per-monitor-v2"
+    except AttributeError:
+        pass
+    try:
+        if ctypes.windll.shcore.SetProcessDpiAwareness(PROCESS_PER_MONITOR_DPI_AWARE) == 0:
+            return "per-monitor"
+    except (AttributeError, OSError):
+        pass
+    try:
+        if dll.SetProcessDPIAware():
+            return "system"
+    except AttributeError:
+        pass
+    return None
+
+
+class _Buffers(threading.local):
+    """DEVMODE e array de modos reutilizados, um conjunto por thread (mode_probe, fila de trocas)."""
+
+    def __init__(self) -> None:
+        self.dm = DEVMODE()
+        self.ref = ctypes.byref(self.dm)
+        # Modos enumerados, CAMPOS inteiros cada; a capacidade duplica quando falta espaço.
+        self.modes = array("I", bytes(4 * CAMPOS * 256))
+
+
+_buffers = _Buffers()
+
+
+def _devmode() -> Tuple[DEVMODE, Any]:
+    """DEVMODE da thread e o byref() correspondente.
+
+    Não é zerado (ctypes.memset custa mais do que um DEVMODE novo): o Windows só lê os
+    campos indicados em dmFields, que quem escreve atribui sempre por inteiro. Válido até
+    à próxima chamada nesta thread: quem precisar dos valores copia-os antes.
+    """
+    b = _buffers
+    dm = b.dm
+    dm.dmSize = _DEVMODE_SIZE
+    dm.dmDriverExtra = 0
+    dm.dmFields = 0
+    return dm, b.ref
+
+
+def _read_current(device: Optional[str]) -> Optional[DEVMODE]:
+    dm, ref = _devmode()
+    if not user32.EnumDisplaySettingsW(device, ENUM_CURRENT_SETTINGS, ref):
+        return None
+    return dm
+
+
+def get_current_mode(device: Optional[str] = None) -> Optional[DisplayMode]:
+    """Modo completo em uso (tamanho, frequência, bpp, orientação)."""
+    dm = _read_current(device)
+    if dm is None:
+        return None
+    return DisplayMode(
+        int(dm.dmPelsWidth),
+        int(dm.dmPelsHeight),
+        int(dm.dmDisplayFrequency),
+        int(dm.dmBitsPerPel),
+        int(dm.dmDisplayOrientation),
+    )
+
+
+def get_current_resolution(device: Optional[str] = None) -> Tuple[int, int]:
+    """Tamanho real do modo em uso (EnumDisplaySettingsW: nunca virtualizado pelo DPI)."""
+    dm = _read_current(device)
+    if dm is not None:
+        return int(dm.dmPelsWidth), int(dm.dmPelsHeight)
+    if device is None:
+        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+    return 0, 0
+
+
+def _adapter(device: Optional[str]) -> Optional[DISPLAY_DEVICE]:
+    i = 0
+    while True:
+        dd = DISPLAY_DEVICE()
+        dd.cb = ctypes.sizeof(DISPLAY_DEVICE)
+        if not user32.EnumDisplayDevicesW(None, i, ctypes.byref(dd), 0):
+            return None
+        if device is None and dd.StateFlags & DISPLAY_DEVICE_PRIMARY_DEVICE:
+            return dd
+        if device is not None and dd.DeviceName == device:
+            return dd
+        i += 1
 
 
-def get_current_resolution() -> Tuple[int, int]:
-    return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+def _monitor_of(adapter: DISPLAY_DEVICE) -> Optional[DISPLAY_DEVICE]:
+    monitor = DISPLAY_DEVICE()
+    monitor.cb = ctypes.sizeof(DISPLAY_DEVICE)
+    if user32.EnumDisplayDevicesW(adapter.DeviceName, 0, ctypes.byref(monitor), 0):
+        return monitor
+    return None
 
 
-def get_supported_resolutions() -> List[Tuple[int, int]]:
-    resolutions: Set[Tuple[int, int]] = set()
+def list_display_adapters() -> List[Dict[str, Any]]:
+    """Saídas de vídeo devolvidas por EnumDisplayDevicesW, como dicionários simples."""
+    adapters: List[Dict[str, Any]] = []
     i = 0
-    dm = DEVMODE()
-    dm.dmSize = ctypes.sizeof(DEVMODE)
+    while True:
+        dd = DISPLAY_DEVICE()
+        dd.cb = ctypes.sizeof(DISPLAY_DEVICE)
+        if not user32.EnumDisplayDevicesW(None, i, ctypes.byref(dd), 0):
+            return adapters
+        adapters.append(
+            {
+                "DeviceName": dd.DeviceName,
+                "DeviceString": dd.DeviceString,
+                "StateFlags": int(dd.StateFlags),
+                "DeviceID": dd.DeviceID,
+                "DeviceKey": dd.DeviceKey,
+            }
+        )
+        i += 1
+
+
+def list_monitors() -> List[Tuple[str, str, bool]]:
+    """Monitores ligados ao ambiente de trabalho: (dispositivo, descrição, é_principal)."""
+    monitors: List[Tuple[str, str, bool]] = []
+    i = 0
+    while True:
+        dd = DISPLAY_DEVICE()
+        dd.cb = ctypes.sizeof(DISPLAY_DEVICE)
+        if not user32.EnumDisplayDevicesW(None, i, ctypes.byref(dd), 0):
+            return monitors
+        i += 1
+        flags = dd.StateFlags
+        if not flags & DISPLAY_DEVICE_ATTACHED_TO_DESKTOP or flags & DISPLAY_DEVICE_MIRRORING_DRIVER:
+            continue
+        monitor = _monitor_of(dd)
+        label = monitor.DeviceString if monitor is not None else dd.DeviceString
+        monitors.append((dd.DeviceName, label, bool(flags & DISPLAY_DEVICE_PRIMARY_DEVICE)))
+
+
+_PREFIXO_HKLM = "\\registry\\machine\\"
+
+
+def _driver_version(adapter: DISPLAY_DEVICE) -> str:
+    """DriverVersion do adaptador no registo (ex.: 31.0.15.5186); "" se não se souber.
+
+    Não é o dmDriverVersion do DEVMODE (versão da estrutura privada do driver, que não
+    muda com as atualizações). Lê a chave do adaptador (DeviceKey) e, se lá não estiver,
+    a classe de vídeo, como driver_info.
+    """
+    if _BACKEND:
+        # Dublês não têm registo: respondem eles próprios, se souberem.
+        query = getattr(_dll, "DriverVersion", None)
+        return str(query(adapter.DeviceKey)) if query is not None else ""
+    import winreg
+
+    key = adapter.DeviceKey
+    if key.lower().startswith(_PREFIXO_HKLM):
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key[len(_PREFIXO_HKLM):]) as handle:
+                return str(winreg.QueryValueEx(handle, "DriverVersion")[0])
+        except OSError:
+            pass
+    import driver_info
+
+    return driver_info.driver_version(adapter.DeviceID)
+
+
+def get_display_identity(device: Optional[str] = None) -> Optional[Tuple[str, str, str]]:
+    """(adaptador, versão do driver, monitor) de um ecrã, para chavear caches."""
+    adapter = _adapter(device)
+    if adapter is None:
+        return None
+    monitor = _monitor_of(adapter)
+    monitor_id = monitor.DeviceID if monitor is not None else ""
+    return f"{adapter.DeviceString} [{adapter.DeviceID}]", _driver_version(adapter), monitor_id
+
+
+def enumerate_modes(device: Optional[str] = None) -> ModeCatalog:
+    """Todos os modos do monitor (largura ≥ _MIN_WIDTH), com frequência e bpp."""
+    dm, ref = _devmode()
+    out = _buffers.modes
+    enum = user32.EnumDisplaySettingsW
+    n = i = 0
     try:
-        while user32.EnumDisplaySettingsW(None, i, ctypes.byref(dm)):
-            if dm.dmPelsWidth >= _MIN_WIDTH:
-                resolutions.add((int(dm.dmPelsWidth), int(dm.dmPelsHeight)))
+        # Escreve direto no array da thread: nenhum objeto Python por modo até ao catálogo.
+        while enum(device, i, ref):
             i += 1
+            if dm.dmPelsWidth < _MIN_WIDTH:
+                continue
+            k = n * CAMPOS
+            if k + CAMPOS > len(out):
+                out.extend(out)
+            out[k] = dm.dmPelsWidth
+            out[k + 1] = dm.dmPelsHeight
+            out[k + 2] = dm.dmDisplayFrequency
+            out[k + 3] = dm.dmBitsPerPel
+            out[k + 4] = dm.dmDisplayOrientation
+            n += 1
     except Exception:
         pass
-    return sorted(resolutions, key=lambda r: r[0] * r[1])
+    return ModeCatalog.from_packed(out, n)
 
 
-def test_resolution(width: int, height: int) -> bool:
-    dm = DEVMODE()
-    dm.dmSize = ctypes.sizeof(DEVMODE)
-    dm.dmPelsWidth = width
-    dm.dmPelsHeight = height
-    dm.dmFields = DM_PELSWIDTH | DM_PELSHEIGHT
-    return user32.ChangeDisplaySettingsW(ctypes.byref(dm), CDS_TEST) == DISP_CHANGE_SUCCESSFUL
+def get_supported_resolutions(device: Optional[str] = None) -> List[Tuple[int, int]]:
+    return enumerate_modes(device).sizes()
+
 
+def _size_devmode(width: int, height: int, frequency: int = 0, bpp: int = 0) -> Any:
+    """DEVMODE da thread preenchido com o modo; devolve o byref() para a chamada.
 
-def change_resolution(width: int, height: int) -> Tuple[bool, str]:
-    dm = DEVMODE()
-    dm.dmSize = ctypes.sizeof(DEVMODE)
+    Frequência e bpp a 0 ficam fora de dmFields: o driver escolhe-os.
+    """
+    dm, ref = _devmode()
     dm.dmPelsWidth = width
     dm.dmPelsHeight = height
-    dm.dmFields = DM_PELSWIDTH | DM_PELSHEIGHT
-    result = user32.ChangeDisplaySettingsW(ctypes.byref(dm), CDS_UPDATEREGISTRY)
+    fields = DM_PELSWIDTH | DM_PELSHEIGHT
+    if frequency:
+        dm.dmDisplayFrequency = frequency
+        fields |= DM_DISPLAYFREQUENCY
+    if bpp:
+        dm.dmBitsPerPel = bpp
+        fields |= DM_BITSPERPEL
+    dm.dmFields = fields
+    return ref
+
+
+def test_resolution(
+    width: int, height: int, device: Optional[str] = None, frequency: int = 0, bpp: int = 0
+) -> bool:
+    ref = _size_devmode(width, height, frequency, bpp)
+    return user32.ChangeDisplaySettingsExW(device, ref, None, CDS_TEST, None) == DISP_CHANGE_SUCCESSFUL
+
+
+def confirm_mode(
+    device: Optional[str], width: int, height: int, frequency: int = 0, bpp: int = 0
+) -> Tuple[bool, Optional[DisplayMode]]:
+    """Relê o modo em uso até coincidir com o pedido; devolve (coincide, último lido)."""
+    mode = None
+    for attempt in range(_CONFIRMACAO_TENTATIVAS):
+        if attempt:
+            time.sleep(_CONFIRMACAO_INTERVALO)
+        mode = get_current_mode(device)
+        if mode_matches(mode, width, height, frequency, bpp):
+            return True, mode
+    return False, mode
+
+
+def _erro_confirmacao(mode: Optional[DisplayMode]) -> str:
+    if mode is None:
+        return "O driver aceitou a alteração, mas o modo em uso não pôde ser lido."
+    return (
+        f"O driver aceitou a alteração, mas o ecrã ficou em "
+        f"{mode.width}×{mode.height} a {mode.frequency} Hz, {mode.bpp} bpp."
+    )
+
+
+def switch_mode(
+    width: int, height: int, device: Optional[str] = None, frequency: int = 0, bpp: int = 0
+) -> Resultado:
+    """Só a troca: o código de retorno do driver, sem reler o modo (mode_sweep mede o resto)."""
+    ref = _size_devmode(width, height, frequency, bpp)
+    result = user32.ChangeDisplaySettingsExW(device, ref, None, CDS_UPDATEREGISTRY, None)
+    if result == DISP_CHANGE_SUCCESSFUL:
+        return True, ""
+    return False, _erro(result)
+
+
+def change_resolution(
+    width: int, height: int, device: Optional[str] = None, frequency: int = 0, bpp: int = 0
+) -> Resultado:
+    """Aplica o modo e confirma-o relendo o modo em uso (o código de retorno não basta)."""
+    ok, erro = switch_mode(width, height, device, frequency, bpp)
+    if not ok:
+        return ok, erro
+    ok, mode = confirm_mode(device, width, height, frequency, bpp)
+    return (True, "") if ok else (False, _erro_confirmacao(mode))
+
+
+# ── Alterações em lote (vários monitores, uma única troca de modo) ─────────────
+def _stage(device: str, ref: Any) -> Resultado:
+    # CDS_NORESET: grava no registo sem aplicar; commit_changes() aplica tudo de uma vez.
+    result = user32.ChangeDisplaySettingsExW(device, ref, None, CDS_UPDATEREGISTRY | CDS_NORESET, None)
+    if result == DISP_CHANGE_SUCCESSFUL:
+        return True, ""
+    return False, _erro(result)
+
+
+def stage_resolution(device: str, width: int, height: int) -> Resultado:
+    return _stage(device, _size_devmode(width, height))
+
+
+def commit_changes() -> Resultado:
+    result = user32.ChangeDisplaySettingsExW(None, None, None, 0, None)
     if result == DISP_CHANGE_SUCCESSFUL:
         return True, ""
-    return False, ERROS_DRIVER.get(result, f"Erro desconhecido (código {result}).")
+    return False, _erro(result)
+
+
+def capture_topology() -> List[MonitorState]:
+    """Modo e posição atuais de todos os monitores ligados."""
+    topology: List[MonitorState] = []
+    for device, _label, _primary in list_monitors():
+        mode = get_current_mode(device)
+        if mode is None:
+            continue
+        dm = _buffers.dm  # ainda com a leitura de get_current_mode
+        topology.append(MonitorState(device, mode, int(dm.dmPositionX), int(dm.dmPositionY)))
+    return topology
+
+
+def _state_devmode(state: MonitorState) -> Any:
+    # Tuplo exato (frequência e bpp incluídos), mais posição e orientação.
+    m = state.mode
+    ref = _size_devmode(m.width, m.height, m.frequency, m.bpp)
+    dm = _buffers.dm
+    dm.dmPositionX = state.x
+    dm.dmPositionY = state.y
+    dm.dmDisplayOrientation = m.orientation
+    dm.dmFields |= DM_POSITION | DM_DISPLAYORIENTATION
+    return ref
+
+
+def _unstage(before: Sequence[MonitorState]) -> None:
+    # Volta a gravar o estado anterior por cima do que já ficou preparado (sem commit).
+    for state in before:
+        _stage(state.device, _state_devmode(state))
+
+
+def restore_topology(topology: Sequence[MonitorState]) -> Resultado:
+    """Repõe modo e posição de todos os monitores numa só troca; se algum falhar, nada muda."""
+    before = capture_topology()
+    for state in topology:
+        ok, erro = _stage(state.device, _state_devmode(state))
+        if not ok:
+            _unstage(before)
+            return False, _on_device(state.device, erro)
+    ok, erro = commit_changes()
+    if not ok:
+        return ok, erro
+    errors: List[str] = []
+    for state in topology:
+        m = state.mode
+        ok, mode = confirm_mode(state.device, m.width, m.height, m.frequency, m.bpp)
+        if not ok:
+            errors.append(f"{state.device}: {_erro_confirmacao(mode)}")
+    return not errors, "\n".join(errors)
+
+
+def apply_resolutions(changes: Dict[str, Tuple[int, int]]) -> Resultado:
+    """Altera vários monitores de uma vez; se algum falhar, nada muda."""
+    before = capture_topology()
+    for device, (width, height) in changes.items():
+        ok, erro = stage_resolution(device, width, height)
+        if not ok:
+            _unstage(before)
+            return False, _on_device(device, erro)
+    ok, erro = commit_changes()
+    if not ok:
+        return ok, erro
+    for device, (width, height) in changes.items():
+        ok, mode = confirm_mode(device, width, height)
+        if not ok:
+            return False, f"{device}: {_erro_confirmacao(mode)}"
+    return True, ""